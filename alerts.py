@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+import exceptions
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CHAT_ID = os.getenv('ADMIN_CHAT_ID', os.getenv('TELEGRAM_CHAT_ID'))
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 3600))
+ERROR_SAMPLE_LENGTH = 200
+
+ERROR_MESSAGE = 'Сбой в работе программы: {}'
+USER_ERRORS = (exceptions.TokenRejectedException,)
+
+
+def error_cause(error):
+    """Функция возвращает исходное исключение без обёрток запроса."""
+    return error.__cause__ or error
+
+
+def error_sample(error):
+    """Функция возвращает укороченный текст исходного исключения."""
+    text = str(error_cause(error))
+    if len(text) > ERROR_SAMPLE_LENGTH:
+        text = text[:ERROR_SAMPLE_LENGTH] + '…'
+    return text
+
+
+class ErrorAggregator:
+    """Сводка ошибок опроса по классам исключений.
+
+    Пользователю сообщается только об ошибках его подписки (USER_ERRORS)
+    и не чаще раза в interval секунд. Остальные ошибки относятся к работе
+    бота и уходят в чат оператора admin_chat_id: первая ошибка класса,
+    которого не было в прошлом окне, сразу, повторы - сводкой раз в
+    interval секунд. Без чата оператора сводки пишутся в журнал.
+    """
+
+    def __init__(self, send, admin_chat_id=ADMIN_CHAT_ID,
+                 interval=ERROR_DIGEST_INTERVAL, clock=time.monotonic):
+        """Создаёт пустую сводку; send(chat_id, text) отправляет сообщение."""
+        self.send = send
+        self.admin_chat_id = admin_chat_id
+        self.interval = interval
+        self.clock = clock
+        self.window_start = clock()
+        self.counts = Counter()
+        self.previous = set()
+        self.alerted = set()
+        self.chats = defaultdict(set)
+        self.samples = {}
+        self.user_notified = {}
+        self._lock = threading.Lock()
+
+    def record(self, subscription, error):
+        """Учитывает ошибку; возвращает сообщение для подписки или None."""
+        cause = error_cause(error)
+        if isinstance(cause, USER_ERRORS):
+            return self.user_message(subscription, cause)
+        kind = type(cause).__name__
+        with self._lock:
+            first = kind not in self.counts and kind not in self.previous
+            self.counts[kind] += 1
+            self.chats[kind].add(subscription.chat_id)
+            self.samples[kind] = error_sample(error)
+            if first:
+                self.alerted.add(kind)
+        if first:
+            self.alert('Новая ошибка {}: {}'.format(kind, self.samples[kind]))
+        return None
+
+    def user_message(self, subscription, error):
+        """Возвращает сообщение об ошибке подписки, если пора его отправить."""
+        now = self.clock()
+        notified = self.user_notified.get(subscription.chat_id)
+        if notified is not None and now - notified < self.interval:
+            return None
+        self.user_notified[subscription.chat_id] = now
+        return ERROR_MESSAGE.format(error)
+
+    def alert(self, text):
+        """Отправляет сообщение оператору или пишет его в журнал."""
+        if self.admin_chat_id:
+            self.send(self.admin_chat_id, text)
+        else:
+            logger.warning(text)
+
+    def tick(self):
+        """Отправляет сводку повторных ошибок, если окно истекло."""
+        now = self.clock()
+        if now - self.window_start < self.interval:
+            return False
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+            chats, self.chats = self.chats, defaultdict(set)
+            samples, self.samples = self.samples, {}
+            alerted, self.alerted = self.alerted, set()
+            self.window_start = now
+            self.previous = set(counts)
+        repeated = [(kind, count) for kind, count in counts.most_common()
+                    if count > (kind in alerted)]
+        if not repeated:
+            return False
+        self.alert('Ошибки за {:.0f} мин:\n{}'.format(
+            self.interval / 60, '\n'.join(
+                '{}: {} раз, чатов: {}. Последняя: {}'.format(
+                    kind, count, len(chats[kind]), samples[kind])
+                for kind, count in repeated)))
+        return True
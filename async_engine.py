@@ -0,0 +1,284 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from http import HTTPStatus
+
+import aiohttp
+
+import batching
+import homework
+import http_client
+import metrics
+import parsing
+import profiling
+import resilience
+import streaming
+from engine import PollingEngine
+from lifecycle import SHUTDOWN_TIMEOUT
+from scheduler import POLL_DEFERRED, POLL_FAILED, POLL_SENT, POLL_UNCHANGED
+
+logger = logging.getLogger(__name__)
+
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 100))
+
+
+class AsyncPollingEngine(PollingEngine):
+    """Асинхронный движок опроса с ограничением числа запросов."""
+
+    def __init__(self, bot, registry, cache=None, scheduler=None,
+                 store=None, outbox=None, inbox=None, shard=None,
+                 stream=False, concurrency=POLL_CONCURRENCY, parser=None,
+                 budget=batching.FETCH_CYCLE_BUDGET, lifecycle=None,
+                 loader=None):
+        """Связывает движок с ботом, реестром, кэшем и лимитом запросов.
+
+        parser - пул разбора ответов (parsing.ParsePool); без него ответы
+        разбираются в цикле событий по одному. budget - секунды цикла,
+        после которых новые запросы откладываются до следующего цикла.
+        """
+        super().__init__(bot, registry, cache, scheduler, store, outbox,
+                         inbox, shard, stream, lifecycle=lifecycle,
+                         loader=loader)
+        self.concurrency = concurrency
+        self.parser = parser
+        self.budget = budget
+        self.session = None
+
+    async def request(self, data, parser=None):
+        """Выполняет запрос через автомат хоста, возвращает ответ и тело.
+
+        Успешный ответ передаётся parser по частям, тогда тело пустое.
+        """
+        breaker = resilience.breaker_for(data['url'])
+        breaker.allow()
+        try:
+            with metrics.API_LATENCY.time():
+                async with self.session.get(
+                    data['url'], headers=data['headers'],
+                    params=data['params'],
+                ) as response:
+                    if parser is None or response.status != HTTPStatus.OK:
+                        content = await response.read()
+                    else:
+                        content = b''
+                        async for chunk in response.content.iter_chunked(
+                                streaming.STREAM_CHUNK_SIZE):
+                            if parser.feed(chunk):
+                                break
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        if resilience.is_retryable(response.status):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response, content
+
+    async def fetch_content(self, subscription):
+        """Асинхронно запрашивает статусы, возвращает тело ответа.
+
+        None - ответ не изменился с последней обработки.
+        """
+        token, from_date = subscription.token, subscription.current_date
+        headers = None
+        if self.cache is not None:
+            headers = self.cache.conditional_headers(token, from_date)
+        data = homework.api_request_data(token, from_date, headers)
+        try:
+            response, content = await self.request(data)
+            homework.check_status_code(
+                response.status,
+                lambda: (response.reason, content.decode(errors='replace')),
+                conditional=bool(headers))
+        except Exception as error:
+            raise homework.api_error(error, data) from error
+        if self.cache is not None and self.cache.is_unchanged(
+                token, from_date, response.status, response.headers,
+                content):
+            return None
+        return content
+
+    async def fetch_stream(self, subscription):
+        """Асинхронно запрашивает статусы и разбирает ответ по частям."""
+        token, from_date = subscription.token, subscription.current_date
+        data = homework.api_request_data(token, from_date)
+        parser = streaming.StreamParser(newer_than=from_date)
+        try:
+            response, content = await self.request(data, parser)
+            homework.check_status_code(
+                response.status,
+                lambda: (response.reason, content.decode(errors='replace')))
+        except Exception as error:
+            raise homework.api_error(error, data) from error
+        return parser.close()
+
+    async def fetch(self, subscription):
+        """Асинхронно запрашивает статусы, None - ответ не изменился."""
+        if self.stream and self.cache is None:
+            with profiling.span('fetch'):
+                return await self.fetch_stream(subscription)
+        with profiling.span('fetch'):
+            content = await self.fetch_content(subscription)
+        if content is None:
+            return None
+        try:
+            return parsing.loads(content)
+        except ValueError as error:
+            raise ConnectionError(
+                'Ответ API не в формате JSON: {}'.format(error)) from error
+
+    async def in_executor(self, function, *args):
+        """Выполняет синхронный вызов бота в пуле потоков.
+
+        Вызов получает копию контекста задачи, чтобы замеры этапов в
+        потоке вкладывались в замер цикла.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            contextvars.copy_context().run, function, *args))
+
+    def cycle_deadline(self):
+        """Возвращает время цикла событий, когда кончится бюджет цикла."""
+        if self.budget is None:
+            return None
+        return asyncio.get_running_loop().time() + self.budget
+
+    @staticmethod
+    def over_budget(deadline):
+        """Проверяет, исчерпан ли бюджет цикла."""
+        return (deadline is not None
+                and asyncio.get_running_loop().time() >= deadline)
+
+    async def poll_async(self, semaphore, subscription, deadline=None):
+        """Опрашивает одну подписку, не превышая лимит запросов."""
+        try:
+            async with semaphore:
+                if self.over_budget(deadline):
+                    return POLL_DEFERRED
+                response = await self.fetch(subscription)
+            if response is None:
+                return POLL_UNCHANGED
+            return await self.in_executor(
+                self.process, subscription, response)
+        except Exception as error:
+            await self.in_executor(self.handle_error, subscription, error)
+        return POLL_FAILED
+
+    async def fetch_or_error(self, semaphore, subscription, deadline=None):
+        """Запрашивает тело ответа; возвращает (тело, ошибка).
+
+        None - запрос отложен из-за бюджета цикла.
+        """
+        try:
+            async with semaphore:
+                if self.over_budget(deadline):
+                    return None
+                with profiling.span('fetch'):
+                    return await self.fetch_content(subscription), None
+        except Exception as error:
+            return None, error
+
+    def process_many(self, subscriptions, results):
+        """Обрабатывает разобранные ответы, возвращает результаты опроса."""
+        outcomes = []
+        for subscription, (response, error) in zip(subscriptions, results):
+            if error is None and response is None:
+                outcomes.append(POLL_UNCHANGED)
+                continue
+            try:
+                if error is not None:
+                    raise error
+                outcomes.append(self.process(subscription, response))
+            except Exception as exception:
+                self.handle_error(subscription, exception)
+                outcomes.append(POLL_FAILED)
+        return outcomes
+
+    async def poll_batch(self, subscriptions):
+        """Опрашивает подписки, разбирая ответы в пуле процессов пачкой."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        deadline = self.cycle_deadline()
+        fetched = await asyncio.gather(*(
+            self.fetch_or_error(semaphore, subscription, deadline)
+            for subscription in subscriptions
+        ))
+        started = [(subscription, result) for subscription, result
+                   in zip(subscriptions, fetched) if result is not None]
+        decoded = iter(await self.in_executor(
+            self.parser.decode_many,
+            [content for _, (content, _) in started if content is not None]))
+        results = [next(decoded) if content is not None else (None, error)
+                   for _, (content, error) in started]
+        outcomes = iter(await self.in_executor(
+            self.process_many, [subscription for subscription, _ in started],
+            results))
+        return [POLL_DEFERRED if result is None else next(outcomes)
+                for result in fetched]
+
+    async def poll_many(self, subscriptions):
+        """Опрашивает подписки параллельно, возвращает их результаты."""
+        if self.parser is not None:
+            return await self.poll_batch(subscriptions)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        deadline = self.cycle_deadline()
+        return await asyncio.gather(*(
+            self.poll_async(semaphore, subscription, deadline)
+            for subscription in subscriptions
+        ))
+
+    async def run_cycle_async(self):
+        """Опрашивает все подписки параллельно, возвращает число отправок."""
+        outcomes = await self.poll_many(list(self.registry))
+        return outcomes.count(POLL_SENT)
+
+    async def run_due_async(self):
+        """Опрашивает подписки, время которых наступило."""
+        with profiling.span('cycle'):
+            await self.in_executor(self.rebalance)
+            subscriptions = list(self.due_subscriptions())
+            outcomes = await self.poll_many(subscriptions)
+            for subscription, outcome in zip(subscriptions, outcomes):
+                self.reschedule(subscription, outcome)
+            self.alerts.tick()
+            await self.in_executor(self.drain)
+            await self.in_executor(self.flush)
+        return outcomes.count(POLL_SENT)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """Завершает работу движка и останавливает пул разбора ответов."""
+        try:
+            super().shutdown(timeout)
+        finally:
+            if self.parser is not None:
+                self.parser.close()
+
+    async def run_async(self):
+        """Опрашивает подписки бесконечно по адаптивному расписанию."""
+        logger.info('Асинхронный опрос %s подписок', len(self.registry))
+        metrics.SUBSCRIPTIONS.set(len(self.registry))
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=http_client.HTTP_POOL_MAXSIZE)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=http_client.HTTP_CONNECT_TIMEOUT,
+            sock_read=http_client.HTTP_READ_TIMEOUT)
+        async with aiohttp.ClientSession(
+                connector=connector, timeout=timeout) as session:
+            self.session = session
+            self.restore()
+            self.schedule_all()
+            while not self.lifecycle.stopping.is_set():
+                if self.lifecycle.take_reload():
+                    await self.in_executor(self.reload)
+                await self.run_due_async()
+                await self.in_executor(self.wait, self.time_until_next())
+            await self.in_executor(self.shutdown)
+
+    def run(self):
+        """Запускает асинхронный цикл опроса."""
+        asyncio.run(self.run_async())
@@ -0,0 +1,77 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent import futures
+
+import http_client
+
+FETCH_MAX_IN_FLIGHT = int(os.getenv(
+    'FETCH_MAX_IN_FLIGHT', http_client.HTTP_POOL_MAXSIZE))
+FETCH_CYCLE_BUDGET = float(os.getenv('FETCH_CYCLE_BUDGET', 0)) or None
+
+
+class BatchFetcher:
+    """Запросы к API для пачки подписок через пул потоков.
+
+    Одновременно выполняется не больше max_in_flight запросов, новые
+    запросы начинаются по мере завершения прежних, пока результаты
+    обрабатываются в вызывающем потоке. После budget секунд от начала
+    пачки новые запросы не начинаются, а оставшиеся подписки
+    откладываются до следующего цикла.
+    """
+
+    def __init__(self, max_in_flight=FETCH_MAX_IN_FLIGHT,
+                 budget=FETCH_CYCLE_BUDGET, clock=time.monotonic):
+        """Создаёт загрузчик; пул потоков создаётся при первой пачке."""
+        self.max_in_flight = max_in_flight
+        self.budget = budget
+        self.clock = clock
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        """Возвращает пул потоков загрузчика."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    self.max_in_flight, thread_name_prefix='fetch')
+        return self._executor
+
+    def fetch_all(self, subscriptions, fetch):
+        """Перебирает (подписка, future запроса) по мере готовности.
+
+        Для подписок, не начатых из-за бюджета цикла, future - None.
+        """
+        deadline = None if self.budget is None else self.clock() + self.budget
+        pending = iter(subscriptions)
+        in_flight = {}
+        executor = self.executor()
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < self.max_in_flight:
+                subscription = next(pending, None)
+                if subscription is None:
+                    break
+                if deadline is not None and self.clock() >= deadline:
+                    exhausted = True
+                    yield subscription, None
+                    break
+                future = executor.submit(
+                    contextvars.copy_context().run, fetch, subscription)
+                in_flight[future] = subscription
+            if not in_flight:
+                break
+            done, _ = futures.wait(
+                in_flight, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future
+        for subscription in pending:
+            yield subscription, None
+
+    def close(self):
+        """Останавливает пул потоков."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,125 @@
+"""Время полного обхода подписок последовательно, пачкой и асинхронно.
+
+Каждый режим один раз опрашивает все подписки через run_due() на
+локальной имитации API с задержкой ответа --latency. Последовательный
+обход замеряется на --sample подписках и пересчитывается на все.
+Пачка - BatchFetcher с HTTP_POOL_MAXSIZE одновременными запросами через
+общую сессию с пулом того же размера; async - AsyncPollingEngine с тем же
+лимитом. С --budget подписки, не начатые за бюджет, откладываются.
+
+Запуск: HTTP_POOL_MAXSIZE=32 python benchmarks/bench_batch.py \
+    --subscriptions 10000 --window 30
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+import http_client  # noqa: E402
+from async_engine import AsyncPollingEngine  # noqa: E402
+from batching import BatchFetcher  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from fake_practicum import FakePracticumServer  # noqa: E402
+from scheduler import AdaptiveScheduler  # noqa: E402
+from subscriptions import SubscriptionRegistry  # noqa: E402
+
+
+class FakeBot:
+    """Бот, который только считает отправленные сообщения."""
+
+    def __init__(self):
+        """Создаёт бота с пустым счётчиком."""
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Учитывает отправку сообщения."""
+        self.sent += 1
+
+
+def parse_args():
+    """Разбирает параметры замера."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--subscriptions', type=int, default=10000)
+    parser.add_argument('--window', type=float, default=30,
+                        help='окно, в которое должен уложиться обход, с')
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='задержка ответа API, с')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='бюджет цикла, с')
+    parser.add_argument('--sample', type=int, default=500,
+                        help='подписок в последовательном замере')
+    return parser.parse_args()
+
+
+def make_engine(engine_class, count, **options):
+    """Создаёт движок с count подписками, запланированными на сейчас."""
+    registry = SubscriptionRegistry()
+    for number in range(count):
+        registry.add('token-{}'.format(number), number + 1)
+    engine = engine_class(FakeBot(), registry,
+                          scheduler=AdaptiveScheduler(3600), **options)
+    engine.schedule_all()
+    return engine
+
+
+def sweep(engine):
+    """Возвращает время одного run_due()."""
+    started = time.perf_counter()
+    engine.run_due()
+    return time.perf_counter() - started
+
+
+async def sweep_async(engine, in_flight):
+    """Возвращает время одного run_due_async() с сессией aiohttp."""
+    connector = aiohttp.TCPConnector(limit=in_flight,
+                                     limit_per_host=in_flight)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        engine.session = session
+        started = time.perf_counter()
+        await engine.run_due_async()
+        return time.perf_counter() - started
+
+
+def report(name, elapsed, polled, args):
+    """Печатает время обхода и укладывается ли оно в окно."""
+    print('{:<12} {:>6.1f} с, опрошено {} из {}, {:.0f} запросов/с, {}'.format(
+        name, elapsed, polled, args.subscriptions, polled / elapsed,
+        'в окне' if elapsed <= args.window else 'не укладывается в окно'))
+
+
+def main():
+    """Замеряет обход всех подписок в трёх режимах."""
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    server = FakePracticumServer(latency=args.latency).start()
+    homework.ENDPOINT = server.endpoint
+
+    elapsed = sweep(make_engine(PollingEngine, args.sample))
+    report('sequential', elapsed * args.subscriptions / args.sample,
+           args.subscriptions, args)
+
+    in_flight = http_client.HTTP_POOL_MAXSIZE
+    fetcher = BatchFetcher(max_in_flight=in_flight, budget=args.budget)
+    before = server.requests
+    elapsed = sweep(make_engine(PollingEngine, args.subscriptions,
+                                fetcher=fetcher))
+    report('batch', elapsed, server.requests - before, args)
+    fetcher.close()
+
+    before = server.requests
+    engine = make_engine(AsyncPollingEngine, args.subscriptions,
+                         concurrency=in_flight, budget=args.budget)
+    elapsed = asyncio.run(sweep_async(engine, in_flight))
+    report('async', elapsed, server.requests - before, args)
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
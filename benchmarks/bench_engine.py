@@ -0,0 +1,75 @@
+"""Замер памяти на подписку и времени цикла PollingEngine.
+
+Запуск: python benchmarks/bench_engine.py [количество подписок]
+"""
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from http_cache import ResponseCache  # noqa: E402
+from fake_practicum import FakePracticumServer  # noqa: E402
+from subscriptions import SubscriptionRegistry  # noqa: E402
+
+
+class FakeBot:
+    """Бот, который только считает отправленные сообщения."""
+
+    def __init__(self):
+        """Создаёт бота с пустым счётчиком."""
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Учитывает отправку сообщения."""
+        self.sent += 1
+
+
+def snapshot_size(snapshot, before):
+    """Возвращает прирост памяти между снимками tracemalloc."""
+    return sum(stat.size_diff for stat in snapshot.compare_to(before, 'lineno'))
+
+
+def main(count):
+    """Замеряет память подписок после полного цикла и время циклов.
+
+    Первый цикл выполняется под tracemalloc, чтобы учесть состояние,
+    которое подписка накапливает при опросе (сообщение, статус, кэш).
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    homework.logger.setLevel(logging.WARNING)
+    server = FakePracticumServer().start()
+    homework.ENDPOINT = server.endpoint
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    registry = SubscriptionRegistry()
+    for number in range(count):
+        registry.add('token-{}'.format(number), number + 1)
+    registered = tracemalloc.take_snapshot()
+    bot = FakeBot()
+    engine = PollingEngine(bot, registry, cache=ResponseCache())
+    engine.run_cycle()
+    polled = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    print('Подписок: {}, памяти на подписку: {:.0f} байт после '
+          'регистрации, {:.0f} байт после цикла опроса'.format(
+              count, snapshot_size(registered, before) / count,
+              snapshot_size(polled, before) / count))
+
+    for cycle in ('второй', 'третий'):
+        started = time.perf_counter()
+        engine.run_cycle()
+        elapsed = time.perf_counter() - started
+        print('{} цикл: {:.2f} с, {:.0f} подписок/с, отправлено {}'.format(
+            cycle, elapsed, count / elapsed, bot.sent))
+    print('Запросов к API: {}'.format(server.requests))
+    server.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,77 @@
+"""Сравнение задержки запроса без пула соединений и с общей сессией.
+
+Запуск: python benchmarks/bench_http_session.py [количество запросов]
+Для HTTPS-заглушки нужен openssl, сертификат создаётся во временном каталоге.
+"""
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client  # noqa: E402
+from fake_practicum import FakePracticumServer  # noqa: E402
+
+
+def make_ssl_context(directory):
+    """Создаёт самоподписанный сертификат и серверный SSL-контекст."""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+         '-keyout', key, '-out', cert, '-days', '1',
+         '-subj', '/CN=127.0.0.1'],
+        check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def measure(get, url, count):
+    """Возвращает задержки count запросов в миллисекундах."""
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = get(url, headers={'Authorization': 'OAuth token'},
+                       params={'from_date': 0}, verify=False,
+                       timeout=http_client.TIMEOUT)
+        response.json()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name, timings):
+    """Печатает медиану и 99-й перцентиль задержки."""
+    timings = sorted(timings)
+    print('{:<10} p50={:.2f} мс p99={:.2f} мс'.format(
+        name, statistics.median(timings),
+        timings[int(len(timings) * 0.99) - 1]))
+
+
+def main(count):
+    """Замеряет холодные запросы и запросы через пул соединений."""
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        server = FakePracticumServer(
+            ssl_context=make_ssl_context(directory)).start()
+    url = server.endpoint
+
+    report('холодные', measure(requests.get, url, count))
+    cold_connections = server.connections
+    session = http_client.create_session()
+    report('пул', measure(session.get, url, count))
+    print('Соединений: холодные {}, пул {}'.format(
+        cold_connections, server.connections - cold_connections))
+    session.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,97 @@
+"""Накладные расходы журнала на один цикл опроса подписки.
+
+Сравнивает прежнюю схему (синхронные StreamHandler и FileHandler,
+строки форматируются до вызова логгера) и журнал через очередь с
+отложенным форматированием. Консольный вывод направляется в /dev/null.
+
+Запуск: python benchmarks/bench_logging.py [количество циклов]
+"""
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_config  # noqa: E402
+
+DATA = {
+    'url': 'https://practicum.yandex.ru/api/user_api/homework_statuses/',
+    'headers': {'Authorization': 'OAuth token'},
+    'params': {'from_date': 1650000000},
+}
+MESSAGE = 'Изменился статус проверки работы "hw". Работа взята на проверку.'
+
+
+def eager_cycle(logger):
+    """Вызовы журнала одного опроса в прежнем стиле."""
+    logger.info('Выполняем запрос к API c url:{url}, '
+                'headers:{headers}, params:{params}'.format(**DATA))
+    logger.info('Запрос по API прошел успешно')
+    logger.info('Выполняем проверку ответа API на корректность')
+    logger.info('Список домашних работ получен успешно')
+    logger.info('Попытка отправки сообщения {} в чат'.format(MESSAGE))
+    logger.info('Сообщение {} отправлено в чат'.format(MESSAGE))
+
+
+def lazy_cycle(logger):
+    """Вызовы журнала одного опроса с отложенным форматированием."""
+    logger.info('Выполняем запрос к API c url:%(url)s, '
+                'headers:%(headers)s, params:%(params)s', DATA)
+    logger.info('Запрос по API прошел успешно')
+    logger.info('Выполняем проверку ответа API на корректность')
+    logger.info('Список домашних работ получен успешно')
+    logger.info('Попытка отправки сообщения %s в чат', MESSAGE)
+    logger.info('Сообщение %s отправлено в чат', MESSAGE)
+
+
+def measure(cycle, logger, count):
+    """Возвращает среднее время цикла в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(count):
+        cycle(logger)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def sync_logger(directory, devnull):
+    """Собирает логгер по прежней схеме homework.py."""
+    logger = logging.getLogger('bench.sync')
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(devnull))
+    file_handler = logging.FileHandler(
+        os.path.join(directory, 'sync.log'), encoding='utf-8')
+    file_handler.setFormatter(log_config.FORMATTER)
+    logger.addHandler(file_handler)
+    return logger
+
+
+def main(count):
+    """Печатает время цикла для обеих схем при включённом и выключенном
+    уровне INFO.
+    """
+    with tempfile.TemporaryDirectory() as directory, \
+            open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        old = sync_logger(directory, devnull)
+        log_config.configure_logging(
+            path=os.path.join(directory, 'queue.log'))
+        new = logging.getLogger('bench.queue')
+        results = []
+        for level in (logging.INFO, logging.WARNING):
+            old.setLevel(level)
+            new.setLevel(level)
+            results.append((
+                logging.getLevelName(level),
+                measure(eager_cycle, old, count),
+                measure(lazy_cycle, new, count),
+            ))
+        log_config.stop_logging()
+    for level, before, after in results:
+        print('{:<8} до: {:.1f} мкс/цикл, после: {:.1f} мкс/цикл'.format(
+            level, before, after))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
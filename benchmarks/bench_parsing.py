@@ -0,0 +1,75 @@
+"""Пропускная способность разбора ответов API на одном и нескольких ядрах.
+
+Сравнивает json.loads с проверкой в одном процессе, быстрый декодер
+(orjson, если установлен) и parsing.ParsePool на синтетических ответах
+homework_statuses растущего размера.
+
+Запуск: python benchmarks/bench_parsing.py [число ответов] [процессов]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import homework  # noqa: E402
+import parsing  # noqa: E402
+
+SIZES = (1, 10, 100, 1000)
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def make_body(size):
+    """Возвращает тело ответа с size работами."""
+    return json.dumps({
+        'homeworks': [{
+            'id': number,
+            'status': STATUSES[number % len(STATUSES)],
+            'homework_name': f'username__project_{number}.zip',
+            'reviewer_comment': 'Отличная работа, но есть замечания. ' * 3,
+            'date_updated': '2022-04-20T10:00:00Z',
+            'lesson_name': f'Проект спринта {number}',
+        } for number in range(size)],
+        'current_date': 1650000000,
+    }).encode('utf-8')
+
+
+def json_decode(content):
+    """Разбор в прежнем виде: json.loads и проверка ответа."""
+    response = json.loads(content)
+    homework.check_response(response)
+    return response
+
+
+def measure(decode_many, bodies):
+    """Возвращает число разобранных ответов в секунду."""
+    started = time.perf_counter()
+    decode_many(bodies)
+    return len(bodies) / (time.perf_counter() - started)
+
+
+def main():
+    """Печатает пропускную способность для каждого размера ответа."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    pool = parsing.ParsePool(processes=processes)
+    print(f'ядер: {os.cpu_count()}, процессов: {processes}, '
+          f'orjson: {parsing.orjson is not None}')
+    print(f'{"работ":>6} {"json.loads":>12} {"decode":>12} {"пул":>12}')
+    try:
+        pool.decode_many([make_body(1)] * pool.batch_size * processes)
+        for size in SIZES:
+            bodies = [make_body(size)] * max(count // size, 64)
+            single = measure(
+                lambda items: [json_decode(item) for item in items], bodies)
+            fast = measure(parsing.decode_batch, bodies)
+            pooled = measure(pool.decode_many, bodies)
+            print(f'{size:>6} {single:>10.0f}/с {fast:>10.0f}/с '
+                  f'{pooled:>10.0f}/с')
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Время сборки сообщения о статусе работы.
+
+Сравниваются прежняя сборка через str.format с поиском вердикта в
+словаре, заранее разобранный шаблон без кэша и с LRU-кэшем. Названия
+работ повторяются, как при опросе одних и тех же подписок.
+
+Запуск: python benchmarks/bench_rendering.py [сборок] [разных работ]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering import (DEFAULT_LOCALE, TEMPLATES, VERDICTS,  # noqa: E402
+                       get_renderer)
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def format_status(homework_name, status):
+    """Собирает сообщение прежним способом."""
+    return TEMPLATES[DEFAULT_LOCALE].format(
+        homework_name=homework_name,
+        verdict=VERDICTS[DEFAULT_LOCALE][status])
+
+
+def main():
+    """Печатает время одной сборки сообщения каждым способом."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    names = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    items = [(f'username__hw{number:04d}.zip', STATUSES[number % 3])
+             for number in range(names)]
+    renderer = get_renderer()
+    variants = {
+        'str.format': format_status,
+        'шаблон': renderer.compose,
+        'шаблон + LRU': renderer.render,
+    }
+    rounds = max(count // names, 1)
+    for label, render in variants.items():
+        seconds = timeit.timeit(
+            lambda: [render(name, status) for name, status in items],
+            number=rounds)
+        print(f'{label}: {seconds / (rounds * names) * 1e9:.0f} нс')
+    print(renderer.render.cache_info())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Время холодного запуска бота до первого запроса к API.
+
+Бот запускается отдельным процессом, как на платформе после рестарта,
+с endpoint на локальной имитации API. Замеряется время от запуска
+процесса до получения имитацией первого запроса.
+
+Запуск: python benchmarks/bench_startup.py [запусков]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from fake_practicum import FakePracticumServer  # noqa: E402
+
+BOOTSTRAP = ('import sys, homework; '
+             'homework.ENDPOINT = sys.argv[1]; homework.main()')
+
+
+def first_poll(server, env):
+    """Возвращает время от запуска бота до его первого запроса к API."""
+    before = server.requests
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', BOOTSTRAP, server.endpoint], cwd=ROOT_DIR,
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while server.requests == before:
+            if process.poll() is not None:
+                raise RuntimeError('Бот завершился до первого запроса')
+            time.sleep(0.001)
+        return time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    """Печатает медиану времени до первого опроса в обоих режимах."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    server = FakePracticumServer().start()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ, PRACTICUM_TOKEN='token',
+            TELEGRAM_TOKEN='123456:token', TELEGRAM_CHAT_ID='1',
+            STATE_DB=os.path.join(directory, 'state.sqlite3'),
+            LOG_FILE=os.path.join(directory, 'homework.log'),
+            LOG_LEVEL='WARNING')
+        for mode in ('', '1'):
+            env['ASYNC_MODE'] = mode
+            times = [first_poll(server, env) for _ in range(runs)]
+            print('{}: {:.0f} мс до первого опроса'.format(
+                'async' if mode else 'sync',
+                statistics.median(times) * 1000))
+            os.remove(env['STATE_DB'])
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
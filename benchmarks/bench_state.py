@@ -0,0 +1,71 @@
+"""Память состояния подписки после обработки ответа API.
+
+Каждая подписка получает свой разобранный ответ с несколькими работами,
+как при опросе, и проходит PollingEngine.process. Замеряется прирост
+памяти на подписку без кэша ответов и HTTP.
+
+Запуск: python benchmarks/bench_state.py [подписок] [работ в ответе]
+"""
+import json
+import logging
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import PollingEngine  # noqa: E402
+from subscriptions import SubscriptionRegistry  # noqa: E402
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class FakeBot:
+    """Бот, который только считает отправленные сообщения."""
+
+    def __init__(self):
+        """Создаёт бота с пустым счётчиком."""
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Учитывает отправку сообщения."""
+        self.sent += 1
+
+
+def make_body(homeworks):
+    """Возвращает тело ответа API с homeworks работами."""
+    return json.dumps({
+        'homeworks': [{
+            'id': 1000 + number,
+            'homework_name': f'username__hw{number:02d}.zip',
+            'status': STATUSES[number % len(STATUSES)],
+        } for number in range(homeworks)],
+        'current_date': 1650000000,
+    })
+
+
+def main():
+    """Печатает прирост памяти на подписку."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    homeworks = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    logging.disable(logging.CRITICAL)
+    body = make_body(homeworks)
+    bot = FakeBot()
+
+    tracemalloc.start()
+    registry = SubscriptionRegistry()
+    for number in range(count):
+        registry.add(f'token-{number}', number + 1)
+    registered = tracemalloc.get_traced_memory()[0]
+    engine = PollingEngine(bot, registry)
+    for subscription in registry:
+        engine.process(subscription, json.loads(body))
+    polled = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'подписок: {count}, работ: {homeworks}, отправлено: {bot.sent}')
+    print(f'после регистрации: {registered / count:.0f} байт на подписку')
+    print(f'после обработки ответа: {polled / count:.0f} байт на подписку')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Пиковая память и время разбора полной истории работ.
+
+Сравнивает чтение всего ответа и json.loads с разбором по частям
+streaming.StreamParser: без остановки (from_date=0) и с остановкой на
+работах старше from_date, когда новыми остаются 10 работ.
+
+Запуск: python benchmarks/bench_streaming.py [число работ]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming import STREAM_CHUNK_SIZE, StreamParser  # noqa: E402
+
+NOW = 1650000000
+
+
+def make_body(count):
+    """Возвращает ответ с count работами от новых к старым."""
+    return json.dumps({
+        'homeworks': [{
+            'id': number,
+            'status': 'approved',
+            'homework_name': f'username__project_{number}.zip',
+            'reviewer_comment': 'Отличная работа, но есть замечания. ' * 5,
+            'date_updated': time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ', time.gmtime(NOW - number * 3600)),
+        } for number in range(count)],
+        'current_date': NOW,
+    }).encode('utf-8')
+
+
+def chunks(body):
+    """Отдаёт ответ частями, как сеть."""
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[start:start + STREAM_CHUNK_SIZE]
+
+
+def full(body, newer_than):
+    """Собирает ответ целиком и разбирает его."""
+    return json.loads(b''.join(chunks(body)))
+
+
+def streamed(body, newer_than):
+    """Разбирает ответ по мере получения частей."""
+    parser = StreamParser(newer_than)
+    for chunk in chunks(body):
+        if parser.feed(chunk):
+            break
+    return parser.close()
+
+
+def measure(parse, body, newer_than):
+    """Возвращает время в мс и пик памяти в КБ."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    parse(body, newer_than)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def main():
+    """Печатает время и пик памяти для каждого способа."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    body = make_body(count)
+    print(f'работ: {count}, ответ: {len(body) / 1024:.0f} КБ')
+    for name, parse, newer_than in (
+            ('json.loads', full, 0),
+            ('по частям', streamed, 0),
+            ('по частям, 10 новых', streamed, NOW - 9.5 * 3600)):
+        elapsed, peak = measure(parse, body, newer_than)
+        print(f'{name:>20}: {elapsed:8.1f} мс, пик {peak:8.0f} КБ')
+
+
+if __name__ == '__main__':
+    main()
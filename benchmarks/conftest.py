@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+from pytest_benchmark.utils import PercentageRegressionCheck
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from fake_practicum import FakePracticumServer  # noqa: E402
+
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+BENCH_THRESHOLD = int(os.getenv('BENCH_THRESHOLD', 25))
+BENCH_FAST_THRESHOLD = int(os.getenv('BENCH_FAST_THRESHOLD', 100))
+BENCH_FAST_MEDIAN = float(os.getenv('BENCH_FAST_MEDIAN', 0.0001))
+
+
+class MedianRegressionCheck(PercentageRegressionCheck):
+    """Допустимое замедление медианы относительно базового замера.
+
+    Медиана замеров короче BENCH_FAST_MEDIAN секунд меняется между
+    прогонами на десятки процентов от шума планировщика и частоты
+    процессора, поэтому для них порог - BENCH_FAST_THRESHOLD процентов.
+    """
+
+    def __init__(self):
+        """Создаёт проверку медианы."""
+        super().__init__('median', BENCH_THRESHOLD)
+
+    def threshold_for(self, compared):
+        """Возвращает порог в процентах для базового замера."""
+        if compared[self.field] < BENCH_FAST_MEDIAN:
+            return BENCH_FAST_THRESHOLD
+        return BENCH_THRESHOLD
+
+    def fails(self, current, compared):
+        """Возвращает описание регрессии или None."""
+        threshold = self.threshold_for(compared)
+        value = self.compute(current, compared)
+        if value > threshold:
+            return 'Медиана выросла на {:.1f}% > {}%'.format(value, threshold)
+
+
+def pytest_configure(config):
+    """Задаёт каталог базовых замеров и допустимое замедление медианы."""
+    if config.option.benchmark_storage == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + BASELINES_DIR
+    if (config.option.benchmark_compare
+            and not config.option.benchmark_compare_fail):
+        config.option.benchmark_compare_fail = [
+            MedianRegressionCheck()]
+
+
+class FakeBot:
+
+    def __init__(self, token=None):
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent += 1
+
+
+@pytest.fixture(scope='session')
+def api_server():
+    server = FakePracticumServer(homeworks=[
+        {'id': number, 'homework_name': f'username__hw{number:02d}.zip',
+         'status': 'approved', 'date_updated': '2022-04-20T10:00:00Z'}
+        for number in range(5)]).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def fake_bot():
+    return FakeBot()
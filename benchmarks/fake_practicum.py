@@ -0,0 +1,197 @@
+"""Локальная имитация endpoint homework_statuses для замеров и нагрузки.
+
+Сервер отвечает каждому токену списком работ. Задержка ответов, доля
+ошибок 500 и зависших запросов, размер ответа и расписание смены
+статусов настраиваются параметрами FakePracticumServer.
+"""
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PATH = '/api/user_api/homework_statuses/'
+STATUS_CYCLE = ('reviewing', 'rejected', 'approved')
+
+
+class FakePracticumHandler(BaseHTTPRequestHandler):
+    """Обработчик, имитирующий endpoint homework_statuses."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Отвечает списком домашних работ для токена из заголовка."""
+        url = urlparse(self.path)
+        if url.path != PATH:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        token = self.headers.get('Authorization', '')[len('OAuth '):]
+        if not token:
+            self.send_error(HTTPStatus.UNAUTHORIZED)
+            return
+        from_date = int(float(
+            parse_qs(url.query).get('from_date', ['0'])[0]))
+        fault = self.server.fault()
+        if fault == 'timeout':
+            time.sleep(self.server.hang)
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        body = json.dumps(
+            self.server.answer(token, from_date)).encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Отключает журнал запросов сервера."""
+
+
+class FakePracticumServer(ThreadingHTTPServer):
+    """Локальный сервер с фиксированным набором домашних работ."""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), homeworks=None,
+                 ssl_context=None, latency=0, jitter=0, error_rate=0,
+                 timeout_rate=0, hang=35, history=0, padding=0,
+                 change_interval=None, seed=None, clock=time.time):
+        """Создаёт сервер; homeworks - ответ для каждого токена.
+
+        latency и jitter - задержка ответа и её случайный разброс в
+        секундах. error_rate и timeout_rate - доли ответов с ошибкой 500
+        и запросов, которые висят hang секунд и обрываются без ответа.
+        history - число старых работ в ответе с from_date=0, padding -
+        размер комментария ревьюера в каждой работе. change_interval -
+        период смены статуса первой работы токена; без него работы
+        берутся из homeworks.
+        """
+        super().__init__(address, FakePracticumHandler)
+        self.homeworks = homeworks or [
+            {'id': 1, 'homework_name': 'hw_bot', 'status': 'reviewing'}]
+        self.requests = 0
+        self.connections = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.history = history
+        self.padding = padding
+        self.change_interval = change_interval
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.started = clock()
+        self.faults = {'error': 0, 'timeout': 0}
+        self.lock = threading.Lock()
+        self.scheme = 'http'
+        if ssl_context is not None:
+            self.socket = ssl_context.wrap_socket(
+                self.socket, server_side=True)
+            self.scheme = 'https'
+
+    @property
+    def endpoint(self):
+        """Возвращает URL endpoint сервера."""
+        host, port = self.server_address[:2]
+        return '{}://{}:{}{}'.format(self.scheme, host, port, PATH)
+
+    def process_request(self, request, client_address):
+        """Считает новые соединения клиентов."""
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    def handle_error(self, request, client_address):
+        """Не печатает ошибки соединений, оборванных клиентом."""
+
+    def fault(self):
+        """Выдерживает задержку и выбирает сбой для запроса или None."""
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            draw = self.random.random()
+            fault = None
+            if draw < self.timeout_rate:
+                fault = 'timeout'
+            elif draw < self.timeout_rate + self.error_rate:
+                fault = 'error'
+            if fault is not None:
+                self.faults[fault] += 1
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def offset(self, token):
+        """Возвращает сдвиг расписания токена внутри периода."""
+        return (sum(token.encode('utf-8')) * 7919) % 1000 / 1000 * (
+            self.change_interval)
+
+    def changes(self, token, now):
+        """Возвращает число смен статуса токена к моменту now."""
+        elapsed = now - self.started - self.offset(token)
+        return int(elapsed // self.change_interval) + 1 if elapsed >= 0 else 0
+
+    def changed_at(self, token, status, before):
+        """Возвращает время последней смены статуса токена на status.
+
+        Учитываются смены не позже before; None - таких смен не было.
+        """
+        number = self.changes(token, before)
+        while number > 0:
+            if STATUS_CYCLE[(number - 1) % len(STATUS_CYCLE)] == status:
+                return (self.started + self.offset(token)
+                        + (number - 1) * self.change_interval)
+            number -= 1
+        return None
+
+    def scheduled(self, token, from_date, now):
+        """Формирует работы токена по расписанию смены статусов."""
+        homeworks = []
+        number = self.changes(token, now)
+        if number:
+            changed = (self.started + self.offset(token)
+                       + (number - 1) * self.change_interval)
+            if changed >= from_date:
+                homeworks.append({
+                    'id': 1, 'homework_name': token + '__hw.zip',
+                    'status': STATUS_CYCLE[(number - 1) % len(STATUS_CYCLE)],
+                    'date_updated': time.strftime(
+                        '%Y-%m-%dT%H:%M:%SZ', time.gmtime(changed)),
+                })
+        if from_date == 0:
+            homeworks.extend(
+                {'id': 2 + index, 'homework_name': f'{token}__old{index}.zip',
+                 'status': 'approved',
+                 'date_updated': '2020-01-01T00:00:00Z'}
+                for index in range(self.history))
+        return homeworks
+
+    def answer(self, token, from_date):
+        """Формирует ответ API для токена."""
+        now = self.clock()
+        if self.change_interval is None:
+            homeworks = self.homeworks if from_date == 0 else []
+        else:
+            homeworks = self.scheduled(token, from_date, now)
+        if self.padding:
+            homeworks = [dict(item, reviewer_comment='x' * self.padding)
+                         for item in homeworks]
+        return {'homeworks': homeworks, 'current_date': int(now)}
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.shutdown()
+        self.server_close()
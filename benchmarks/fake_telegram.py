@@ -0,0 +1,117 @@
+"""Локальная имитация Telegram Bot API для замеров и нагрузки.
+
+Бот подключается к серверу через Bot(token, base_url=server.base_url).
+Сервер отвечает на getMe и sendMessage и запоминает время получения
+каждого сообщения; задержка ответов и доля ошибок настраиваются.
+Как и настоящий Bot API, сервер отклоняет тексты длиннее 4096 символов.
+"""
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+TOKEN = '123456:fake-telegram-token'
+MESSAGE_LIMIT = 4096
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Обработчик, имитирующий методы Bot API."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        """Выполняет метод Bot API из последней части пути."""
+        method = self.path.rsplit('/', 1)[-1]
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Type', '').startswith(
+                'application/json'):
+            data = json.loads(body or b'{}')
+        else:
+            data = dict(parse_qsl(body.decode('utf-8')))
+        status, answer = self.server.call(method, data)
+        content = json.dumps(answer).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        """Отключает журнал запросов сервера."""
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """Локальный сервер Bot API, который запоминает отправленные сообщения.
+
+    messages - список (время получения, chat_id, текст).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0, error_rate=0,
+                 seed=None, clock=time.time):
+        """Создаёт сервер; latency - задержка ответа в секундах.
+
+        error_rate - доля sendMessage, на которые сервер отвечает 500.
+        """
+        super().__init__(address, FakeTelegramHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.messages = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """Возвращает base_url для telegram.Bot."""
+        host, port = self.server_address[:2]
+        return 'http://{}:{}/bot'.format(host, port)
+
+    def call(self, method, data):
+        """Возвращает код и ответ метода Bot API."""
+        if self.latency:
+            time.sleep(self.latency)
+        if method == 'getMe':
+            return HTTPStatus.OK, {'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'fake',
+                'username': 'fake_bot'}}
+        if method != 'sendMessage':
+            return HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        if len(data.get('text', '')) > MESSAGE_LIMIT:
+            return HTTPStatus.BAD_REQUEST, {
+                'ok': False, 'error_code': 400,
+                'description': 'Bad Request: message is too long'}
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                    'ok': False, 'error_code': 500,
+                    'description': 'Internal Server Error'}
+            received = self.clock()
+            self.messages.append(
+                (received, int(data['chat_id']), data['text']))
+            message_id = len(self.messages)
+        return HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': message_id, 'date': int(received),
+            'chat': {'id': int(data['chat_id']), 'type': 'private'},
+            'text': data['text']}}
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.shutdown()
+        self.server_close()
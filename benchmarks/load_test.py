@@ -0,0 +1,165 @@
+"""Нагрузочный прогон бота на локальных имитациях Практикума и Телеграма.
+
+Движок опроса работает как в main(): с расписанием, очередью исходящих
+сообщений и настоящим telegram.Bot, направленным на fake_telegram.
+Статус первой работы каждого токена меняется раз в --change-interval
+секунд; задержка уведомления - время от смены статуса на сервере до
+получения сообщения имитацией Телеграма.
+
+Запуск: python benchmarks/load_test.py --subscriptions 1000 --duration 60
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Bot  # noqa: E402
+
+import homework  # noqa: E402
+import http_client  # noqa: E402
+import metrics  # noqa: E402
+import rendering  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from fake_practicum import FakePracticumServer  # noqa: E402
+from fake_telegram import TOKEN, FakeTelegramServer  # noqa: E402
+from notifier import OutboundQueue  # noqa: E402
+from scheduler import (POLL_FAILED, POLL_SEND_FAILED, POLL_SENT,  # noqa: E402
+                       POLL_UNCHANGED, AdaptiveScheduler)
+from subscriptions import SubscriptionRegistry  # noqa: E402
+
+NAME_SUFFIX = '__hw.zip'
+LINE = re.compile(r'"(?P<name>[^"]+)"\. (?P<verdict>.+)$')
+
+
+def parse_args():
+    """Разбирает параметры прогона."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--subscriptions', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=60,
+                        help='длительность прогона, с')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='период опроса подписки, с')
+    parser.add_argument('--change-interval', type=float, default=20,
+                        help='период смены статуса работы, с')
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--api-jitter', type=float, default=0.02)
+    parser.add_argument('--api-error-rate', type=float, default=0.01)
+    parser.add_argument('--api-timeout-rate', type=float, default=0.001)
+    parser.add_argument('--read-timeout', type=float, default=2,
+                        help='таймаут чтения ответа API, с')
+    parser.add_argument('--history', type=int, default=5,
+                        help='старых работ в первом ответе')
+    parser.add_argument('--padding', type=int, default=200,
+                        help='размер комментария ревьюера, байт')
+    parser.add_argument('--telegram-latency', type=float, default=0.005)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.01)
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help='асинхронный движок опроса')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль отсортированного списка."""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def notification_latencies(practicum, messages, tokens):
+    """Возвращает отсортированные задержки уведомлений о сменах статуса."""
+    statuses = {verdict: status for status, verdict in
+                rendering.VERDICTS[rendering.DEFAULT_LOCALE].items()}
+    latencies = []
+    for received, chat_id, text in messages:
+        for line in text.split('\n'):
+            match = LINE.search(line)
+            if match is None or not match['name'].endswith(NAME_SUFFIX):
+                continue
+            token = match['name'][:-len(NAME_SUFFIX)]
+            if tokens.get(token) != chat_id:
+                continue
+            changed = practicum.changed_at(
+                token, statuses.get(match['verdict']), received)
+            if changed is not None:
+                latencies.append(received - changed)
+    return sorted(latencies)
+
+
+def build_engine(args, practicum, telegram):
+    """Создаёт движок опроса, как main(), на имитациях серверов."""
+    homework.ENDPOINT = practicum.endpoint
+    http_client.TIMEOUT = (http_client.HTTP_CONNECT_TIMEOUT,
+                           args.read_timeout)
+    bot = Bot(TOKEN, base_url=telegram.base_url)
+    registry = SubscriptionRegistry()
+    for number in range(args.subscriptions):
+        registry.add('token-{}'.format(number), number + 1)
+    scheduler = AdaptiveScheduler(
+        args.interval, active_interval=args.interval,
+        max_interval=args.interval * 4)
+    engine_class = PollingEngine
+    if args.async_mode:
+        from async_engine import AsyncPollingEngine
+        engine_class = AsyncPollingEngine
+    return registry, engine_class(
+        bot, registry, scheduler=scheduler, outbox=OutboundQueue(bot))
+
+
+def report(args, practicum, telegram, registry, elapsed):
+    """Печатает пропускную способность, задержки и долю ошибок."""
+    tokens = {subscription.token: subscription.chat_id
+              for subscription in registry}
+    with telegram.lock:
+        messages = list(telegram.messages)
+        telegram_errors = telegram.errors
+    latencies = notification_latencies(practicum, messages, tokens)
+    polls = {outcome: metrics.POLLS.value(outcome) for outcome in (
+        POLL_SENT, POLL_UNCHANGED, POLL_FAILED, POLL_SEND_FAILED)}
+    total = sum(polls.values()) or 1
+    sends = len(messages) + telegram_errors or 1
+    print('подписок: {}, прогон: {:.0f} с, движок: {}'.format(
+        args.subscriptions, elapsed,
+        'async' if args.async_mode else 'sync'))
+    print('опросов: {:.0f} ({:.1f}/с), запросов к API: {} ({:.1f}/с)'.format(
+        sum(polls.values()), sum(polls.values()) / elapsed,
+        practicum.requests, practicum.requests / elapsed))
+    print('уведомлений: {} ({:.1f}/с), задержка p50 {:.2f} с, '
+          'p99 {:.2f} с'.format(
+              len(latencies), len(latencies) / elapsed,
+              percentile(latencies, 0.5), percentile(latencies, 0.99)))
+    print('ошибок опроса: {:.2%} (API 500: {}, таймаутов: {}), ошибок '
+          'отправки: {:.2%}'.format(
+              polls[POLL_FAILED] / total, practicum.faults['error'],
+              practicum.faults['timeout'], telegram_errors / sends))
+
+
+def main():
+    """Запускает имитации серверов и движок опроса на время прогона."""
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    practicum = FakePracticumServer(
+        latency=args.api_latency, jitter=args.api_jitter,
+        error_rate=args.api_error_rate, timeout_rate=args.api_timeout_rate,
+        hang=args.read_timeout + 1, history=args.history,
+        padding=args.padding, change_interval=args.change_interval,
+        seed=args.seed).start()
+    telegram = FakeTelegramServer(
+        latency=args.telegram_latency, error_rate=args.telegram_error_rate,
+        seed=args.seed).start()
+    registry, engine = build_engine(args, practicum, telegram)
+    started = time.time()
+    threading.Thread(target=engine.run, daemon=True).start()
+    time.sleep(args.duration)
+    report(args, practicum, telegram, registry, time.time() - started)
+    practicum.stop()
+    telegram.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Симуляция расписания опроса на модельных часах.
+
+Сравнивает фиксированный интервал RETRY_TIME и адаптивное расписание:
+средняя и максимальная задержка уведомления против числа запросов к API.
+
+Запуск: python benchmarks/sim_scheduler.py [подписок] [часов]
+"""
+import bisect
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import (POLL_SENT, POLL_UNCHANGED,  # noqa: E402
+                       AdaptiveScheduler)
+
+
+class SimulatedClock:
+    """Модельные часы, которые двигает симуляция."""
+
+    def __init__(self):
+        """Создаёт часы на нулевой отметке."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Возвращает текущее модельное время."""
+        return self.now
+
+
+def make_timeline(rand, duration):
+    """Строит моменты смены статуса одной подписки и сами статусы."""
+    times, statuses = [0.0], [None]
+    moment = rand.uniform(0, duration / 2)
+    while moment < duration:
+        times.append(moment)
+        statuses.append('reviewing')
+        moment += rand.uniform(3600, 6 * 3600)
+        times.append(moment)
+        statuses.append(rand.choice(('approved', 'rejected')))
+        moment += rand.uniform(6 * 3600, 48 * 3600)
+    return times, statuses
+
+
+def simulate(scheduler, clock, timelines, duration):
+    """Прогоняет опросы до duration, возвращает задержки и число запросов."""
+    seen = {}
+    latencies = []
+    verdict_latencies = []
+    requests = 0
+    for token in timelines:
+        scheduler.schedule(token, scheduler.rand() * scheduler.base_interval)
+    while True:
+        due = scheduler.next_due()
+        if due is None or due > duration:
+            break
+        clock.now = due
+        for token in scheduler.pop_due():
+            requests += 1
+            times, statuses = timelines[token]
+            index = bisect.bisect_right(times, clock.now) - 1
+            outcome = POLL_UNCHANGED
+            if seen.get(token, 0) != index:
+                latencies.append(clock.now - times[index])
+                if statuses[index] != 'reviewing':
+                    verdict_latencies.append(clock.now - times[index])
+                seen[token] = index
+                outcome = POLL_SENT
+            scheduler.reschedule(token, outcome,
+                                 active=statuses[index] == 'reviewing')
+    return latencies, verdict_latencies, requests
+
+
+def p99(values):
+    """Возвращает 99-й перцентиль."""
+    return sorted(values)[int(len(values) * 0.99) - 1]
+
+
+def run(name, scheduler_factory, count, hours, seed=1):
+    """Печатает результаты одной стратегии расписания."""
+    rand = random.Random(seed)
+    duration = hours * 3600
+    timelines = {
+        token: make_timeline(rand, duration) for token in range(count)}
+    clock = SimulatedClock()
+    scheduler = scheduler_factory(clock, random.Random(seed).random)
+    latencies, verdicts, requests = simulate(
+        scheduler, clock, timelines, duration)
+    print('{:<13} запросов={:<7} задержка: все {:.0f} с (p99 {:.0f} с), '
+          'вердикты {:.0f} с (p99 {:.0f} с)'.format(
+              name, requests, statistics.mean(latencies), p99(latencies),
+              statistics.mean(verdicts), p99(verdicts)))
+
+
+def main(count, hours):
+    """Сравнивает фиксированное и адаптивное расписание."""
+    run('фиксированное', lambda clock, rand: AdaptiveScheduler(
+        600, active_interval=600, max_interval=600, backoff=1, jitter=0,
+        clock=clock, rand=rand), count, hours)
+    run('адаптивное', lambda clock, rand: AdaptiveScheduler(
+        600, clock=clock, rand=rand), count, hours)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 72)
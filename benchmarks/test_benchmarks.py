@@ -0,0 +1,71 @@
+import functools
+import logging
+
+import pytest
+import telegram
+
+import homework
+import lifecycle
+import log_config
+import storage
+
+RESPONSE = {
+    'homeworks': [{'id': number, 'homework_name': f'username__hw{number:02d}',
+                   'status': 'approved', 'reviewer_comment': 'Всё нравится',
+                   'date_updated': '2022-04-20T10:00:00Z',
+                   'lesson_name': 'Итоговый проект'}
+                  for number in range(20)],
+    'current_date': 1650000000,
+}
+
+
+@pytest.fixture
+def bot_env(monkeypatch, api_server, fake_bot):
+    monkeypatch.setattr(homework, 'ENDPOINT', api_server.endpoint)
+    monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+    monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '123456:token')
+    monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+    return fake_bot
+
+
+def test_get_api_answer(benchmark, bot_env):
+    response = benchmark(homework.get_api_answer, 0)
+    assert len(response['homeworks']) == 5
+
+
+def test_check_response(benchmark):
+    assert benchmark(homework.check_response, RESPONSE) == (
+        RESPONSE['homeworks'])
+
+
+def test_parse_status(benchmark):
+    message = benchmark(homework.parse_status, RESPONSE['homeworks'][0])
+    assert message.startswith('Изменился статус')
+
+
+def test_send_message(benchmark, bot_env):
+    assert benchmark(homework.send_message, bot_env, 'Сообщение')
+    assert bot_env.sent
+
+
+def test_main_iteration(benchmark, bot_env, monkeypatch, tmp_path):
+    def stop(self, delay):
+        self.request_stop()
+
+    root = logging.getLogger()
+    monkeypatch.setattr(root, 'level', root.level)
+    monkeypatch.setattr(lifecycle.Lifecycle, 'sleep', stop)
+    monkeypatch.setattr(telegram, 'Bot', lambda token: bot_env)
+    monkeypatch.setattr(storage, 'SQLiteStateStore', functools.partial(
+        storage.SQLiteStateStore, ':memory:'))
+    monkeypatch.setattr(log_config, 'configure_logging', functools.partial(
+        log_config.configure_logging, level=logging.WARNING,
+        path=str(tmp_path / 'homework.log')))
+    try:
+        benchmark(homework.main)
+    finally:
+        log_config.stop_logging()
+        for handler in root.handlers[:]:
+            if isinstance(handler, log_config.DeferredQueueHandler):
+                root.removeHandler(handler)
+    assert bot_env.sent
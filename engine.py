@@ -0,0 +1,479 @@
+import functools
+import logging
+import queue
+import time
+
+import exceptions
+import homework
+import metrics
+import profiling
+import rendering
+from alerts import ErrorAggregator
+from idempotency import IdempotencyIndex, notification_key
+from lifecycle import SHUTDOWN_TIMEOUT, Lifecycle
+from scheduler import (POLL_DEFERRED, POLL_FAILED, POLL_SEND_FAILED,
+                       POLL_SENT, POLL_UNCHANGED, SCHEDULE_STARTUP_SPREAD,
+                       AdaptiveScheduler)
+from storage import token_key
+
+logger = logging.getLogger(__name__)
+
+NO_CHANGES_MESSAGE = rendering.NO_CHANGES[rendering.DEFAULT_LOCALE]
+
+
+def homework_key(item):
+    """Возвращает ключ работы: id, а при его отсутствии название."""
+    return item.get('id', item.get('homework_name'))
+
+
+class PollingEngine:
+    """Движок опроса API для всех подписок из одного процесса."""
+
+    def __init__(self, bot, registry, cache=None, scheduler=None,
+                 store=None, outbox=None, inbox=None, shard=None,
+                 stream=False, notifications=None, alerts=None,
+                 fetcher=None, lifecycle=None, loader=None):
+        """Связывает движок с ботом, реестром и хранилищами состояния.
+
+        outbox - очередь исходящих сообщений; без неё сообщения
+        отправляются сразу из цикла опроса. inbox - очередь событий от
+        приёмника webhook. shard - доля подписок этого воркера. stream -
+        разбирать ответы без кэша по мере получения. notifications -
+        индекс отправленных уведомлений, по умолчанию поверх store.
+        alerts - сводка ошибок для пользователей и оператора. fetcher -
+        загрузчик пачек (batching.BatchFetcher); без него подписки
+        опрашиваются по одной. lifecycle - запросы остановки и
+        перезагрузки от сигналов, loader - функция, возвращающая
+        перечитанный реестр подписок при перезагрузке.
+        """
+        self.bot = bot
+        self.registry = registry
+        self.cache = cache
+        self.store = store
+        self.outbox = outbox
+        self.inbox = inbox
+        self.shard = shard
+        self.stream = stream
+        self.fetcher = fetcher
+        self._by_key = {}
+        self.notifications = (notifications if notifications is not None
+                              else IdempotencyIndex(store))
+        self.alerts = (alerts if alerts is not None
+                       else ErrorAggregator(self.send))
+        self.renderer = rendering.get_renderer()
+        self.scheduler = (scheduler if scheduler is not None
+                          else AdaptiveScheduler(homework.RETRY_TIME))
+        self.lifecycle = lifecycle if lifecycle is not None else Lifecycle()
+        self.loader = loader
+        if inbox is not None:
+            self.lifecycle.on_wakeup(functools.partial(inbox.put, None))
+
+    def changed_homeworks(self, subscription, homeworks):
+        """Возвращает работы, статус которых отличается от известного."""
+        changed = {}
+        for item in homeworks:
+            key = homework_key(item)
+            if key not in changed and subscription.status_changed(
+                    key, item.get('status')):
+                changed[key] = item
+        return list(changed.values())
+
+    def unsent(self, subscription, changed):
+        """Возвращает изменения, о которых чат ещё не уведомлён, по ключам."""
+        fresh = {}
+        for item in changed:
+            key = notification_key(subscription.chat_id, item)
+            if not self.notifications.seen(key):
+                fresh[key] = item
+        return fresh
+
+    def handle_answer(self, subscription, response):
+        """Возвращает сообщение и ключи уведомлений или None.
+
+        Изменения по всем работам из ответа собираются в одно сообщение.
+        Если обо всех изменениях чат уже уведомлён, состояние подписки
+        обновляется без отправки.
+        """
+        with profiling.span('check_response'):
+            homeworks = homework.check_response(response)
+        changed = self.changed_homeworks(subscription, homeworks)
+        fresh = self.unsent(subscription, changed)
+        if fresh:
+            renderer = subscription.renderer or self.renderer
+            with profiling.span('parse_status'):
+                message = '\n'.join(
+                    homework.render_status(item, renderer)
+                    for item in fresh.values())
+        elif changed:
+            logger.info('Уведомление об изменениях уже отправлено')
+            self.advance(subscription, response)
+            return None
+        elif homeworks:
+            return None
+        else:
+            message = (subscription.renderer or self.renderer).no_changes
+        if subscription.is_last(message):
+            logger.debug('Статус проверки домашней работы не изменился')
+            return None
+        return message, list(fresh)
+
+    def notify(self, subscription, message, callback=None):
+        """Отправляет сообщение в чат подписки или ставит его в очередь."""
+        return self.send(subscription.chat_id, message, callback)
+
+    def send(self, chat_id, message, callback=None):
+        """Отправляет сообщение в чат или ставит его в очередь."""
+        if self.outbox is not None:
+            return self.outbox.enqueue(chat_id, message, callback)
+        with profiling.span('send_message'):
+            delivered = homework.send_chat_message(
+                self.bot, chat_id, message)
+        if callback is not None:
+            callback(delivered)
+        return delivered
+
+    def fetch(self, subscription):
+        """Запрашивает API; возвращает None, если ответ не изменился."""
+        with profiling.span('fetch'):
+            if self.cache is not None:
+                return self.cache.fetch(
+                    subscription.token, subscription.current_date)
+            if self.stream:
+                return homework.stream_api_answer(
+                    subscription.token, subscription.current_date)
+            return homework.get_token_api_answer(
+                subscription.token, subscription.current_date)
+
+    def confirm(self, subscription):
+        """Отмечает ответ по подписке обработанным в кэше."""
+        if self.cache is not None:
+            self.cache.confirm(subscription.token)
+
+    def commit(self, subscription, message, response):
+        """Запоминает отправленное сообщение и метку времени ответа."""
+        subscription.remember(message)
+        self.advance(subscription, response)
+
+    def advance(self, subscription, response):
+        """Запоминает статусы работ и метку времени ответа."""
+        subscription.current_date = response.get(
+            'current_date', subscription.current_date)
+        for item in reversed(response.get('homeworks', [])):
+            subscription.set_status(homework_key(item), item.get('status'))
+        self.confirm(subscription)
+        self.save(subscription)
+
+    def save(self, subscription):
+        """Передаёт состояние подписки в хранилище."""
+        if self.store is not None:
+            self.store.save(subscription)
+
+    def restore(self):
+        """Восстанавливает состояние подписок из хранилища."""
+        if self.store is not None:
+            restored = self.store.restore(self.registry)
+            logger.info('Восстановлено состояние %s подписок', restored)
+
+    def delivered(self, subscription, message, response, keys, success):
+        """Фиксирует изменения после доставки сообщения."""
+        if success:
+            self.notifications.add(keys)
+            self.commit(subscription, message, response)
+
+    def process(self, subscription, response):
+        """Обрабатывает ответ API и отправляет сообщение об изменениях."""
+        answer = self.handle_answer(subscription, response)
+        if answer is None:
+            self.confirm(subscription)
+            return POLL_UNCHANGED
+        message, keys = answer
+        callback = functools.partial(
+            self.delivered, subscription, message, response, keys)
+        if self.notify(subscription, message, callback):
+            return POLL_SENT
+        return POLL_SEND_FAILED
+
+    def handle_error(self, subscription, error):
+        """Учитывает ошибку в сводке; в чат подписки - только её ошибки."""
+        metrics.count_error(error)
+        if isinstance(error.__cause__, exceptions.CircuitOpenException):
+            logger.warning(error.__cause__)
+        else:
+            logger.error(error, exc_info=error)
+            if self.cache is not None and not isinstance(
+                    error, exceptions.EmptyResponseAPIException):
+                self.cache.forget(subscription.token)
+        message = self.alerts.record(subscription, error)
+        if message is not None and not subscription.is_last(message):
+            self.notify(subscription, message)
+            subscription.remember(message)
+            self.save(subscription)
+
+    def poll(self, subscription, future=None):
+        """Опрашивает API по одной подписке и отправляет изменения.
+
+        future - уже начатый запрос из пачки загрузчика.
+        """
+        try:
+            response = (self.fetch(subscription) if future is None
+                        else future.result())
+            if response is None:
+                return POLL_UNCHANGED
+            return self.process(subscription, response)
+        except Exception as error:
+            self.handle_error(subscription, error)
+        return POLL_FAILED
+
+    def subscription_by_key(self, key):
+        """Возвращает подписку по ключу её токена или None."""
+        subscription = self._by_key.get(key)
+        if subscription is None or subscription.token not in self.registry:
+            self._by_key = {token_key(subscription.token): subscription
+                            for subscription in self.registry}
+            subscription = self._by_key.get(key)
+        return subscription
+
+    def ingest(self, key, event):
+        """Обрабатывает событие webhook так же, как ответ API."""
+        subscription = self.subscription_by_key(key)
+        if subscription is None:
+            logger.warning('Событие для неизвестной подписки')
+            outcome = 'unknown'
+        elif not self.owns(subscription):
+            outcome = 'other_shard'
+        elif not event.get('homeworks'):
+            outcome = POLL_UNCHANGED
+        else:
+            try:
+                outcome = self.process(subscription, event)
+            except Exception as error:
+                metrics.count_error(error)
+                logger.error('Некорректное событие: %s', error)
+                outcome = POLL_FAILED
+        metrics.EVENTS.inc(outcome)
+        return outcome
+
+    def wait(self, delay):
+        """Ждёт delay секунд, обрабатывая поступающие события."""
+        if self.inbox is None:
+            with profiling.span('sleep'):
+                self.lifecycle.sleep(delay)
+            return 0
+        try:
+            with profiling.span('sleep'):
+                item = self.inbox.get(timeout=delay)
+        except queue.Empty:
+            return 0
+        handled = 0
+        while item is not None:
+            self.ingest(*item)
+            handled += 1
+            try:
+                item = self.inbox.get_nowait()
+            except queue.Empty:
+                item = None
+        self.drain()
+        self.flush()
+        return handled
+
+    def owns(self, subscription):
+        """Проверяет, опрашивает ли подписку этот воркер."""
+        return self.shard is None or self.shard.owns(subscription.token)
+
+    def schedule_all(self, spread=SCHEDULE_STARTUP_SPREAD):
+        """Ставит в расписание подписки этого воркера.
+
+        Подписки с восстановленной меткой времени распределяются по
+        первым spread секундам, чтобы перезапуск не вызывал всплеска
+        запросов; новые опрашиваются сразу.
+        """
+        if self.shard is not None:
+            self.rebalance()
+            return
+        for subscription in self.registry:
+            delay = 0
+            if subscription.current_date:
+                delay = self.scheduler.rand() * spread
+            self.scheduler.schedule(subscription.token, delay)
+
+    def rebalance(self):
+        """Перераспределяет подписки после изменения состава воркеров.
+
+        Состояние полученных подписок читается из общего хранилища, а
+        первый опрос откладывается, пока прежний владелец не снимет их с
+        расписания.
+        """
+        if self.shard is None or not self.shard.heartbeat():
+            return
+        gained = []
+        lost = 0
+        for subscription in self.registry:
+            scheduled = subscription.token in self.scheduler
+            if self.owns(subscription):
+                if not scheduled:
+                    gained.append(subscription)
+            elif scheduled:
+                self.scheduler.remove(subscription.token)
+                lost += 1
+        if lost:
+            self.drain()
+            self.flush()
+        if gained and self.store is not None:
+            self.store.restore(gained)
+        for subscription in gained:
+            self.scheduler.schedule(subscription.token, self.shard.grace)
+        logger.info('Подписок в доле воркера: %s (+%s, -%s)',
+                    len(self.scheduler), len(gained), lost)
+
+    def run_cycle(self):
+        """Опрашивает все подписки один раз, возвращает число отправок."""
+        outcomes = [outcome for _, outcome in self.poll_due(self.registry)]
+        return outcomes.count(POLL_SENT)
+
+    def due_subscriptions(self):
+        """Возвращает подписки, время опроса которых наступило."""
+        tokens = self.scheduler.pop_due()
+        metrics.DUE.set(len(tokens))
+        metrics.OVERDUE.set(self.scheduler.overdue)
+        metrics.LAG.set(self.scheduler.lag)
+        for index, token in enumerate(tokens):
+            if self.lifecycle.stopping.is_set():
+                for token in tokens[index:]:
+                    self.scheduler.schedule(token)
+                return
+            subscription = self.registry.get(token)
+            if subscription is not None and self.owns(subscription):
+                yield subscription
+
+    def reschedule(self, subscription, outcome):
+        """Планирует следующий опрос подписки по результату текущего."""
+        metrics.POLLS.inc(outcome)
+        self.scheduler.reschedule(
+            subscription.token, outcome,
+            active=subscription.reviewing)
+
+    def poll_due(self, subscriptions):
+        """Перебирает (подписка, результат опроса) по одной или пачкой."""
+        if self.fetcher is None:
+            for subscription in subscriptions:
+                yield subscription, self.poll(subscription)
+            return
+        for subscription, future in self.fetcher.fetch_all(
+                subscriptions, self.fetch):
+            if future is None:
+                yield subscription, POLL_DEFERRED
+            else:
+                yield subscription, self.poll(subscription, future)
+
+    def run_due(self):
+        """Опрашивает подписки, время которых наступило."""
+        with profiling.span('cycle'):
+            self.rebalance()
+            sent = 0
+            for subscription, outcome in self.poll_due(
+                    self.due_subscriptions()):
+                self.reschedule(subscription, outcome)
+                sent += outcome == POLL_SENT
+            self.alerts.tick()
+            self.drain()
+            self.flush()
+        return sent
+
+    def drain(self):
+        """Отправляет сообщения из очереди, насколько позволяют лимиты."""
+        if self.outbox is not None:
+            self.outbox.drain()
+
+    def time_until_next(self):
+        """Возвращает время до ближайшего опроса или отправки."""
+        delay = self.scheduler.time_until_next()
+        if self.outbox is not None:
+            ready = self.outbox.time_until_ready()
+            if ready is not None:
+                delay = min(delay, ready)
+        if self.shard is not None:
+            delay = min(delay, self.shard.time_until_heartbeat())
+        return delay
+
+    def flush(self):
+        """Записывает накопленные изменения состояния в хранилище."""
+        if self.store is not None:
+            self.store.flush()
+
+    def reload(self):
+        """Применяет перечитанную конфигурацию и реестр подписок."""
+        if self.loader is None:
+            return
+        try:
+            registry = self.loader()
+        except Exception as error:
+            logger.error('Не удалось перечитать конфигурацию: %s', error)
+            return
+        self.merge(registry)
+
+    def merge(self, registry):
+        """Заменяет подписки реестром registry, сохраняя их состояние."""
+        removed = added = 0
+        for subscription in self.registry:
+            if subscription.token not in registry:
+                self.registry.remove(subscription.token)
+                self.scheduler.remove(subscription.token)
+                if self.cache is not None:
+                    self.cache.forget(subscription.token)
+                removed += 1
+        gained = []
+        for fresh in registry:
+            subscription = self.registry.get(fresh.token)
+            if subscription is None:
+                subscription = self.registry.add(
+                    fresh.token, fresh.chat_id, fresh.current_date)
+                gained.append(subscription)
+            subscription.chat_id = fresh.chat_id
+            subscription.renderer = fresh.renderer
+        if gained and self.store is not None:
+            self.store.restore(gained)
+        for subscription in gained:
+            if self.owns(subscription):
+                self.scheduler.schedule(subscription.token)
+                added += 1
+        metrics.SUBSCRIPTIONS.set(len(self.registry))
+        logger.info('Конфигурация перечитана: подписок %s (+%s, -%s)',
+                    len(self.registry), added, removed)
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """Досылает очередь сообщений и записывает состояние перед выходом.
+
+        Очередь досылается не дольше timeout секунд с учётом лимитов
+        Телеграма; неотправленные сообщения будут сформированы заново
+        после запуска, потому что состояние их подписок не обновлено.
+        """
+        logger.info('Остановка: досылаем сообщения и сохраняем состояние')
+        if self.outbox is not None:
+            deadline = time.monotonic() + timeout
+            self.outbox.drain()
+            while len(self.outbox):
+                delay = self.outbox.time_until_ready() or 0
+                remaining = deadline - time.monotonic()
+                if delay > remaining:
+                    logger.warning('Не отправлены сообщения в %s чатов',
+                                   len(self.outbox))
+                    break
+                time.sleep(delay)
+                self.outbox.drain()
+        self.flush()
+        if self.fetcher is not None:
+            self.fetcher.close()
+        logger.info('Бот остановлен')
+
+    def run(self):
+        """Опрашивает подписки бесконечно по адаптивному расписанию."""
+        logger.info('Опрос %s подписок', len(self.registry))
+        metrics.SUBSCRIPTIONS.set(len(self.registry))
+        self.restore()
+        self.schedule_all()
+        while not self.lifecycle.stopping.is_set():
+            if self.lifecycle.take_reload():
+                self.reload()
+            self.run_due()
+            self.wait(self.time_until_next())
+        self.shutdown()
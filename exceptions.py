@@ -4,6 +4,12 @@ class APIResponseStatusException(Exception):
     pass
 
 
+class TokenRejectedException(APIResponseStatusException):
+    """Ошибки токена Практикума, отклонённого сервером."""
+
+    pass
+
+
 class EmptyResponseAPIException(Exception):
     """Ошибки пустого ответа API."""
 
@@ -13,4 +19,10 @@ class EmptyResponseAPIException(Exception):
 class MissingRequiredTokenException(Exception):
     """Ошибки отсутствия необходимых переменных окружения."""
 
+    pass
+
+
+class CircuitOpenException(Exception):
+    """Ошибки запроса к API, приостановленного после серии сбоев."""
+
     pass
\ No newline at end of file
@@ -1,14 +1,19 @@
+import atexit
 import logging
 import os
-import sys
-import time
+import queue
 from http import HTTPStatus
 
-import requests
 from dotenv import load_dotenv
-from telegram import Bot, TelegramError
 
 import exceptions
+import http_client
+import metrics
+import profiling
+import rendering
+import resilience
+import streaming
+from subscriptions import SubscriptionRegistry, token_key
 
 load_dotenv()
 
@@ -16,71 +21,184 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+ASYNC_MODE = os.getenv('ASYNC_MODE', '').lower() in ('1', 'true', 'yes')
 
-RETRY_TIME = 600
+RETRY_TIME = int(os.getenv('RETRY_TIME', 600))
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 START_TIME = 0
 
 
-HOMEWORK_VERDICTS = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
+HOMEWORK_VERDICTS = rendering.VERDICTS[rendering.DEFAULT_LOCALE]
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    '%(asctime)s [%(levelname)s] %(name)s '
-    '%(funcName)s:%(lineno)d %(message)s'
-)
-console_handler = logging.StreamHandler(sys.stdout)
-logger.addHandler(console_handler)
-file_handler = logging.FileHandler(
-    f'{os.path.dirname(os.path.abspath(__file__))}/homework.log',
-    encoding='utf-8')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+
+_telegram_error = None
+
+
+class LazyBot:
+    """Бот Телеграма, который создаётся при первом обращении.
+
+    python-telegram-bot загружается долго, поэтому при запуске он не
+    импортируется, и первый опрос API не ждёт его загрузки.
+    """
+
+    def __init__(self, token):
+        """Запоминает токен бота."""
+        self.token = token
+        self._bot = None
+
+    def __getattr__(self, name):
+        """Создаёт бота и передаёт ему обращение к атрибуту."""
+        if self._bot is None:
+            from telegram import Bot
+
+            self._bot = Bot(token=self.token)
+        return getattr(self._bot, name)
+
+
+def telegram_error():
+    """Функция возвращает класс TelegramError, импортируя его один раз."""
+    global _telegram_error
+    if _telegram_error is None:
+        from telegram import TelegramError
+
+        _telegram_error = TelegramError
+    return _telegram_error
 
 
 def send_message(bot, message):
     """Функция отправляет сообщение в чат."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Функция отправляет сообщение в указанный чат.
+
+    Сообщение длиннее лимита Телеграма уходит несколькими частями.
+    """
     try:
-        logger.info('Попытка отправки сообщения {} в чат'.format(message))
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-    except TelegramError as error:
-        logger.error(f'Ошибка при отправке сообщения в чат. {error}')
+        logger.debug('Попытка отправки сообщения в чат %s', chat_id)
+        for part in rendering.split_message(message):
+            with metrics.TELEGRAM_LATENCY.time():
+                bot.send_message(chat_id=chat_id, text=part)
+    except telegram_error() as error:
+        logger.error('Ошибка при отправке сообщения в чат. %s', error)
         return False
     else:
-        logger.info('Сообщение {} отправлено в чат'.format(message))
+        logger.info('Сообщение %s отправлено в чат', message)
         return True
 
 
 def get_api_answer(current_timestamp):
     """Функция совершает запрос по API к endpoint."""
-    data = {
+    return get_token_api_answer(PRACTICUM_TOKEN, current_timestamp)
+
+
+def get_token_api_answer(token, current_timestamp):
+    """Функция совершает запрос по API к endpoint с указанным токеном."""
+    return decode_api_answer(request_api(token, current_timestamp))
+
+
+def api_request_data(token, current_timestamp, headers=None):
+    """Функция собирает параметры запроса к API."""
+    return {
         'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': current_timestamp}
+        'headers': {'Authorization': f'OAuth {token}', **(headers or {})},
+        'params': {'from_date': current_timestamp},
+        'timeout': http_client.TIMEOUT
     }
-    logger.info('Выполняем запрос к API c url:{url}, '
-                'headers:{headers}, params:{params}'.format(**data))
+
+
+def redacted_request_data(data):
+    """Функция возвращает параметры запроса без токена.
+
+    Вместо токена в заголовке Authorization остаётся начало его ключа в
+    хранилище состояния: по нему подписку можно найти, но не опросить.
+    """
+    headers = dict(data['headers'])
+    authorization = headers.get('Authorization')
+    if authorization:
+        token = authorization.partition(' ')[2]
+        headers['Authorization'] = 'OAuth key:{}'.format(
+            token_key(token)[:12])
+    return {**data, 'headers': headers}
+
+
+def check_status_code(status_code, details, conditional=False):
+    """Функция проверяет код ответа сервера.
+
+    details - функция, возвращающая причину и текст ответа для сообщения
+    об ошибке. Для условного запроса ответ 304 не считается ошибкой.
+    """
+    if status_code == HTTPStatus.OK or (
+            conditional and status_code == HTTPStatus.NOT_MODIFIED):
+        return
+    if status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+        raise exceptions.TokenRejectedException(
+            f'Практикум отклонил токен. Код:{status_code}')
+    reason, text = details()
+    raise exceptions.APIResponseStatusException(
+        f'Неверный код ответа сервера. Код:{status_code}, '
+        f'Причина:{reason}, Текст:{text}'
+    )
+
+
+def api_error(error, data):
+    """Функция оборачивает ошибку запроса к API в ConnectionError."""
+    return ConnectionError(
+        'Ошибка при запросе по API к endpoint:{error} '
+        'c параметрами url:{url}, headers:{headers}, '
+        'params:{params}'.format(error=error, **redacted_request_data(data))
+    )
+
+
+def request_api(token, current_timestamp, headers=None, stream=False):
+    """Функция совершает запрос по API и возвращает ответ сервера.
+
+    headers - заголовки условного запроса (If-None-Match и т.п.),
+    stream - не читать тело ответа сразу.
+    """
+    data = api_request_data(token, current_timestamp, headers)
+    logger.info('Выполняем запрос к API c url:%(url)s, '
+                'headers:%(headers)s, params:%(params)s',
+                redacted_request_data(data))
+    try:
+        with metrics.API_LATENCY.time():
+            response = resilience.get(**data, stream=stream)
+        check_status_code(response.status_code,
+                          lambda: (response.reason, response.text),
+                          conditional=bool(headers))
+    except Exception as error:
+        raise api_error(error, data) from error
+    logger.info('Запрос по API прошел успешно')
+    return response
+
+
+def decode_api_answer(response):
+    """Функция возвращает тело ответа API в виде JSON."""
     try:
-        response = requests.get(**data)
-        if response.status_code != HTTPStatus.OK:
-            raise exceptions.APIResponseStatusException(
-                f'Неверный код ответа сервера. Код:{response.status_code}, '
-                f'Причина:{response.reason}, Текст:{response.text}'
-            )
-        logger.info('Запрос по API прошел успешно')
         return response.json()
     except Exception as error:
         raise ConnectionError(
-            'Ошибка при запросе по API к endpoint:{error} '
-            'c параметрами url:{url}, headers:{headers}, '
-            'params:{params}'.format(error=error, **data)
-        )
+            'Ответ API не в формате JSON: {}'.format(error)) from error
+
+
+def stream_api_answer(token, current_timestamp):
+    """Функция запрашивает API и разбирает ответ по мере получения.
+
+    Работы, обновлённые раньше current_timestamp, и всё, что идёт после
+    них, не читаются.
+    """
+    response = request_api(token, current_timestamp, stream=True)
+    parser = streaming.StreamParser(newer_than=current_timestamp)
+    try:
+        for chunk in response.iter_content(streaming.STREAM_CHUNK_SIZE):
+            if parser.feed(chunk):
+                break
+        return parser.close()
+    finally:
+        response.close()
 
 
 def check_response(response):
@@ -103,21 +221,22 @@ def check_response(response):
 
 def parse_status(homework):
     """Функция проверяет статус домашней работы."""
+    return render_status(homework, rendering.get_renderer())
+
+
+def render_status(homework, renderer):
+    """Функция собирает сообщение о статусе работы на языке renderer."""
     homework_name = homework.get('homework_name')
     if homework_name is None:
         message = 'Отсутсвует ключ homework_name в ответе API'
         logger.error(message)
         raise KeyError(message)
     homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_VERDICTS:
+    if homework_status not in renderer.verdicts:
         raise ValueError('Неизвестный статус {} домашней работы'.format(
             homework_status))
-    logger.info('Проверка статуса домашней работы прошла успешно')
-    return (
-        'Изменился статус проверки работы "{homework_name}". '
-        '{verdict}'.format(homework_name=homework_name,
-                           verdict=HOMEWORK_VERDICTS[homework_status])
-    )
+    logger.debug('Проверка статуса домашней работы прошла успешно')
+    return renderer.render(homework_name, homework_status)
 
 
 def check_tokens():
@@ -130,60 +249,113 @@ def check_tokens():
     tokens_bool = True
     for name, token in names_tokens:
         if not token:
-            logger.critical(
-                'Переменная окружения {} недоступна'.format(name))
+            logger.critical('Переменная окружения %s недоступна', name)
             tokens_bool = False
     return tokens_bool
 
 
-def main():
-    """Основная логика работы бота."""
-    logger.info('Бот в работе')
+def load_registry():
+    """Функция собирает реестр подписок из окружения."""
+    if SUBSCRIPTIONS_FILE:
+        if not TELEGRAM_TOKEN:
+            raise exceptions.MissingRequiredTokenException(
+                'Переменная окружения telegram_token недоступна')
+        return SubscriptionRegistry.from_file(SUBSCRIPTIONS_FILE)
     if not check_tokens():
         raise exceptions.MissingRequiredTokenException(
             'Необходимые переменные окружения недоступны')
+    registry = SubscriptionRegistry()
+    registry.add(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, START_TIME)
+    return registry
+
+
+def reload_config():
+    """Функция перечитывает .env и возвращает новый реестр подписок.
+
+    Значения из .env заменяют прежние переменные окружения. Токен бота
+    не перечитывается: бот уже создан.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, SUBSCRIPTIONS_FILE, RETRY_TIME
+    load_dotenv(override=True)
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+    RETRY_TIME = int(os.getenv('RETRY_TIME', RETRY_TIME))
+    return load_registry()
+
+
+def main():
+    """Основная логика работы бота."""
+    import sharding
+    import webhook
+    from log_config import configure_logging
+
+    configure_logging()
+    profiling.configure_profiling()
+    if metrics.METRICS_PORT:
+        metrics.start_metrics_server()
+        logger.info('Метрики доступны на порту %s', metrics.METRICS_PORT)
+    logger.info('Бот в работе')
+    registry = load_registry()
     logger.info('Необходимые переменные окружения доступны')
 
-    bot = Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = START_TIME
-    current_report = {
-        'name_messages': None
-    }
-    prev_report = {
-        'name_messages': None
-    }
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if homeworks:
-                homework_status = homeworks[0]
-                message = parse_status(homework_status)
-                current_report['name_messages'] = message
-            else:
-                current_report['name_messages'] = (
-                    'Статус проверки домашней работы не изменился')
-            if current_report != prev_report:
-                if send_message(bot, current_report['name_messages']):
-                    prev_report = current_report.copy()
-                    current_timestamp = response.get(
-                        'current_date', current_timestamp)
-            else:
-                logger.debug('Статус проверки домашней работы не изменился')
-
-        except exceptions.EmptyResponseAPIException as error:
-            logger.error(error, exc_info=True)
-
-        except Exception as error:
-            current_report['name_messages'] = (
-                'Сбой в работе программы: {}'.format(error))
-            if current_report != prev_report:
-                send_message(bot, current_report['name_messages'])
-                prev_report = current_report.copy()
-            logger.error(error, exc_info=True)
-
-        finally:
-            time.sleep(RETRY_TIME)
+    options = {}
+    if ASYNC_MODE:
+        import parsing
+        from async_engine import AsyncPollingEngine as Engine
+
+        if parsing.PARSE_POOL:
+            options['parser'] = parsing.ParsePool()
+    else:
+        import batching
+        from engine import PollingEngine as Engine
+
+        if batching.FETCH_MAX_IN_FLIGHT > 1 or batching.FETCH_CYCLE_BUDGET:
+            options['fetcher'] = batching.BatchFetcher()
+
+    from http_cache import ResponseCache
+    from lifecycle import Lifecycle
+    from notifier import OutboundQueue
+    from scheduler import AdaptiveScheduler
+    from storage import SQLiteStateStore
+
+    scheduler = AdaptiveScheduler(RETRY_TIME)
+    inbox = None
+    if webhook.WEBHOOK_PORT:
+        inbox = queue.SimpleQueue()
+        webhook.start_webhook_server(inbox)
+        interval = webhook.WEBHOOK_RECONCILE_INTERVAL
+        scheduler = AdaptiveScheduler(interval, active_interval=interval,
+                                      max_interval=interval)
+        logger.info('События принимаются на порту %s, сверка раз в %s с',
+                    webhook.WEBHOOK_PORT, interval)
+
+    cache = None if streaming.STREAM_RESPONSES else ResponseCache()
+    store = SQLiteStateStore()
+    shard = None
+    if sharding.SHARDING:
+        shard = sharding.ShardCoordinator(store)
+        atexit.register(shard.leave)
+        logger.info('Воркер %s опрашивает свою долю подписок',
+                    shard.worker_id)
+
+    def reload():
+        """Перечитывает конфигурацию и интервал опроса."""
+        registry = reload_config()
+        if not webhook.WEBHOOK_PORT:
+            scheduler.base_interval = RETRY_TIME
+        return registry
+
+    lifecycle = Lifecycle()
+    lifecycle.install()
+    bot = LazyBot(TELEGRAM_TOKEN)
+    try:
+        Engine(bot, registry, cache=cache, scheduler=scheduler,
+               store=store, outbox=OutboundQueue(bot), inbox=inbox,
+               shard=shard, stream=streaming.STREAM_RESPONSES,
+               lifecycle=lifecycle, loader=reload, **options).run()
+    finally:
+        lifecycle.uninstall()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import re
+from http import HTTPStatus
+
+import homework
+
+logger = logging.getLogger(__name__)
+
+CURRENT_DATE_PATTERN = re.compile(rb'"current_date"\s*:\s*[\d.]+')
+
+
+class CacheEntry:
+    """Валидаторы последнего обработанного ответа по токену."""
+
+    __slots__ = ('from_date', 'etag', 'last_modified', 'digest')
+
+    def __init__(self, from_date, etag, last_modified, digest):
+        """Запоминает валидаторы ответа для метки from_date."""
+        self.from_date = from_date
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+
+
+class ResponseCache:
+    """Кэш ответов API с условными запросами и хешем содержимого.
+
+    Ответ считается неизменившимся, если сервер вернул 304 или хеш тела
+    без поля current_date совпал с хешем последнего обработанного ответа.
+    Валидаторы нового ответа применяются только после confirm(), чтобы
+    ответ, который не удалось обработать, не был пропущен при повторе.
+    """
+
+    def __init__(self):
+        """Создаёт пустой кэш и обнуляет счётчики."""
+        self._entries = {}
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def conditional_headers(self, token, from_date):
+        """Возвращает заголовки If-None-Match/If-Modified-Since."""
+        entry = self._entries.get(token)
+        if entry is None or entry.from_date != from_date:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def is_unchanged(self, token, from_date, status, headers, content):
+        """Проверяет, изменился ли ответ с последней обработки."""
+        entry = self._entries.get(token)
+        if entry is not None and entry.from_date != from_date:
+            entry = None
+        if status == HTTPStatus.NOT_MODIFIED and entry is not None:
+            self.not_modified += 1
+            self.hits += 1
+            return True
+        digest = hashlib.blake2b(
+            CURRENT_DATE_PATTERN.sub(b'', content), digest_size=16).digest()
+        if entry is not None and entry.digest == digest:
+            self.hits += 1
+            return True
+        self.misses += 1
+        self._pending[token] = CacheEntry(
+            from_date, headers.get('ETag'), headers.get('Last-Modified'),
+            digest)
+        return False
+
+    def confirm(self, token):
+        """Отмечает последний полученный ответ по токену обработанным."""
+        entry = self._pending.pop(token, None)
+        if entry is not None:
+            self._entries[token] = entry
+
+    def forget(self, token):
+        """Удаляет сведения об ответах по токену."""
+        self._entries.pop(token, None)
+        self._pending.pop(token, None)
+
+    def stats(self):
+        """Возвращает счётчики попаданий и промахов кэша."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+        }
+
+    def fetch(self, token, from_date):
+        """Запрашивает API; возвращает None, если ответ не изменился."""
+        response = homework.request_api(
+            token, from_date, self.conditional_headers(token, from_date))
+        if self.is_unchanged(token, from_date, response.status_code,
+                             response.headers, response.content):
+            logger.debug('Ответ API не изменился')
+            return None
+        return homework.decode_api_answer(response)
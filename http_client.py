@@ -0,0 +1,60 @@
+import os
+import threading
+
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '').lower() in (
+    '1', 'true', 'yes')
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS,
+                   pool_maxsize=HTTP_POOL_MAXSIZE,
+                   pool_block=HTTP_POOL_BLOCK):
+    """Функция создаёт сессию с пулом keep-alive соединений.
+
+    pool_connections - число хостов, для которых хранится пул,
+    pool_maxsize - число соединений к одному хосту,
+    pool_block - ждать свободного соединения вместо открытия нового.
+    requests импортируется здесь, при первом запросе, а не при запуске.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Функция возвращает общую для процесса сессию."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Функция закрывает общую сессию и её соединения."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get(url, **kwargs):
+    """Функция выполняет GET-запрос через общую сессию."""
+    kwargs.setdefault('timeout', TIMEOUT)
+    return get_session().get(url, **kwargs)
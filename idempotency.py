@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from subscriptions import message_digest
+
+NOTIFY_TTL = float(os.getenv('NOTIFY_TTL', 30 * 24 * 3600))
+NOTIFY_INDEX_SIZE = int(os.getenv('NOTIFY_INDEX_SIZE', 100000))
+
+
+def notification_key(chat_id, item):
+    """Функция возвращает ключ уведомления о статусе работы.
+
+    Ключ - 64-битный хеш чата, работы, статуса и времени проверки.
+    """
+    return message_digest('\x1f'.join(str(part) for part in (
+        chat_id, item.get('id', item.get('homework_name')),
+        item.get('status'), item.get('date_updated'))))
+
+
+class IdempotencyIndex:
+    """Индекс отправленных уведомлений: ключ -> время отправки.
+
+    В памяти хранятся max_size последних ключей не старше ttl секунд с
+    вытеснением давно не проверявшихся. Отправки сразу записываются в
+    хранилище, а ключ, которого нет в памяти, ищется там: так уведомление
+    не повторяется после падения процесса и при передаче подписки
+    другому воркеру.
+    """
+
+    def __init__(self, store=None, ttl=NOTIFY_TTL,
+                 max_size=NOTIFY_INDEX_SIZE, clock=time.time):
+        """Создаёт пустой индекс поверх хранилища store."""
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._sent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Возвращает число ключей в памяти."""
+        return len(self._sent)
+
+    def seen(self, key):
+        """Проверяет, отправлялось ли уведомление с ключом key."""
+        expired = self.clock() - self.ttl
+        with self._lock:
+            sent_at = self._sent.get(key)
+            if sent_at is not None:
+                if sent_at >= expired:
+                    self._sent.move_to_end(key)
+                    return True
+                del self._sent[key]
+        if self.store is None:
+            return False
+        sent_at = self.store.sent_at(key)
+        if sent_at is None or sent_at < expired:
+            return False
+        self.remember(key, sent_at)
+        return True
+
+    def remember(self, key, sent_at):
+        """Запоминает ключ в памяти, вытесняя самые старые."""
+        with self._lock:
+            self._sent[key] = sent_at
+            self._sent.move_to_end(key)
+            while len(self._sent) > self.max_size:
+                self._sent.popitem(last=False)
+
+    def add(self, keys):
+        """Отмечает уведомления отправленными и записывает их в хранилище."""
+        now = self.clock()
+        for key in keys:
+            self.remember(key, now)
+        if keys and self.store is not None:
+            self.store.mark_sent(keys, now, now - self.ttl)
@@ -0,0 +1,77 @@
+import os
+import signal
+import threading
+
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+STOP_SIGNALS = ('SIGTERM', 'SIGINT')
+RELOAD_SIGNALS = ('SIGHUP',)
+
+
+class Lifecycle:
+    """Запросы остановки и перезагрузки конфигурации от сигналов.
+
+    Обработчики сигналов только выставляют флаги и будят цикл опроса, а
+    остановка и перезагрузка выполняются между циклами, поэтому начатые
+    запросы к API и отправки доводятся до конца. Повторный сигнал
+    остановки прерывает работу сразу.
+    """
+
+    def __init__(self):
+        """Создаёт флаги без установленных обработчиков сигналов."""
+        self.stopping = threading.Event()
+        self.reloading = threading.Event()
+        self.wakeup = threading.Event()
+        self._wakeups = []
+        self._previous = {}
+
+    def on_wakeup(self, callback):
+        """Добавляет функцию, которая будит ожидание движка."""
+        self._wakeups.append(callback)
+
+    def wake(self):
+        """Прерывает ожидание следующего опроса."""
+        self.wakeup.set()
+        for callback in self._wakeups:
+            callback()
+
+    def request_stop(self, signum=None, frame=None):
+        """Запрашивает остановку после текущего цикла."""
+        if self.stopping.is_set() and signum is not None:
+            raise SystemExit('Повторный сигнал остановки')
+        self.stopping.set()
+        self.wake()
+
+    def request_reload(self, signum=None, frame=None):
+        """Запрашивает перезагрузку конфигурации перед следующим циклом."""
+        self.reloading.set()
+        self.wake()
+
+    def take_reload(self):
+        """Проверяет и сбрасывает запрос перезагрузки."""
+        if not self.reloading.is_set():
+            return False
+        self.reloading.clear()
+        return True
+
+    def sleep(self, delay):
+        """Ждёт delay секунд или до сигнала; True, если разбужен."""
+        woken = self.wakeup.wait(delay)
+        self.wakeup.clear()
+        return woken
+
+    def install(self):
+        """Устанавливает обработчики сигналов в главном потоке."""
+        for name in STOP_SIGNALS + RELOAD_SIGNALS:
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            handler = (self.request_reload if name in RELOAD_SIGNALS
+                       else self.request_stop)
+            self._previous[signum] = signal.signal(signum, handler)
+
+    def uninstall(self):
+        """Возвращает прежние обработчики сигналов."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous = {}
@@ -0,0 +1,70 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler)
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.getenv(
+    'LOG_FILE', f'{os.path.dirname(os.path.abspath(__file__))}/homework.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+
+FORMATTER = logging.Formatter(
+    '%(asctime)s [%(levelname)s] %(name)s '
+    '%(funcName)s:%(lineno)d %(message)s'
+)
+
+_listener = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без форматирования в потоке вызова.
+
+    Аргументы записи форматируются позже, в потоке журнала, поэтому в
+    логгер нельзя передавать объекты, которые меняются после вызова.
+    """
+
+    def prepare(self, record):
+        """Оставляет форматирование сообщения потоку журнала."""
+        if record.exc_info and not record.exc_text:
+            record.exc_text = FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def configure_logging(level=LOG_LEVEL, path=LOG_FILE,
+                      max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """Функция настраивает журнал, который пишется в отдельном потоке.
+
+    Вызовы логгера только кладут запись в очередь, вывод в консоль и в
+    файл с ротацией по размеру выполняет QueueListener. Повторный вызов
+    возвращает уже запущенный обработчик очереди.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    console_handler = logging.StreamHandler(sys.stdout)
+    file_handler = RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count,
+        encoding='utf-8', delay=True)
+    file_handler.setFormatter(FORMATTER)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, console_handler, file_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Функция дописывает записи из очереди и останавливает поток журнала."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,200 @@
+import bisect
+import os
+import threading
+import time
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names, values):
+    """Функция форматирует метки в синтаксисе Prometheus."""
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, str(value).replace('"', '\\"'))
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Базовая метрика с необязательными метками."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Создаёт метрику с именем, описанием и именами меток."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        """Возвращает строки HELP и TYPE."""
+        return [f'# HELP {self.name} {self.documentation}',
+                f'# TYPE {self.name} {self.kind}']
+
+    def samples(self):
+        """Возвращает строки значений метрики."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return ['{}{} {}'.format(
+            self.name, format_labels(self.labelnames, labels), value)
+            for labels, value in items]
+
+    def value(self, *labels):
+        """Возвращает текущее значение для набора меток."""
+        return self._values.get(labels, 0)
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Увеличивает счётчик для набора меток."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и убывать."""
+
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        """Устанавливает значение для набора меток."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Создаёт гистограмму с границами buckets."""
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """Учитывает наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Возвращает контекстный менеджер, замеряющий длительность."""
+        return Timer(self)
+
+    def samples(self):
+        """Возвращает накопленные корзины, сумму и количество."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {count}')
+        return lines
+
+
+class Timer:
+    """Замеряет длительность блока и передаёт её в гистограмму."""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        """Связывает таймер с гистограммой."""
+        self.histogram = histogram
+
+    def __enter__(self):
+        """Запоминает время начала."""
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Передаёт длительность в гистограмму."""
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Создаёт пустой набор."""
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику в набор."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_LATENCY = REGISTRY.register(Histogram(
+    'practicum_api_latency_seconds', 'Длительность запроса к API Практикума'))
+TELEGRAM_LATENCY = REGISTRY.register(Histogram(
+    'telegram_send_latency_seconds', 'Длительность отправки в Телеграм'))
+RESILIENCE = REGISTRY.register(Counter(
+    'practicum_api_resilience_total',
+    'Повторы, дублирующие запросы и срабатывания автомата', ('event',)))
+CIRCUIT_STATE = REGISTRY.register(Gauge(
+    'practicum_api_circuit_state',
+    'Состояние автомата: 0 - закрыт, 1 - полуоткрыт, 2 - открыт',
+    ('host',)))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки опроса по классу исключения',
+    ('exception',)))
+POLLS = REGISTRY.register(Counter(
+    'homework_polls_total', 'Опросы подписок по результату', ('outcome',)))
+EVENTS = REGISTRY.register(Counter(
+    'homework_webhook_events_total', 'Принятые события по результату',
+    ('outcome',)))
+SUBSCRIPTIONS = REGISTRY.register(Gauge(
+    'homework_subscriptions', 'Число подписок'))
+DUE = REGISTRY.register(Gauge(
+    'homework_subscriptions_due', 'Подписки, опрошенные в последнем проходе'))
+OVERDUE = REGISTRY.register(Gauge(
+    'homework_subscriptions_overdue',
+    'Подписки, опрошенные с опозданием в последнем проходе'))
+LAG = REGISTRY.register(Gauge(
+    'homework_poll_lag_seconds',
+    'Опоздание самого раннего опроса в последнем проходе'))
+
+
+def count_error(error):
+    """Функция учитывает ошибку по классу исходного исключения."""
+    ERRORS.inc(type(error.__cause__ or error).__name__)
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST,
+                         registry=REGISTRY):
+    """Функция запускает HTTP-сервер метрик в фоновом потоке.
+
+    Сервер живёт в metrics_server: http.server загружается долго и
+    импортируется только процессами, которые отдают метрики.
+    """
+    from metrics_server import serve_metrics
+
+    return serve_metrics(port, host, registry)
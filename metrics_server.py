@@ -0,0 +1,31 @@
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по адресу /metrics."""
+
+    def do_GET(self):
+        """Отвечает текстом метрик."""
+        if self.path != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет запросы к метрикам в журнал."""
+
+
+def serve_metrics(port, host, registry):
+    """Функция запускает HTTP-сервер метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import profiling
+import rendering
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', 5))
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, запас capacity."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """Создаёт полную корзину."""
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def refill(self):
+        """Пополняет корзину за прошедшее время."""
+        now = self.clock()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Забирает токен, если он есть."""
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        """Возвращает время до появления токена."""
+        self.refill()
+        return max(0, (1 - self.tokens) / self.rate)
+
+
+class PendingChat:
+    """Сообщения, ожидающие отправки в один чат."""
+
+    __slots__ = ('texts', 'callbacks', 'attempts', 'bucket', 'blocked_until')
+
+    def __init__(self, bucket):
+        """Создаёт пустую очередь чата с собственным ограничителем."""
+        self.texts = []
+        self.callbacks = []
+        self.attempts = 0
+        self.bucket = bucket
+        self.blocked_until = 0
+
+
+class OutboundQueue:
+    """Очередь исходящих сообщений с учётом лимитов Телеграма.
+
+    Несколько сообщений, ожидающих отправки в один чат, объединяются в
+    одно не длиннее rendering.MESSAGE_LIMIT, остальные уходят следующими
+    отправками. Ответ RetryAfter откладывает чат на указанное время, остальные
+    ошибки повторяются до TELEGRAM_MAX_ATTEMPTS раз. Функции обратного
+    вызова получают True после доставки и False после отказа.
+    """
+
+    def __init__(self, bot, chat_rate=TELEGRAM_CHAT_RATE,
+                 global_rate=TELEGRAM_GLOBAL_RATE,
+                 max_attempts=TELEGRAM_MAX_ATTEMPTS, clock=time.monotonic):
+        """Связывает очередь с ботом и лимитами отправки."""
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, clock=clock)
+        self._chats = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.retry_after = 0
+
+    def __len__(self):
+        """Возвращает число чатов с неотправленными сообщениями."""
+        return len(self._chats)
+
+    def bucket(self, chat_id):
+        """Возвращает ограничитель частоты отправки в чат."""
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, clock=self.clock)
+            self._buckets[chat_id] = bucket
+        return bucket
+
+    def enqueue(self, chat_id, text, callback=None):
+        """Ставит сообщение в очередь чата."""
+        with self._lock:
+            pending = self._chats.get(chat_id)
+            if pending is None:
+                pending = PendingChat(self.bucket(chat_id))
+                self._chats[chat_id] = pending
+            parts = rendering.split_message(text)
+            if all(part in pending.texts for part in parts):
+                self.coalesced += 1
+            else:
+                if pending.texts:
+                    self.coalesced += 1
+                pending.texts.extend(parts)
+            if callback is not None:
+                pending.callbacks.append(callback)
+        return True
+
+    def ready_chats(self):
+        """Извлекает чаты, в которые можно отправить сообщение сейчас."""
+        now = self.clock()
+        ready = []
+        with self._lock:
+            for chat_id, pending in list(self._chats.items()):
+                if pending.blocked_until > now:
+                    continue
+                if not self.global_bucket.try_acquire():
+                    break
+                if not pending.bucket.try_acquire():
+                    self.global_bucket.tokens += 1
+                    continue
+                ready.append((chat_id, self._chats.pop(chat_id)))
+        return ready
+
+    def requeue(self, chat_id, pending):
+        """Возвращает сообщения чата в начало очереди."""
+        with self._lock:
+            newer = self._chats.pop(chat_id, None)
+            if newer is not None:
+                pending.texts.extend(
+                    text for text in newer.texts if text not in pending.texts)
+                pending.callbacks.extend(newer.callbacks)
+            self._chats[chat_id] = pending
+            self._chats.move_to_end(chat_id, last=False)
+
+    def finish(self, pending, delivered):
+        """Сообщает функциям обратного вызова результат отправки."""
+        for callback in pending.callbacks:
+            callback(delivered)
+
+    @staticmethod
+    def batch_size(texts):
+        """Возвращает число первых текстов, которые войдут в одно сообщение."""
+        length = len(texts[0])
+        count = 1
+        for text in texts[1:]:
+            length += len(text) + 2
+            if length > rendering.MESSAGE_LIMIT:
+                break
+            count += 1
+        return count
+
+    def send(self, chat_id, pending):
+        """Отправляет объединённое сообщение одного чата.
+
+        Функции обратного вызова получают результат, когда отправлены все
+        сообщения чата.
+        """
+        from telegram.error import RetryAfter, TelegramError
+
+        count = self.batch_size(pending.texts)
+        text = '\n\n'.join(pending.texts[:count])
+        try:
+            with metrics.TELEGRAM_LATENCY.time():
+                with profiling.span('send_message'):
+                    self.bot.send_message(chat_id=chat_id, text=text)
+        except RetryAfter as error:
+            self.retry_after += 1
+            pending.blocked_until = self.clock() + error.retry_after
+            logger.warning('Телеграм ограничил отправку в чат на %s с',
+                           error.retry_after)
+            self.requeue(chat_id, pending)
+            return False
+        except TelegramError as error:
+            pending.attempts += 1
+            logger.error('Ошибка при отправке сообщения в чат. %s', error)
+            if pending.attempts < self.max_attempts:
+                self.requeue(chat_id, pending)
+            else:
+                self.failed += 1
+                self.finish(pending, False)
+            return False
+        logger.info('Сообщение %s отправлено в чат', text)
+        self.sent += 1
+        del pending.texts[:count]
+        pending.attempts = 0
+        if pending.texts:
+            self.requeue(chat_id, pending)
+        else:
+            self.finish(pending, True)
+        return True
+
+    def drain(self):
+        """Отправляет всё, что позволяют лимиты; возвращает число отправок."""
+        return sum(self.send(chat_id, pending)
+                   for chat_id, pending in self.ready_chats())
+
+    def time_until_ready(self):
+        """Возвращает время до следующей возможной отправки или None."""
+        with self._lock:
+            if not self._chats:
+                return None
+            now = self.clock()
+            return max(self.global_bucket.wait_time(), min(
+                max(pending.blocked_until - now, pending.bucket.wait_time())
+                for pending in self._chats.values()))
+
+    def stats(self):
+        """Возвращает счётчики и пропускную способность очереди."""
+        elapsed = max(self.clock() - self.started, 1e-9)
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'retry_after': self.retry_after,
+            'pending': len(self),
+            'throughput': self.sent / elapsed,
+        }
@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import homework
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PARSE_POOL = os.getenv('PARSE_POOL', '').lower() in ('1', 'true', 'yes')
+PARSE_PROCESSES = int(os.getenv('PARSE_PROCESSES', 0)) or os.cpu_count()
+PARSE_BATCH_SIZE = int(os.getenv('PARSE_BATCH_SIZE', 64))
+
+HOMEWORK_FIELDS = ('id', 'homework_name', 'status', 'date_updated')
+
+
+def loads(content):
+    """Функция разбирает JSON быстрым декодером, если он установлен."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode(content):
+    """Функция разбирает и проверяет тело ответа API.
+
+    Из работ остаются только поля, нужные для сравнения статусов и текста
+    сообщения, чтобы результат было дёшево передавать между процессами.
+    """
+    try:
+        response = loads(content)
+    except ValueError as error:
+        raise ConnectionError(
+            'Ответ API не в формате JSON: {}'.format(error)) from error
+    homeworks = homework.check_response(response)
+    compact = {'homeworks': [
+        {field: item[field] for field in HOMEWORK_FIELDS if field in item}
+        if isinstance(item, dict) else item
+        for item in homeworks
+    ]}
+    if 'current_date' in response:
+        compact['current_date'] = response['current_date']
+    return compact
+
+
+def decode_batch(contents):
+    """Функция разбирает пачку ответов: (ответ, None) или (None, ошибка)."""
+    results = []
+    for content in contents:
+        try:
+            results.append((decode(content), None))
+        except Exception as error:
+            results.append((None, error))
+    return results
+
+
+class ParsePool:
+    """Разбор ответов API в пуле процессов.
+
+    Ответы передаются процессам пачками по batch_size, чтобы накладные
+    расходы на передачу приходились на пачку, а не на каждый ответ.
+    Пачка меньше batch_size разбирается в текущем процессе.
+    """
+
+    def __init__(self, processes=PARSE_PROCESSES,
+                 batch_size=PARSE_BATCH_SIZE):
+        """Создаёт пул; процессы запускаются при первом разборе."""
+        self.processes = processes
+        self.batch_size = batch_size
+        self._executor = None
+
+    def decode_many(self, contents):
+        """Разбирает тела ответов, сохраняя их порядок."""
+        contents = list(contents)
+        if self.processes < 2 or len(contents) < self.batch_size:
+            return decode_batch(contents)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        batches = [contents[start:start + self.batch_size]
+                   for start in range(0, len(contents), self.batch_size)]
+        return [result for batch in self._executor.map(decode_batch, batches)
+                for result in batch]
+
+    def close(self):
+        """Останавливает процессы пула."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,289 @@
+import atexit
+import contextlib
+import contextvars
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = os.getenv('TRACE_FILE')
+PROFILE = os.getenv('PROFILE', '').lower() in ('1', 'true', 'yes')
+PROFILE_FILE = os.getenv('PROFILE_FILE', 'profile.folded')
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.01))
+PROFILE_SIGNAL = 'SIGUSR1'
+
+NULL_SPAN = contextlib.nullcontext()
+
+_path = contextvars.ContextVar('profiling_path', default=())
+_tracer = None
+_profiler = None
+
+
+class Tracer:
+    """Запись замеров этапов в файл трассы с буферизацией.
+
+    Строка трассы: начало и длительность этапа в микросекундах и путь
+    этапа через ';', например ``cycle;poll;fetch``, разделённые табуляцией.
+    """
+
+    def __init__(self, path, clock=time.perf_counter_ns):
+        """Открывает файл трассы на дозапись."""
+        self.file = open(path, 'a', encoding='utf-8', buffering=1 << 16)
+        self.clock = clock
+        self.origin = clock()
+        self._lock = threading.Lock()
+
+    def record(self, path, start, duration):
+        """Записывает замер этапа path в наносекундах."""
+        line = '{}\t{}\t{}\n'.format(
+            (start - self.origin) // 1000, duration // 1000, ';'.join(path))
+        with self._lock:
+            self.file.write(line)
+
+    def close(self):
+        """Дописывает буфер и закрывает файл."""
+        with self._lock:
+            self.file.close()
+
+
+class Span:
+    """Замер одного этапа; вложенные этапы наследуют путь родителя."""
+
+    __slots__ = ('tracer', 'name', 'token', 'start')
+
+    def __init__(self, tracer, name):
+        """Запоминает трассу и название этапа."""
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        """Добавляет этап к пути и засекает время."""
+        self.token = _path.set(_path.get() + (self.name,))
+        self.start = self.tracer.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Записывает длительность этапа и восстанавливает путь."""
+        duration = self.tracer.clock() - self.start
+        path = _path.get()
+        _path.reset(self.token)
+        self.tracer.record(path, self.start, duration)
+        return False
+
+
+def span(name):
+    """Функция возвращает замер этапа name или пустой контекст.
+
+    Без трассировки возвращается общий nullcontext, поэтому замеры в
+    горячем пути почти ничего не стоят.
+    """
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name)
+
+
+def start_tracing(path=TRACE_FILE):
+    """Функция включает запись замеров этапов в файл path."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path)
+        atexit.register(stop_tracing)
+    return _tracer
+
+
+def stop_tracing():
+    """Функция выключает трассировку и закрывает файл."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+
+
+def frame_name(frame):
+    """Функция возвращает имя кадра стека: модуль:функция."""
+    code = frame.f_code
+    return '{}:{}'.format(
+        os.path.splitext(os.path.basename(code.co_filename))[0],
+        code.co_name)
+
+
+def fold_stack(frame, root):
+    """Функция сворачивает стек кадра в строку folded stacks."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.append(root)
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Сэмплирующий профилировщик стеков всех потоков.
+
+    Фоновый поток раз в interval секунд снимает стеки остальных потоков
+    через sys._current_frames() и считает одинаковые. Профилируемый код
+    не замедляется, кроме захвата GIL на время снимка. После остановки
+    счётчики пишутся в path в формате folded stacks.
+    """
+
+    def __init__(self, path=PROFILE_FILE, interval=PROFILE_INTERVAL):
+        """Создаёт остановленный профилировщик."""
+        self.path = path
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """Проверяет, снимаются ли стеки."""
+        return self._thread is not None
+
+    def sample(self):
+        """Снимает стеки всех потоков, кроме своего."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                self.counts[fold_stack(frame, names.get(ident, ident))] += 1
+
+    def loop(self):
+        """Снимает стеки до остановки."""
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        """Запускает сэмплирование с чистыми счётчиками."""
+        if self.running:
+            return
+        self.counts = Counter()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self.loop, name='profiler', daemon=True)
+        self._thread.start()
+        logger.info('Профилирование запущено')
+
+    def stop(self):
+        """Останавливает сэмплирование и записывает профиль."""
+        if not self.running:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.write()
+        logger.info('Профиль записан в %s: %s стеков', self.path,
+                    sum(self.counts.values()))
+
+    def toggle(self, signum=None, frame=None):
+        """Запускает или останавливает сэмплирование по сигналу."""
+        if self.running:
+            threading.Thread(target=self.stop, name='profiler-stop').start()
+        else:
+            self.start()
+
+    def write(self):
+        """Записывает счётчики стеков в формате folded stacks."""
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for stack, count in self.counts.most_common():
+                file.write('{} {}\n'.format(stack, count))
+
+
+def configure_profiling(trace_file=TRACE_FILE, profile=PROFILE):
+    """Функция включает трассировку и профилировщик по окружению.
+
+    Сигнал SIGUSR1 запускает и останавливает профилировщик в работающем
+    процессе; при выходе незаписанный профиль сохраняется.
+    """
+    global _profiler
+    if trace_file:
+        start_tracing(trace_file)
+        logger.info('Замеры этапов пишутся в %s', trace_file)
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+        atexit.register(_profiler.stop)
+        signum = getattr(signal, PROFILE_SIGNAL, None)
+        if (signum is not None
+                and threading.current_thread() is threading.main_thread()):
+            signal.signal(signum, _profiler.toggle)
+    if profile:
+        _profiler.start()
+    return _profiler
+
+
+def read_trace(lines):
+    """Функция перебирает (путь, длительность в мкс) из строк трассы."""
+    for line in lines:
+        parts = line.rstrip('\n').split('\t')
+        if len(parts) == 3 and parts[2]:
+            yield parts[2], int(parts[1])
+
+
+def fold_trace(lines):
+    """Функция возвращает собственное время путей этапов в мкс.
+
+    Собственное время - длительность этапа без вложенных этапов. В
+    асинхронном режиме вложенные этапы идут параллельно и могут в сумме
+    превышать родителя, тогда собственное время считается нулевым.
+    """
+    totals = Counter()
+    for path, duration in read_trace(lines):
+        totals[path] += duration
+    folded = Counter(totals)
+    for path, total in totals.items():
+        parent = path.rpartition(';')[0]
+        if parent in folded:
+            folded[parent] -= total
+    return {path: max(total, 0) for path, total in folded.items()}
+
+
+def trace_stats(lines):
+    """Функция возвращает число, сумму, p50 и p99 длительностей этапов."""
+    import statistics
+
+    durations = defaultdict(list)
+    for path, duration in read_trace(lines):
+        durations[path.rpartition(';')[2]].append(duration)
+    stats = {}
+    for stage, values in durations.items():
+        values.sort()
+        stats[stage] = (len(values), sum(values), statistics.median(values),
+                        values[min(len(values) - 1, int(len(values) * 0.99))])
+    return stats
+
+
+def main(argv=None):
+    """Сворачивает трассу в folded stacks или печатает сводку этапов.
+
+    python profiling.py fold trace.tsv > stages.folded - собственное время
+    этапов для flamegraph.pl или speedscope, python profiling.py stats
+    trace.tsv - число, сумма и перцентили длительности этапов.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Сводка трассы этапов опроса')
+    parser.add_argument('command', choices=('fold', 'stats'))
+    parser.add_argument('trace', help='файл трассы TRACE_FILE')
+    args = parser.parse_args(argv)
+    with open(args.trace, encoding='utf-8') as file:
+        if args.command == 'fold':
+            for path, total in sorted(fold_trace(file).items()):
+                if total:
+                    print('{} {}'.format(path, total))
+            return
+        stats = trace_stats(file)
+    print('{:<16} {:>8} {:>12} {:>10} {:>10}'.format(
+        'этап', 'число', 'всего, мс', 'p50, мс', 'p99, мс'))
+    for stage, (count, total, p50, p99) in sorted(
+            stats.items(), key=lambda item: -item[1][1]):
+        print('{:<16} {:>8} {:>12.1f} {:>10.3f} {:>10.3f}'.format(
+            stage, count, total / 1000, p50 / 1000, p99 / 1000))
+
+
+if __name__ == '__main__':
+    main()
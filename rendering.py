@@ -0,0 +1,97 @@
+import functools
+import os
+import threading
+
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 4096))
+
+DEFAULT_LOCALE = 'ru'
+MARKER = '\x00'
+MESSAGE_LIMIT = 4096
+
+TEMPLATES = {
+    'ru': 'Изменился статус проверки работы "{homework_name}". {verdict}',
+    'en': 'The review status of "{homework_name}" has changed. {verdict}',
+}
+NO_CHANGES = {
+    'ru': 'Статус проверки домашней работы не изменился',
+    'en': 'The review status has not changed',
+}
+VERDICTS = {
+    'ru': {
+        'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+        'reviewing': 'Работа взята на проверку ревьюером.',
+        'rejected': 'Работа проверена: у ревьюера есть замечания.'
+    },
+    'en': {
+        'approved': 'The reviewer liked everything. Hooray!',
+        'reviewing': 'The reviewer has started the review.',
+        'rejected': 'The reviewer has left some comments.'
+    },
+}
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+class Renderer:
+    """Сборка сообщений об изменении статуса для одного языка.
+
+    Шаблон разбирается один раз: для каждого статуса заранее собраны
+    части сообщения вокруг названия работы, и сообщение - это их
+    склейка через название. Готовые сообщения хранятся в LRU-кэше по
+    (название работы, статус) на cache_size записей.
+    """
+
+    def __init__(self, template, verdicts, no_changes,
+                 cache_size=RENDER_CACHE_SIZE):
+        """Готовит части сообщений для всех статусов из verdicts."""
+        self.verdicts = dict(verdicts)
+        self.no_changes = no_changes
+        self._parts = {
+            status: template.format(
+                homework_name=MARKER, verdict=verdict).split(MARKER)
+            for status, verdict in self.verdicts.items()
+        }
+        self.render = functools.lru_cache(maxsize=cache_size)(self.compose)
+
+    def compose(self, homework_name, status):
+        """Собирает сообщение о статусе работы без кэша."""
+        return homework_name.join(self._parts[status])
+
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Функция делит текст на части не длиннее limit символов.
+
+    Части режутся по последнему переводу строки, а строка длиннее limit -
+    по limit символов.
+    """
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    parts.append(text)
+    return parts
+
+
+def get_renderer(locale=None, verdicts=None):
+    """Функция возвращает общий для чатов сборщик языка locale.
+
+    verdicts - свои тексты вердиктов чата поверх текстов языка.
+    """
+    locale = locale or DEFAULT_LOCALE
+    if locale not in TEMPLATES:
+        raise ValueError('Неизвестный язык сообщений {}'.format(locale))
+    key = (locale, tuple(sorted((verdicts or {}).items())))
+    renderer = _renderers.get(key)
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get(key)
+            if renderer is None:
+                renderer = Renderer(
+                    TEMPLATES[locale], {**VERDICTS[locale], **dict(key[1])},
+                    NO_CHANGES[locale])
+                _renderers[key] = renderer
+    return renderer
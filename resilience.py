@@ -0,0 +1,234 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent import futures
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import exceptions
+import http_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', 2))
+API_RETRY_BASE = float(os.getenv('API_RETRY_BASE', 0.5))
+API_RETRY_CAP = float(os.getenv('API_RETRY_CAP', 5))
+API_HEDGE_DELAY = (float(os.getenv('API_HEDGE_DELAY'))
+                   if os.getenv('API_HEDGE_DELAY') else None)
+API_HEDGE_WORKERS = int(os.getenv('API_HEDGE_WORKERS', 20))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+BREAKER_RECOVERY_TIMEOUT = float(os.getenv('BREAKER_RECOVERY_TIMEOUT', 60))
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def is_retryable(status_code):
+    """Функция проверяет, говорит ли код ответа о сбое сервера."""
+    return (status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status_code == HTTPStatus.TOO_MANY_REQUESTS)
+
+
+def decorrelated_jitter(base, cap, previous=None, rand=random.random):
+    """Функция возвращает паузу перед повтором (decorrelated jitter)."""
+    previous = base if previous is None else previous
+    return min(cap, base + rand() * (previous * 3 - base))
+
+
+class CircuitBreaker:
+    """Автомат закрыт/открыт/полуоткрыт для запросов к одному хосту.
+
+    После failure_threshold сбоев подряд запросы отклоняются без обращения
+    к хосту на recovery_timeout секунд, затем пропускается один пробный
+    запрос: успех закрывает автомат, сбой открывает его снова.
+    """
+
+    def __init__(self, host, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout=BREAKER_RECOVERY_TIMEOUT,
+                 clock=time.monotonic):
+        """Создаёт закрытый автомат для хоста."""
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def set_state(self, state):
+        """Меняет состояние автомата и публикует его в метрики."""
+        if state != self.state:
+            logger.warning('Автомат запросов к %s: %s -> %s',
+                           self.host, self.state, state)
+        self.state = state
+        metrics.CIRCUIT_STATE.set(STATE_CODES[state], self.host)
+
+    def allow(self):
+        """Разрешает запрос или выбрасывает CircuitOpenException."""
+        with self._lock:
+            elapsed = self.clock() - self.opened_at
+            if self.state == OPEN and elapsed >= self.recovery_timeout:
+                self.set_state(HALF_OPEN)
+            if self.state == OPEN or (self.state == HALF_OPEN
+                                      and self.probing):
+                metrics.RESILIENCE.inc('rejected')
+                raise exceptions.CircuitOpenException(
+                    f'Запросы к {self.host} приостановлены после серии сбоев')
+            if self.state == HALF_OPEN:
+                self.probing = True
+
+    def record_success(self):
+        """Учитывает успешный запрос."""
+        with self._lock:
+            self.failures = 0
+            self.probing = False
+            self.set_state(CLOSED)
+
+    def release(self):
+        """Завершает пробный запрос, не изменив состояние автомата."""
+        with self._lock:
+            self.probing = False
+
+    def record_failure(self):
+        """Учитывает сбой и открывает автомат при превышении порога."""
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                if self.state != OPEN:
+                    metrics.RESILIENCE.inc('opened')
+                self.set_state(OPEN)
+
+
+def close_response(future):
+    """Функция закрывает ответ отброшенного запроса, если он пришёл."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class ResilientClient:
+    """GET-запросы с автоматом на хост, повторами и дублирующим запросом.
+
+    Сбоем считается ошибка соединения или тайм-аут (RequestException),
+    ответ 5xx или 429. Сбой повторяется до attempts раз с паузой
+    decorrelated jitter. Если задан hedge_delay, а ответа нет дольше этого
+    времени, отправляется второй такой же запрос и берётся первый
+    полученный ответ.
+    """
+
+    def __init__(self, request=None, attempts=API_RETRY_ATTEMPTS,
+                 retry_base=API_RETRY_BASE, retry_cap=API_RETRY_CAP,
+                 hedge_delay=API_HEDGE_DELAY, hedge_workers=API_HEDGE_WORKERS,
+                 sleep=time.sleep, rand=random.random, clock=time.monotonic):
+        """Создаёт клиент; request по умолчанию - http_client.get."""
+        self.request = request
+        self.attempts = attempts
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.hedge_delay = hedge_delay
+        self.hedge_workers = hedge_workers
+        self.sleep = sleep
+        self.rand = rand
+        self.clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def breaker(self, url):
+        """Возвращает общий для всех подписок автомат хоста."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(host, clock=self.clock)
+                self._breakers[host] = breaker
+            return breaker
+
+    def send(self, url, **kwargs):
+        """Выполняет один запрос без повторов."""
+        request = self.request or http_client.get
+        return request(url=url, **kwargs)
+
+    def hedged(self, url, **kwargs):
+        """Выполняет запрос, дублируя его при долгом ожидании ответа."""
+        if self.hedge_delay is None:
+            return self.send(url, **kwargs)
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    self.hedge_workers, thread_name_prefix='hedge')
+        first = self._executor.submit(self.send, url, **kwargs)
+        try:
+            return first.result(timeout=self.hedge_delay)
+        except futures.TimeoutError:
+            pass
+        metrics.RESILIENCE.inc('hedged')
+        second = self._executor.submit(self.send, url, **kwargs)
+        error = None
+        for future in futures.as_completed((first, second)):
+            try:
+                response = future.result()
+            except Exception as exception:
+                error = exception
+                continue
+            if future is second:
+                metrics.RESILIENCE.inc('hedge_won')
+            (first if future is second else second).add_done_callback(
+                close_response)
+            return response
+        raise error
+
+    def get(self, url, **kwargs):
+        """Выполняет GET-запрос с защитой от сбоев хоста."""
+        import requests
+
+        breaker = self.breaker(url)
+        delay = None
+        for attempt in range(1, self.attempts + 1):
+            breaker.allow()
+            try:
+                response = self.hedged(url, **kwargs)
+            except requests.RequestException as exception:
+                breaker.record_failure()
+                error, response = exception, None
+            except Exception:
+                breaker.release()
+                raise
+            else:
+                if not is_retryable(response.status_code):
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+            if attempt == self.attempts:
+                break
+            if response is not None:
+                response.close()
+            delay = decorrelated_jitter(
+                self.retry_base, self.retry_cap, delay, self.rand)
+            metrics.RESILIENCE.inc('retried')
+            self.sleep(delay)
+        if response is None:
+            raise error
+        return response
+
+
+_client = ResilientClient()
+
+
+def breaker_for(url):
+    """Функция возвращает общий для процесса автомат хоста."""
+    return _client.breaker(url)
+
+
+def get(url, **kwargs):
+    """Функция выполняет GET-запрос через общий для процесса клиент."""
+    return _client.get(url, **kwargs)
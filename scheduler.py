@@ -0,0 +1,132 @@
+import heapq
+import itertools
+import os
+import random
+import time
+
+SCHEDULE_ACTIVE_INTERVAL = float(os.getenv('SCHEDULE_ACTIVE_INTERVAL', 180))
+SCHEDULE_MAX_INTERVAL = float(os.getenv('SCHEDULE_MAX_INTERVAL', 900))
+SCHEDULE_BACKOFF = float(os.getenv('SCHEDULE_BACKOFF', 2))
+SCHEDULE_JITTER = float(os.getenv('SCHEDULE_JITTER', 0.1))
+SCHEDULE_OVERDUE_AFTER = float(os.getenv('SCHEDULE_OVERDUE_AFTER', 60))
+SCHEDULE_STARTUP_SPREAD = float(os.getenv('SCHEDULE_STARTUP_SPREAD', 60))
+
+POLL_SENT = 'sent'
+POLL_UNCHANGED = 'unchanged'
+POLL_FAILED = 'failed'
+POLL_SEND_FAILED = 'send_failed'
+POLL_DEFERRED = 'deferred'
+
+
+class AdaptiveScheduler:
+    """Очередь подписок с приоритетом по времени следующего опроса.
+
+    Интервал подбирается по результату опроса: пока работа на проверке,
+    подписка опрашивается часто, после изменения или неудачной отправки
+    сообщения - с базовым интервалом, при отсутствии изменений и ошибках
+    API интервал растёт экспоненциально до максимального. Случайный
+    разброс не даёт подпискам собираться в одну волну запросов.
+    """
+
+    def __init__(self, base_interval,
+                 active_interval=SCHEDULE_ACTIVE_INTERVAL,
+                 max_interval=SCHEDULE_MAX_INTERVAL,
+                 backoff=SCHEDULE_BACKOFF, jitter=SCHEDULE_JITTER,
+                 overdue_after=SCHEDULE_OVERDUE_AFTER,
+                 clock=time.monotonic, rand=random.random):
+        """Создаёт пустую очередь; clock и rand заменяются в тестах."""
+        self.base_interval = base_interval
+        self.active_interval = active_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.overdue_after = overdue_after
+        self.clock = clock
+        self.rand = rand
+        self._heap = []
+        self._due = {}
+        self._intervals = {}
+        self._counter = itertools.count()
+        self.lag = 0
+        self.overdue = 0
+
+    def __len__(self):
+        """Возвращает число запланированных подписок."""
+        return len(self._due)
+
+    def __contains__(self, token):
+        """Проверяет, запланирован ли опрос подписки."""
+        return token in self._due
+
+    def schedule(self, token, delay=0):
+        """Планирует опрос подписки через delay секунд."""
+        due = self.clock() + delay
+        self._due[token] = due
+        heapq.heappush(self._heap, (due, next(self._counter), token))
+
+    def remove(self, token):
+        """Снимает подписку с расписания."""
+        self._due.pop(token, None)
+        self._intervals.pop(token, None)
+
+    def next_interval(self, token, outcome, active=False):
+        """Вычисляет интервал до следующего опроса без разброса."""
+        if outcome == POLL_FAILED or (outcome == POLL_UNCHANGED
+                                      and not active):
+            previous = self._intervals.get(token, self.base_interval)
+            interval = min(self.max_interval,
+                           max(previous, self.base_interval) * self.backoff)
+        elif active:
+            interval = self.active_interval
+        else:
+            interval = self.base_interval
+        self._intervals[token] = interval
+        return interval
+
+    def reschedule(self, token, outcome, active=False):
+        """Планирует следующий опрос по результату текущего.
+
+        Отложенная подписка планируется сразу, без изменения интервала.
+        """
+        if outcome == POLL_DEFERRED:
+            self.schedule(token)
+            return 0
+        interval = self.next_interval(token, outcome, active)
+        spread = 1 + self.jitter * (2 * self.rand() - 1)
+        self.schedule(token, interval * spread)
+        return interval
+
+    def pop_due(self, now=None):
+        """Извлекает подписки, время опроса которых наступило.
+
+        Заодно запоминает опоздание самого раннего опроса (lag) и число
+        подписок, опоздавших больше чем на overdue_after (overdue).
+        """
+        now = self.clock() if now is None else now
+        due_tokens = []
+        self.lag = 0
+        self.overdue = 0
+        while self._heap and self._heap[0][0] <= now:
+            due, _, token = heapq.heappop(self._heap)
+            if self._due.get(token) == due:
+                del self._due[token]
+                due_tokens.append(token)
+                self.lag = max(self.lag, now - due)
+                self.overdue += now - due > self.overdue_after
+        return due_tokens
+
+    def next_due(self):
+        """Возвращает ближайшее время опроса или None."""
+        while self._heap:
+            due, _, token = self._heap[0]
+            if self._due.get(token) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def time_until_next(self):
+        """Возвращает число секунд до ближайшего опроса."""
+        due = self.next_due()
+        if due is None:
+            return self.base_interval
+        return max(0, due - self.clock())
@@ -0,0 +1,111 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+
+from storage import token_key
+
+logger = logging.getLogger(__name__)
+
+SHARDING = os.getenv('SHARDING', '').lower() in ('1', 'true', 'yes')
+SHARD_WORKER_ID = (os.getenv('SHARD_WORKER_ID')
+                   or f'{socket.gethostname()}-{os.getpid()}')
+SHARD_HEARTBEAT_INTERVAL = float(os.getenv('SHARD_HEARTBEAT_INTERVAL', 10))
+SHARD_WORKER_TTL = float(os.getenv('SHARD_WORKER_TTL', 30))
+SHARD_REPLICAS = int(os.getenv('SHARD_REPLICAS', 64))
+
+
+def ring_hash(key):
+    """Функция возвращает позицию ключа на кольце."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами.
+
+    При добавлении или удалении воркера переезжает только доля подписок,
+    примерно равная 1/N.
+    """
+
+    def __init__(self, nodes, replicas=SHARD_REPLICAS):
+        """Размещает на кольце replicas точек каждого узла."""
+        points = sorted(
+            (ring_hash(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        """Возвращает узел, отвечающий за ключ, или None."""
+        if not self._nodes:
+            return None
+        index = bisect.bisect(self._hashes, ring_hash(key))
+        return self._nodes[index % len(self._nodes)]
+
+
+class ShardCoordinator:
+    """Доля подписок одного воркера среди воркеров общего хранилища.
+
+    Воркеры отмечаются в хранилище состояния не реже heartbeat_interval;
+    воркер без отметки дольше ttl считается остановленным. Подписка
+    принадлежит воркеру, на которого ключ её токена попадает на кольце.
+    """
+
+    def __init__(self, store, worker_id=SHARD_WORKER_ID,
+                 heartbeat_interval=SHARD_HEARTBEAT_INTERVAL,
+                 ttl=SHARD_WORKER_TTL, replicas=SHARD_REPLICAS,
+                 clock=time.time):
+        """Связывает воркера с общим хранилищем; clock - часы хоста."""
+        self.store = store
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.ttl = ttl
+        self.replicas = replicas
+        self.clock = clock
+        self.members = ()
+        self.ring = HashRing(self.members, replicas)
+        self.last_heartbeat = None
+
+    @property
+    def grace(self):
+        """Задержка первого опроса полученной подписки.
+
+        За это время прежний владелец успевает заметить нового воркера и
+        снять подписку с расписания.
+        """
+        return 2 * self.heartbeat_interval
+
+    def heartbeat(self):
+        """Отмечает воркера; возвращает True, если состав изменился."""
+        now = self.clock()
+        if (self.last_heartbeat is not None
+                and now - self.last_heartbeat < self.heartbeat_interval):
+            return False
+        self.last_heartbeat = now
+        self.store.heartbeat(self.worker_id, now)
+        members = tuple(sorted(
+            set(self.store.workers(now - self.ttl)) | {self.worker_id}))
+        if members == self.members:
+            return False
+        logger.info('Состав воркеров изменился: %s', ', '.join(members))
+        self.members = members
+        self.ring = HashRing(members, self.replicas)
+        return True
+
+    def time_until_heartbeat(self):
+        """Возвращает число секунд до следующей отметки."""
+        if self.last_heartbeat is None:
+            return 0
+        return max(0, self.last_heartbeat + self.heartbeat_interval
+                   - self.clock())
+
+    def owns(self, token):
+        """Проверяет, принадлежит ли подписка с токеном этому воркеру."""
+        return self.ring.node_for(token_key(token)) == self.worker_id
+
+    def leave(self):
+        """Удаляет отметку воркера, чтобы остальные забрали его долю."""
+        self.store.leave(self.worker_id)
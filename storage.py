@@ -0,0 +1,248 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+
+from subscriptions import message_digest, token_key  # noqa: F401
+
+STATE_DB = os.getenv(
+    'STATE_DB',
+    f'{os.path.dirname(os.path.abspath(__file__))}/homework.sqlite3')
+STATE_BATCH_SIZE = int(os.getenv('STATE_BATCH_SIZE', 500))
+
+
+class StateStore(abc.ABC):
+    """Хранилище состояния подписок между перезапусками.
+
+    save() только буферизует состояние, запись выполняет flush(), чтобы
+    при опросе тысяч подписок хранилище писало пачками. Наследник должен
+    реализовать все абстрактные методы: состояния подписок, ключи
+    отправленных уведомлений и отметки воркеров.
+    """
+
+    def __init__(self):
+        """Создаёт пустой буфер изменений."""
+        self._buffer = {}
+        self._lock = threading.Lock()
+
+    def save(self, subscription):
+        """Запоминает состояние подписки для следующей записи."""
+        with self._lock:
+            self._buffer[token_key(subscription.token)] = (
+                subscription.current_date,
+                json.dumps(list(subscription.statuses.items()),
+                           ensure_ascii=False),
+                subscription.last_digest,
+            )
+
+    def flush(self):
+        """Записывает накопленные изменения, возвращает их число."""
+        with self._lock:
+            rows, self._buffer = self._buffer, {}
+        if rows:
+            self.write(rows)
+        return len(rows)
+
+    def restore(self, registry):
+        """Восстанавливает состояние подписок реестра."""
+        states = self.read()
+        restored = 0
+        for subscription in registry:
+            state = states.get(token_key(subscription.token))
+            if state is None:
+                continue
+            current_date, statuses, last_digest = state
+            subscription.current_date = current_date
+            subscription.statuses = dict(
+                (key, status) for key, status in json.loads(statuses))
+            subscription.last_digest = last_digest
+            restored += 1
+        return restored
+
+    @abc.abstractmethod
+    def write(self, rows):
+        """Записывает состояния: ключ -> (current_date, статусы, хеш)."""
+
+    @abc.abstractmethod
+    def read(self):
+        """Читает все сохранённые состояния."""
+
+    @abc.abstractmethod
+    def mark_sent(self, keys, now, expire_before):
+        """Записывает ключи отправленных уведомлений с временем now.
+
+        Ключи, отправленные раньше expire_before, удаляются.
+        """
+
+    @abc.abstractmethod
+    def sent_at(self, key):
+        """Возвращает время отправки уведомления с ключом key или None."""
+
+    @abc.abstractmethod
+    def heartbeat(self, worker_id, now):
+        """Отмечает, что воркер worker_id жив в момент now."""
+
+    @abc.abstractmethod
+    def workers(self, since):
+        """Возвращает воркеров, отметившихся не раньше since."""
+
+    @abc.abstractmethod
+    def leave(self, worker_id):
+        """Удаляет отметку воркера при его остановке."""
+
+    def close(self):
+        """Записывает оставшиеся изменения и закрывает хранилище."""
+        self.flush()
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище в памяти процесса, для тестов и разовых запусков."""
+
+    def __init__(self):
+        """Создаёт пустое хранилище."""
+        super().__init__()
+        self.rows = {}
+        self.sent = {}
+        self.heartbeats = {}
+
+    def write(self, rows):
+        """Записывает состояния в словарь."""
+        self.rows.update(rows)
+
+    def read(self):
+        """Возвращает копию сохранённых состояний."""
+        return dict(self.rows)
+
+    def mark_sent(self, keys, now, expire_before):
+        """Запоминает ключи уведомлений и удаляет устаревшие."""
+        self.sent = {key: sent_at for key, sent_at in self.sent.items()
+                     if sent_at >= expire_before}
+        self.sent.update(dict.fromkeys(keys, now))
+
+    def sent_at(self, key):
+        """Возвращает время отправки уведомления."""
+        return self.sent.get(key)
+
+    def heartbeat(self, worker_id, now):
+        """Запоминает отметку воркера."""
+        self.heartbeats[worker_id] = now
+
+    def workers(self, since):
+        """Возвращает воркеров со свежей отметкой."""
+        return [worker_id for worker_id, now in self.heartbeats.items()
+                if now >= since]
+
+    def leave(self, worker_id):
+        """Удаляет отметку воркера."""
+        self.heartbeats.pop(worker_id, None)
+
+
+class SQLiteStateStore(StateStore):
+    """Хранилище в SQLite с журналом WAL и пакетной записью."""
+
+    def __init__(self, path=STATE_DB, batch_size=STATE_BATCH_SIZE):
+        """Открывает базу и создаёт таблицу состояний."""
+        super().__init__()
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS subscription_state ('
+                'token_key TEXT PRIMARY KEY, from_date NUMERIC, '
+                'statuses TEXT, last_message TEXT, last_digest INTEGER)')
+            columns = [column[1] for column in self.connection.execute(
+                'PRAGMA table_info(subscription_state)')]
+            if 'last_digest' not in columns:
+                self.connection.execute(
+                    'ALTER TABLE subscription_state '
+                    'ADD COLUMN last_digest INTEGER')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS worker_heartbeat ('
+                'worker_id TEXT PRIMARY KEY, heartbeat REAL)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS sent_notification ('
+                'key INTEGER PRIMARY KEY, sent_at REAL)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS sent_notification_sent_at '
+                'ON sent_notification (sent_at)')
+
+    def save(self, subscription):
+        """Буферизует состояние и записывает пачку при её заполнении."""
+        super().save(subscription)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write(self, rows):
+        """Записывает пачку состояний одной транзакцией."""
+        with self._db_lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO subscription_state (token_key, '
+                'from_date, statuses, last_digest) VALUES (?, ?, ?, ?)',
+                [(key, *state) for key, state in rows.items()])
+
+    def read(self):
+        """Читает все сохранённые состояния.
+
+        У строк, записанных до появления last_digest, хеш вычисляется по
+        тексту последнего сообщения.
+        """
+        with self._db_lock:
+            cursor = self.connection.execute(
+                'SELECT token_key, from_date, statuses, last_message, '
+                'last_digest FROM subscription_state')
+            return {
+                key: (current_date, statuses, digest if digest is not None
+                      or message is None else message_digest(message))
+                for key, current_date, statuses, message, digest in cursor
+            }
+
+    def mark_sent(self, keys, now, expire_before):
+        """Записывает ключи уведомлений сразу, минуя пачки состояний."""
+        with self._db_lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM sent_notification WHERE sent_at < ?',
+                (expire_before,))
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO sent_notification VALUES (?, ?)',
+                [(key, now) for key in keys])
+
+    def sent_at(self, key):
+        """Читает время отправки уведомления."""
+        with self._db_lock:
+            row = self.connection.execute(
+                'SELECT sent_at FROM sent_notification WHERE key = ?',
+                (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def heartbeat(self, worker_id, now):
+        """Записывает отметку воркера."""
+        with self._db_lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO worker_heartbeat VALUES (?, ?)',
+                (worker_id, now))
+
+    def workers(self, since):
+        """Удаляет устаревшие отметки и возвращает живых воркеров."""
+        with self._db_lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM worker_heartbeat WHERE heartbeat < ?', (since,))
+            cursor = self.connection.execute(
+                'SELECT worker_id FROM worker_heartbeat')
+            return [worker_id for worker_id, in cursor]
+
+    def leave(self, worker_id):
+        """Удаляет отметку воркера."""
+        with self._db_lock, self.connection:
+            self.connection.execute(
+                'DELETE FROM worker_heartbeat WHERE worker_id = ?',
+                (worker_id,))
+
+    def close(self):
+        """Записывает оставшиеся изменения и закрывает базу."""
+        super().close()
+        with self._db_lock:
+            self.connection.close()
@@ -0,0 +1,179 @@
+import codecs
+import json
+import os
+from datetime import datetime
+
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '').lower() in (
+    '1', 'true', 'yes')
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+
+WHITESPACE = ' \t\n\r'
+
+
+def updated_timestamp(item):
+    """Функция возвращает время обновления работы в секундах или None."""
+    value = item.get('date_updated') if isinstance(item, dict) else None
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class IncompleteData(Exception):
+    """В буфере пока нет целого значения JSON."""
+
+
+class StreamParser:
+    """Разбор ответа API по частям по мере их получения.
+
+    Работы из списка homeworks разбираются по одной, в памяти остаются
+    только они и неразобранный хвост ответа. Работы приходят от новых к
+    старым, поэтому разбор останавливается на первой работе, обновлённой
+    раньше newer_than: остаток ответа не читается. Если current_date
+    стоит в ответе после такой работы, его в результате не будет.
+    """
+
+    def __init__(self, newer_than=0):
+        """Создаёт разборщик; newer_than - метка from_date запроса."""
+        self.newer_than = newer_than
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.final = False
+        self.state = 'start'
+        self.key = None
+        self.homeworks = []
+        self.response = {}
+        self.done = False
+        self.stopped_early = False
+
+    def feed(self, chunk):
+        """Добавляет часть ответа; возвращает True, если чтение закончено."""
+        if not self.done:
+            self.buffer = self.buffer[self.position:] + self.text.decode(
+                chunk, final=self.final)
+            self.position = 0
+            while not self.done:
+                start = self.position
+                try:
+                    self.step()
+                except IncompleteData:
+                    self.position = start
+                    break
+        return self.done
+
+    def close(self):
+        """Завершает разбор и возвращает ответ API."""
+        if not self.done:
+            self.final = True
+            self.feed(b'')
+        if not self.done:
+            raise ConnectionError('Ответ API не в формате JSON: '
+                                  'ответ оборвался до конца объекта')
+        return self.response
+
+    def skip(self):
+        """Пропускает пробелы и возвращает следующий символ."""
+        while (self.position < len(self.buffer)
+               and self.buffer[self.position] in WHITESPACE):
+            self.position += 1
+        if self.position == len(self.buffer):
+            raise IncompleteData
+        return self.buffer[self.position]
+
+    def expect(self, *chars):
+        """Читает один из ожидаемых разделителей."""
+        char = self.skip()
+        if char not in chars:
+            raise ConnectionError(
+                'Ответ API не в формате JSON: неожиданный символ {!r} '
+                'вместо {}'.format(char, ' или '.join(chars)))
+        self.position += 1
+        return char
+
+    def value(self):
+        """Разбирает следующее целое значение JSON."""
+        self.skip()
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, self.position)
+        except ValueError as error:
+            if not self.final:
+                raise IncompleteData
+            raise ConnectionError(
+                'Ответ API не в формате JSON: {}'.format(error)) from error
+        if end == len(self.buffer) and not self.final:
+            raise IncompleteData
+        self.position = end
+        return value
+
+    def step(self):
+        """Выполняет один шаг разбора объекта ответа."""
+        getattr(self, 'on_' + self.state)()
+
+    def on_start(self):
+        """Читает начало объекта ответа."""
+        if self.skip() != '{':
+            raise TypeError('В ответе API не словарь')
+        self.position += 1
+        self.state = 'first_key'
+
+    def on_first_key(self):
+        """Читает первый ключ или конец пустого объекта."""
+        if self.skip() == '}':
+            self.position += 1
+            self.done = True
+            return
+        self.on_key()
+
+    def on_key(self):
+        """Читает ключ и двоеточие."""
+        self.key = self.value()
+        self.expect(':')
+        self.state = 'value'
+
+    def on_value(self):
+        """Читает значение; список homeworks разбирается по элементам."""
+        if self.key == 'homeworks' and self.skip() == '[':
+            self.position += 1
+            self.response['homeworks'] = self.homeworks
+            self.state = 'first_item'
+        else:
+            self.response[self.key] = self.value()
+            self.state = 'next_key'
+
+    def on_next_key(self):
+        """Читает запятую перед ключом или конец объекта."""
+        self.done = self.expect(',', '}') == '}'
+        self.state = 'key'
+
+    def on_first_item(self):
+        """Читает первую работу или конец пустого списка."""
+        if self.skip() == ']':
+            self.position += 1
+            self.state = 'next_key'
+            return
+        self.on_item()
+
+    def on_item(self):
+        """Читает очередную работу."""
+        self.item(self.value())
+
+    def on_next_item(self):
+        """Читает запятую перед работой или конец списка."""
+        if self.expect(',', ']') == ']':
+            self.state = 'next_key'
+        else:
+            self.state = 'item'
+
+    def item(self, item):
+        """Принимает очередную работу или останавливает разбор."""
+        updated = updated_timestamp(item)
+        if updated is not None and updated < self.newer_than:
+            self.stopped_early = True
+            self.done = True
+            return
+        self.homeworks.append(item)
+        self.state = 'next_item'
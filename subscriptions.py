@@ -0,0 +1,170 @@
+import hashlib
+import json
+import sys
+import threading
+
+import exceptions
+import rendering
+
+_STATUS_NAMES = []
+_STATUS_CODES = {}
+_STATUS_LOCK = threading.Lock()
+
+
+def status_code(status):
+    """Возвращает номер статуса; новый статус получает следующий номер."""
+    code = _STATUS_CODES.get(status)
+    if code is None:
+        with _STATUS_LOCK:
+            code = _STATUS_CODES.get(status)
+            if code is None:
+                code = len(_STATUS_NAMES)
+                _STATUS_NAMES.append(status)
+                _STATUS_CODES[status] = code
+    return code
+
+
+def status_name(code):
+    """Возвращает статус по его номеру."""
+    return _STATUS_NAMES[code]
+
+
+def message_digest(message):
+    """Возвращает 64-битный хеш текста сообщения."""
+    return int.from_bytes(
+        hashlib.blake2b(message.encode('utf-8'), digest_size=8).digest(),
+        'big', signed=True)
+
+
+def token_key(token):
+    """Функция возвращает ключ хранилища для токена без самого токена."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def compact_key(key):
+    """Возвращает ключ работы; строковые ключи интернируются."""
+    return sys.intern(key) if isinstance(key, str) else key
+
+
+REVIEWING = status_code('reviewing')
+
+
+class Subscription:
+    """Подписка: токен Практикума, чат Телеграма и состояние опроса.
+
+    Статусы работ хранятся номерами, а последнее сообщение - хешем:
+    текст сообщения собирается только для отправки. renderer - сборщик
+    сообщений на языке чата, None - язык по умолчанию.
+    """
+
+    __slots__ = ('token', 'chat_id', 'current_date', 'last_digest',
+                 'status_codes', 'renderer')
+
+    def __init__(self, token, chat_id, current_date=0):
+        """Создаёт подписку с начальной временной меткой опроса."""
+        self.token = token
+        self.chat_id = chat_id
+        self.current_date = current_date
+        self.last_digest = None
+        self.status_codes = {}
+        self.renderer = None
+
+    @property
+    def statuses(self):
+        """Возвращает известные статусы работ: ключ работы -> статус."""
+        return {key: status_name(code)
+                for key, code in self.status_codes.items()}
+
+    @statuses.setter
+    def statuses(self, statuses):
+        """Заменяет известные статусы работ."""
+        self.status_codes = {compact_key(key): status_code(status)
+                             for key, status in statuses.items()}
+
+    def set_status(self, key, status):
+        """Запоминает статус работы."""
+        self.status_codes[compact_key(key)] = status_code(status)
+
+    def status_changed(self, key, status):
+        """Проверяет, отличается ли статус работы от известного."""
+        return self.status_codes.get(key) != status_code(status)
+
+    def remember(self, message):
+        """Запоминает последнее отправленное сообщение."""
+        self.last_digest = message_digest(message)
+
+    def is_last(self, message):
+        """Проверяет, совпадает ли сообщение с последним отправленным."""
+        return self.last_digest == message_digest(message)
+
+    @property
+    def reviewing(self):
+        """Проверяет, есть ли работа на проверке у ревьюера."""
+        return REVIEWING in self.status_codes.values()
+
+    def __repr__(self):
+        """Возвращает представление подписки без токена."""
+        return 'Subscription(chat_id={!r}, current_date={!r})'.format(
+            self.chat_id, self.current_date)
+
+
+class SubscriptionRegistry:
+    """Реестр подписок: токен Практикума -> чат Телеграма."""
+
+    def __init__(self):
+        """Создаёт пустой реестр."""
+        self._subscriptions = {}
+
+    def __len__(self):
+        """Возвращает количество подписок."""
+        return len(self._subscriptions)
+
+    def __iter__(self):
+        """Перебирает подписки в порядке добавления."""
+        return iter(list(self._subscriptions.values()))
+
+    def __contains__(self, token):
+        """Проверяет наличие подписки с указанным токеном."""
+        return token in self._subscriptions
+
+    def add(self, token, chat_id, current_date=0, locale=None,
+            verdicts=None):
+        """Добавляет подписку или обновляет чат существующей.
+
+        locale и verdicts задают язык сообщений и свои тексты вердиктов.
+        """
+        if not token or not chat_id:
+            raise exceptions.MissingRequiredTokenException(
+                'Для подписки необходимы токен и chat_id')
+        subscription = self._subscriptions.get(token)
+        if subscription is None:
+            subscription = Subscription(token, chat_id, current_date)
+            self._subscriptions[token] = subscription
+        else:
+            subscription.chat_id = chat_id
+        if locale or verdicts:
+            subscription.renderer = rendering.get_renderer(locale, verdicts)
+        return subscription
+
+    def remove(self, token):
+        """Удаляет подписку по токену."""
+        return self._subscriptions.pop(token, None)
+
+    def get(self, token):
+        """Возвращает подписку по токену."""
+        return self._subscriptions.get(token)
+
+    @classmethod
+    def from_file(cls, path):
+        """Загружает реестр из JSON-файла со списком подписок."""
+        with open(path, encoding='utf-8') as file:
+            items = json.load(file)
+        if not isinstance(items, list):
+            raise ValueError(
+                'Файл подписок {} должен содержать список'.format(path))
+        registry = cls()
+        for item in items:
+            registry.add(item.get('token'), item.get('chat_id'),
+                         item.get('current_date', 0), item.get('locale'),
+                         item.get('verdicts'))
+        return registry
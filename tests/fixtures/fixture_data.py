@@ -4,6 +4,27 @@ from datetime import datetime
 import pytest
 
 
+class FakeBot:
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.messages.append((chat_id, text))
+
+
+class FakeClock:
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
 @pytest.fixture
 def random_timestamp():
     left_ts = 1000198000
@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+
+import exceptions
+import homework
+from alerts import ErrorAggregator
+from subscriptions import Subscription
+from tests.fixtures.fixture_data import FakeClock
+
+
+def wrapped(cause):
+    try:
+        raise ConnectionError('url, headers, params') from cause
+    except ConnectionError as error:
+        return error
+
+
+def make_aggregator(admin_chat_id=99):
+    sent = []
+    clock = FakeClock()
+    aggregator = ErrorAggregator(
+        lambda chat_id, text: sent.append((chat_id, text)),
+        admin_chat_id=admin_chat_id, interval=60, clock=clock)
+    return aggregator, sent, clock
+
+
+class TestErrorAggregator:
+
+    def test_rejected_token_reported_to_user(self):
+        with pytest.raises(exceptions.TokenRejectedException):
+            homework.check_status_code(HTTPStatus.UNAUTHORIZED, None)
+        aggregator, sent, clock = make_aggregator()
+        subscription = Subscription('token', 1)
+        error = wrapped(exceptions.TokenRejectedException('Код:401'))
+        assert aggregator.record(subscription, error) == (
+            'Сбой в работе программы: Код:401'
+        )
+        assert aggregator.record(subscription, error) is None, (
+            'Пользователь должен получать ошибку не чаще раза в interval'
+        )
+        clock.now += 61
+        assert aggregator.record(subscription, error) is not None
+        assert sent == []
+
+    def test_operator_errors_summarized(self):
+        aggregator, sent, clock = make_aggregator()
+        for chat_id in (1, 2, 2):
+            assert aggregator.record(
+                Subscription('token', chat_id),
+                wrapped(TimeoutError('долго'))) is None
+        assert sent == [(99, 'Новая ошибка TimeoutError: долго')]
+        assert not aggregator.tick()
+
+        clock.now += 61
+        assert aggregator.tick()
+        assert sent[-1] == (99, 'Ошибки за 1 мин:\nTimeoutError: 3 раз, '
+                                'чатов: 2. Последняя: долго')
+
+        aggregator.record(Subscription('token', 1), TimeoutError('долго'))
+        clock.now += 61
+        aggregator.tick()
+        assert len(sent) == 3, (
+            'Продолжающаяся ошибка должна попадать только в сводку'
+        )
+
+    def test_without_admin_chat_only_logged(self):
+        aggregator, sent, clock = make_aggregator(admin_chat_id=None)
+        aggregator.record(Subscription('token', 1), KeyError('homeworks'))
+        clock.now += 61
+        aggregator.tick()
+        assert sent == []
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from async_engine import AsyncPollingEngine
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+
+class TestAsyncPollingEngine:
+
+    def make_engine(self, count, concurrency, delay):
+        registry = SubscriptionRegistry()
+        for number in range(count):
+            registry.add(f'token-{number}', number + 1)
+        engine = AsyncPollingEngine(FakeBot(), registry, concurrency=concurrency)
+        engine.in_flight = engine.max_in_flight = 0
+
+        async def fake_fetch(subscription):
+            engine.in_flight += 1
+            engine.max_in_flight = max(engine.max_in_flight,
+                                       engine.in_flight)
+            await asyncio.sleep(delay)
+            engine.in_flight -= 1
+            return {
+                'homeworks': [{'homework_name': subscription.token,
+                               'status': 'approved'}],
+                'current_date': 100
+            }
+
+        engine.fetch = fake_fetch
+        return engine
+
+    def test_cycle_bounded_by_semaphore(self):
+        engine = self.make_engine(count=20, concurrency=5, delay=0.01)
+        sent = asyncio.run(engine.run_cycle_async())
+        assert sent == 20, (
+            'Асинхронный движок должен отправить сообщение по каждой подписке'
+        )
+        assert engine.max_in_flight == 5, (
+            'Число одновременных запросов должно ограничиваться семафором'
+        )
+        assert all(sub.current_date == 100 for sub in engine.registry)
+
+    def test_cycle_latency_of_slowest_request(self):
+        engine = self.make_engine(count=50, concurrency=50, delay=0.05)
+        started = time.perf_counter()
+        asyncio.run(engine.run_cycle_async())
+        assert time.perf_counter() - started < 0.05 * 10, (
+            'Длительность цикла должна определяться самым медленным '
+            'запросом, а не их суммой'
+        )
+
+    def test_fetch_error_reported_to_admin(self):
+        engine = self.make_engine(count=1, concurrency=1, delay=0)
+
+        async def failing_fetch(subscription):
+            raise ConnectionError('нет связи')
+
+        engine.fetch = failing_fetch
+        engine.alerts.admin_chat_id = 99
+        assert asyncio.run(engine.run_cycle_async()) == 0
+        assert [chat_id for chat_id, _ in engine.bot.messages] == [99], (
+            'Ошибка запроса должна быть отправлена оператору'
+        )
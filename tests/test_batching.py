@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from async_engine import AsyncPollingEngine
+from batching import BatchFetcher
+from engine import PollingEngine
+from scheduler import POLL_DEFERRED, AdaptiveScheduler
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot, FakeClock
+
+
+def make_registry(count):
+    registry = SubscriptionRegistry()
+    for number in range(count):
+        registry.add(f'token-{number}', number + 1)
+    return registry
+
+
+def answer(subscription):
+    return {'homeworks': [{'homework_name': subscription.token,
+                           'status': 'approved'}],
+            'current_date': 100}
+
+
+class TestBatchFetcher:
+
+    def test_in_flight_bounded(self):
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max': 0}
+
+        def fetch(subscription):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return subscription.token
+
+        fetcher = BatchFetcher(max_in_flight=4)
+        subscriptions = list(make_registry(20))
+        results = {subscription.token: future.result()
+                   for subscription, future
+                   in fetcher.fetch_all(subscriptions, fetch)}
+        fetcher.close()
+        assert results == {sub.token: sub.token for sub in subscriptions}
+        assert state['max'] == 4, (
+            'Одновременно должно выполняться не больше max_in_flight '
+            'запросов'
+        )
+
+    def test_budget_defers_rest(self):
+        clock = FakeClock(1000.0)
+
+        def fetch(subscription):
+            clock.now += 1
+            return subscription.token
+
+        fetcher = BatchFetcher(max_in_flight=1, budget=2.5, clock=clock)
+        futures = [future for _, future
+                   in fetcher.fetch_all(list(make_registry(5)), fetch)]
+        fetcher.close()
+        assert len(futures) == 5, 'Каждая подписка должна быть перебрана'
+        assert [future is None for future in futures] == [
+            False, False, False, True, True], (
+            'После исчерпания бюджета запросы не должны начинаться'
+        )
+
+
+class TestEngineBatch:
+
+    def test_cycle_through_fetcher(self):
+        engine = PollingEngine(FakeBot(), make_registry(20),
+                               fetcher=BatchFetcher(max_in_flight=5))
+        engine.fetch = answer
+        assert engine.run_cycle() == 20
+        assert all(sub.current_date == 100 for sub in engine.registry)
+        engine.fetcher.close()
+
+    def test_deferred_rescheduled_first(self):
+        clock = FakeClock(1000.0)
+
+        def fetch(subscription):
+            clock.now += 1
+            return answer(subscription)
+
+        scheduler = AdaptiveScheduler(60, jitter=0, clock=clock)
+        engine = PollingEngine(
+            FakeBot(), make_registry(5), scheduler=scheduler,
+            fetcher=BatchFetcher(max_in_flight=1, budget=1.5, clock=clock))
+        engine.fetch = fetch
+        engine.schedule_all()
+        assert engine.run_due() == 2
+        assert sorted(scheduler.pop_due()) == ['token-2', 'token-3',
+                                               'token-4'], (
+            'Отложенные подписки должны опрашиваться в следующем цикле'
+        )
+        engine.fetcher.close()
+
+
+class TestAsyncBudget:
+
+    def test_budget_defers_rest(self):
+        engine = AsyncPollingEngine(FakeBot(), make_registry(10),
+                                    concurrency=2, budget=0.03)
+
+        async def fake_fetch(subscription):
+            await asyncio.sleep(0.02)
+            return answer(subscription)
+
+        engine.fetch = fake_fetch
+        outcomes = asyncio.run(engine.poll_many(list(engine.registry)))
+        deferred = outcomes.count(POLL_DEFERRED)
+        assert 0 < deferred < 10, (
+            'Запросы после исчерпания бюджета должны откладываться'
+        )
+        assert all(outcome == POLL_DEFERRED for outcome in outcomes[-deferred:])
@@ -1,11 +1,23 @@
 import os
 from http import HTTPStatus
 
+import pytest
 import requests
 import telegram
 import utils
 
 
+@pytest.fixture(autouse=True)
+def session_get_through_requests_get(monkeypatch):
+    """Тесты подменяют requests.get, общая сессия вызывает его."""
+    import http_client
+
+    def get(url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    monkeypatch.setattr(http_client, 'get', get)
+
+
 class MockResponseGET:
 
     def __init__(self, url, params=None, random_timestamp=None,
@@ -0,0 +1,173 @@
+import json
+import sys
+
+import telegram
+
+import homework
+import rendering
+from engine import NO_CHANGES_MESSAGE, PollingEngine
+from scheduler import POLL_SENT
+from subscriptions import SubscriptionRegistry, status_code
+from tests.fixtures.fixture_data import FakeBot
+
+
+class TestPollingEngine:
+
+    def make_engine(self, monkeypatch, answers):
+        def fake_answer(token, current_timestamp):
+            answer = answers[token]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        monkeypatch.setattr(homework, 'get_token_api_answer', fake_answer)
+        registry = SubscriptionRegistry()
+        for number, token in enumerate(answers, start=1):
+            registry.add(token, number)
+        return FakeBot(), registry
+
+    def test_each_subscription_notified_in_own_chat(self, monkeypatch):
+        answers = {
+            'first': {
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': 100
+            },
+            'second': {
+                'homeworks': [{'homework_name': 'hw2', 'status': 'rejected'}],
+                'current_date': 200
+            },
+        }
+        bot, registry = self.make_engine(monkeypatch, answers)
+        engine = PollingEngine(bot, registry)
+
+        assert engine.run_cycle() == 2, (
+            'Движок должен отправить сообщение по каждой подписке'
+        )
+        chats = [chat_id for chat_id, _ in bot.messages]
+        assert chats == [1, 2], (
+            'Сообщения должны уходить в чат своей подписки'
+        )
+        assert registry.get('first').current_date == 100
+        assert registry.get('second').current_date == 200
+
+    def test_unchanged_status_not_resent(self, monkeypatch):
+        answers = {'token': {'homeworks': [], 'current_date': 100}}
+        bot, registry = self.make_engine(monkeypatch, answers)
+        engine = PollingEngine(bot, registry)
+
+        engine.run_cycle()
+        engine.run_cycle()
+        assert bot.messages == [(1, NO_CHANGES_MESSAGE)], (
+            'Повторный статус не должен отправляться в чат'
+        )
+
+    def test_error_sent_once(self, monkeypatch):
+        answers = {'token': ConnectionError('нет связи')}
+        bot, registry = self.make_engine(monkeypatch, answers)
+        engine = PollingEngine(bot, registry)
+        engine.alerts.admin_chat_id = 99
+
+        engine.run_cycle()
+        engine.run_cycle()
+        assert bot.messages == [(99, 'Новая ошибка ConnectionError: '
+                                     'нет связи')], (
+            'Ошибка работы бота должна один раз отправляться оператору, '
+            'а не в чат подписки'
+        )
+        assert registry.get('token').current_date == 0
+
+
+class TestSubscriptionRegistry:
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1},
+            {'token': 'b', 'chat_id': 2, 'current_date': 5},
+        ]))
+        registry = SubscriptionRegistry.from_file(str(path))
+        assert len(registry) == 2
+        assert registry.get('b').current_date == 5
+
+    def test_compact_state(self):
+        subscription = SubscriptionRegistry().add('token', 1)
+        subscription.set_status(''.join(['h', 'w']), ''.join(['appr', 'oved']))
+        subscription.remember('Сообщение')
+        assert not hasattr(subscription, '__dict__')
+        assert subscription.status_codes == {
+            'hw': status_code('approved')}, (
+            'Статус работы должен храниться номером'
+        )
+        assert next(iter(subscription.status_codes)) is sys.intern('hw')
+        assert isinstance(subscription.last_digest, int), (
+            'Вместо текста последнего сообщения должен храниться хеш'
+        )
+        assert subscription.is_last('Сообщение')
+
+
+class TestHomeworksDiff:
+
+    def test_all_changed_homeworks_in_one_message(self, monkeypatch):
+        answers = [
+            {'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            ], 'current_date': 100},
+            {'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'rejected'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+            ], 'current_date': 200},
+            {'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'rejected'},
+            ], 'current_date': 300},
+        ]
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, timestamp: answers.pop(0))
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        bot = FakeBot()
+        engine = PollingEngine(bot, registry)
+
+        for _ in range(3):
+            engine.poll(subscription)
+        assert len(bot.messages) == 2, (
+            'За один опрос должно отправляться одно сообщение, а уже '
+            'известные статусы - не отправляться повторно'
+        )
+        first, second = (text for _, text in bot.messages)
+        assert '"hw1"' in first and '"hw2"' in first, (
+            'Сообщение должно содержать все изменившиеся работы ответа'
+        )
+        assert '"hw2"' not in second and '"hw3"' in second
+        assert subscription.statuses == {
+            1: 'rejected', 2: 'approved', 3: 'reviewing'}
+        assert subscription.reviewing
+
+    def test_long_history_split_into_messages(self, monkeypatch):
+        class StrictBot(FakeBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if len(text) > rendering.MESSAGE_LIMIT:
+                    raise telegram.error.BadRequest('Message is too long')
+                super().send_message(chat_id, text)
+
+        names = ['username__hw{:02d}.zip'.format(number)
+                 for number in range(60)]
+        answer = {'homeworks': [
+            {'id': number, 'homework_name': name, 'status': 'approved'}
+            for number, name in enumerate(names)
+        ], 'current_date': 100}
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, timestamp: answer)
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        bot = StrictBot()
+        engine = PollingEngine(bot, registry)
+
+        assert engine.poll(subscription) == POLL_SENT, (
+            'Длинная история должна отправляться частями, а не отклоняться'
+        )
+        texts = [text for _, text in bot.messages]
+        assert len(texts) > 1
+        assert all('"{}"'.format(name) in '\n'.join(texts) for name in names)
+        assert subscription.current_date == 100
@@ -0,0 +1,122 @@
+import json
+from http import HTTPStatus
+
+from telegram import TelegramError
+
+import http_client
+from engine import PollingEngine
+from http_cache import ResponseCache
+from scheduler import POLL_SEND_FAILED, POLL_SENT, POLL_UNCHANGED
+from subscriptions import SubscriptionRegistry
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, answer=None, headers=None):
+        self.status_code = status_code
+        self.reason = ''
+        self.headers = headers or {}
+        self.content = json.dumps(answer).encode() if answer else b''
+        self.text = self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FlakyBot:
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise TelegramError('Too Many Requests')
+        self.messages.append((chat_id, text))
+
+
+class TestResponseCache:
+
+    def serve(self, monkeypatch, responses):
+        requests_headers = []
+
+        def get(url, headers=None, **kwargs):
+            requests_headers.append(headers)
+            return responses.pop(0)
+
+        monkeypatch.setattr(http_client, 'get', get)
+        return requests_headers
+
+    def test_same_body_skipped_after_confirm(self, monkeypatch):
+        homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        self.serve(monkeypatch, [
+            FakeResponse(HTTPStatus.OK,
+                         {'homeworks': homeworks, 'current_date': 1}),
+            FakeResponse(HTTPStatus.OK,
+                         {'homeworks': homeworks, 'current_date': 2}),
+            FakeResponse(HTTPStatus.OK,
+                         {'homeworks': homeworks, 'current_date': 3}),
+        ])
+        cache = ResponseCache()
+        assert cache.fetch('token', 0)['current_date'] == 1
+        assert cache.fetch('token', 0) is not None, (
+            'Неподтверждённый ответ не должен пропускаться'
+        )
+        cache.confirm('token')
+        assert cache.fetch('token', 0) is None, (
+            'Ответ, отличающийся только current_date, должен пропускаться'
+        )
+        assert cache.stats() == {'hits': 1, 'misses': 2, 'not_modified': 0}
+
+    def test_etag_sent_and_304_skipped(self, monkeypatch):
+        answer = {'homeworks': [], 'current_date': 1}
+        sent_headers = self.serve(monkeypatch, [
+            FakeResponse(HTTPStatus.OK, answer, {'ETag': '"v1"'}),
+            FakeResponse(HTTPStatus.NOT_MODIFIED),
+        ])
+        cache = ResponseCache()
+        cache.fetch('token', 0)
+        cache.confirm('token')
+        assert cache.fetch('token', 0) is None
+        assert sent_headers[1]['If-None-Match'] == '"v1"', (
+            'Повторный запрос должен содержать If-None-Match'
+        )
+        assert cache.not_modified == 1
+
+    def test_new_from_date_not_conditional(self, monkeypatch):
+        answer = {'homeworks': [], 'current_date': 1}
+        sent_headers = self.serve(monkeypatch, [
+            FakeResponse(HTTPStatus.OK, answer, {'ETag': '"v1"'}),
+            FakeResponse(HTTPStatus.OK, answer, {'ETag': '"v1"'}),
+        ])
+        cache = ResponseCache()
+        cache.fetch('token', 0)
+        cache.confirm('token')
+        assert cache.fetch('token', 1) is not None
+        assert 'If-None-Match' not in sent_headers[1]
+
+    def test_engine_resends_after_failed_send(self, monkeypatch):
+        answer = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                  'current_date': 1}
+        monkeypatch.setattr(
+            http_client, 'get',
+            lambda url, **kwargs: FakeResponse(HTTPStatus.OK, answer))
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        cache = ResponseCache()
+        bot = FlakyBot(failures=1)
+        engine = PollingEngine(bot, registry, cache=cache)
+
+        assert engine.poll(subscription) == POLL_SEND_FAILED
+        assert engine.poll(subscription) == POLL_SENT, (
+            'Ответ, который не удалось отправить, должен отправляться '
+            'при следующем опросе'
+        )
+        assert engine.poll(subscription) == POLL_UNCHANGED
+        assert cache.hits == 0, (
+            'После смены current_date ответ обрабатывается заново'
+        )
+        assert engine.poll(subscription) == POLL_UNCHANGED
+        assert cache.hits == 1
+        assert len(bot.messages) == 1
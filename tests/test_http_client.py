@@ -0,0 +1,83 @@
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+import http_client
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+@pytest.fixture
+def server():
+    server = CountingServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpClient:
+
+    def test_session_reuses_connection(self, server):
+        session = http_client.create_session()
+        url = 'http://{}:{}/'.format(*server.server_address)
+        for _ in range(5):
+            assert session.get(url).json()['current_date'] == 1
+        session.close()
+        assert server.connections == 1, (
+            'Общая сессия должна переиспользовать keep-alive соединение'
+        )
+
+    def test_get_uses_shared_session_with_timeout(self, monkeypatch):
+        calls = []
+
+        class FakeSession:
+            def get(self, url, **kwargs):
+                calls.append(kwargs)
+
+        monkeypatch.setattr(http_client, '_session', FakeSession())
+        http_client.get('http://example.invalid/')
+        http_client.get('http://example.invalid/', timeout=1)
+        assert calls[0]['timeout'] == http_client.TIMEOUT, (
+            'Запрос без явного таймаута должен получать таймаут по умолчанию'
+        )
+        assert calls[1]['timeout'] == 1
+
+    def test_token_not_logged(self, server, monkeypatch, caplog):
+        monkeypatch.setattr(homework, 'ENDPOINT',
+                            'http://{}:{}/'.format(*server.server_address))
+        with caplog.at_level('INFO', logger='homework'):
+            homework.request_api('secret-token', 0)
+        error = homework.api_error(
+            ValueError('сбой'), homework.api_request_data('secret-token', 0))
+        assert 'OAuth key:' in caplog.text
+        assert 'secret-token' not in caplog.text, (
+            'Токен не должен попадать в журнал'
+        )
+        assert 'secret-token' not in str(error), (
+            'Токен не должен попадать в текст ошибки'
+        )
@@ -0,0 +1,96 @@
+import homework
+from engine import PollingEngine
+from idempotency import IdempotencyIndex, notification_key
+from storage import MemoryStateStore, SQLiteStateStore
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot, FakeClock
+
+ITEM = {'id': 1, 'homework_name': 'hw', 'status': 'approved',
+        'date_updated': '2022-04-20T10:00:00Z'}
+
+
+class TestIdempotencyIndex:
+
+    def test_key_depends_on_review(self):
+        key = notification_key(1, ITEM)
+        assert key == notification_key(1, dict(ITEM))
+        assert key != notification_key(2, ITEM)
+        assert key != notification_key(1, dict(ITEM, status='rejected'))
+        assert key != notification_key(
+            1, dict(ITEM, date_updated='2022-04-21T10:00:00Z'))
+
+    def test_evicts_least_recent_and_expired(self):
+        clock = FakeClock(1000.0)
+        index = IdempotencyIndex(ttl=60, max_size=2, clock=clock)
+        index.add([1, 2])
+        assert index.seen(1)
+        index.add([3])
+        assert len(index) == 2
+        assert not index.seen(2), 'Должен вытесняться давно не проверенный'
+        assert index.seen(1) and index.seen(3)
+        clock.now += 61
+        assert not index.seen(1), 'Ключ старше ttl должен забываться'
+
+    def test_reads_through_store(self, tmp_path):
+        clock = FakeClock(1000.0)
+        path = str(tmp_path / 'state.sqlite3')
+        store = SQLiteStateStore(path)
+        IdempotencyIndex(store, ttl=60, clock=clock).add([1])
+        store.close()
+
+        store = SQLiteStateStore(path)
+        index = IdempotencyIndex(store, ttl=60, clock=clock)
+        assert index.seen(1) and not index.seen(2)
+        clock.now += 61
+        assert not IdempotencyIndex(store, ttl=60, clock=clock).seen(1)
+        index.add([2])
+        assert store.sent_at(1) is None, (
+            'Устаревшие ключи должны удаляться из хранилища'
+        )
+        store.close()
+
+
+class TestEngineDedup:
+
+    def make_engine(self, store, bot):
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        return PollingEngine(bot, registry, store=store)
+
+    def test_no_resend_after_crash_or_on_other_worker(self, monkeypatch):
+        answer = {'homeworks': [ITEM], 'current_date': 100}
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, current_timestamp: answer)
+        store = MemoryStateStore()
+        bot = FakeBot()
+        self.make_engine(store, bot).run_cycle()
+        assert len(bot.messages) == 1
+        assert store.rows == {}, 'Состояние ещё не записано: имитация сбоя'
+
+        engine = self.make_engine(store, bot)
+        engine.run_cycle()
+        assert len(bot.messages) == 1, (
+            'Уведомление не должно повторяться после сбоя до записи '
+            'состояния'
+        )
+        subscription = engine.registry.get('token')
+        assert subscription.statuses == {1: 'approved'}
+        assert subscription.current_date == 100
+
+    def test_new_review_notified(self, monkeypatch):
+        answers = [{'homeworks': [ITEM], 'current_date': 100},
+                   {'homeworks': [dict(ITEM, status='reviewing',
+                                       date_updated='2022-04-21T10:00:00Z')],
+                    'current_date': 200},
+                   {'homeworks': [dict(ITEM,
+                                       date_updated='2022-04-22T10:00:00Z')],
+                    'current_date': 300}]
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, current_timestamp: answers.pop(0))
+        bot = FakeBot()
+        engine = self.make_engine(MemoryStateStore(), bot)
+        for _ in range(3):
+            engine.run_cycle()
+        assert len(bot.messages) == 3, (
+            'Повторная проверка с тем же статусом - новое уведомление'
+        )
@@ -0,0 +1,140 @@
+import os
+import queue
+import signal
+import threading
+
+import pytest
+
+from async_engine import AsyncPollingEngine
+from engine import PollingEngine
+from lifecycle import Lifecycle
+from notifier import OutboundQueue
+from storage import MemoryStateStore, token_key
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+
+def make_registry(*tokens):
+    registry = SubscriptionRegistry()
+    for number, token in enumerate(tokens):
+        registry.add(token, number + 1)
+    return registry
+
+
+def answer(subscription):
+    return {'homeworks': [{'homework_name': subscription.token,
+                           'status': 'approved'}],
+            'current_date': 100}
+
+
+class TestLifecycle:
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGHUP'),
+                        reason='Нужны POSIX-сигналы')
+    def test_signals_set_flags_and_wake(self):
+        lifecycle = Lifecycle()
+        previous = signal.getsignal(signal.SIGTERM)
+        lifecycle.install()
+        try:
+            threading.Timer(
+                0.05, os.kill, (os.getpid(), signal.SIGHUP)).start()
+            assert lifecycle.sleep(5), 'Сигнал должен прерывать ожидание'
+            assert lifecycle.take_reload() and not lifecycle.take_reload()
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert lifecycle.stopping.is_set()
+            with pytest.raises(SystemExit):
+                os.kill(os.getpid(), signal.SIGTERM)
+        finally:
+            lifecycle.uninstall()
+        assert signal.getsignal(signal.SIGTERM) is previous
+
+    def test_wakes_inbox(self):
+        inbox = queue.SimpleQueue()
+        engine = PollingEngine(FakeBot(), make_registry('a'), inbox=inbox)
+        threading.Timer(0.05, engine.lifecycle.request_stop).start()
+        assert engine.wait(5) == 0
+        assert engine.lifecycle.stopping.is_set()
+
+
+class TestGracefulShutdown:
+
+    def make_engine(self, engine_class, **options):
+        bot = FakeBot()
+        store = MemoryStateStore()
+        engine = engine_class(bot, make_registry('a', 'b', 'c'), store=store,
+                              outbox=OutboundQueue(bot), **options)
+        return engine, bot, store
+
+    def test_stop_drains_outbox_and_checkpoints(self):
+        engine, bot, store = self.make_engine(PollingEngine)
+        polled = []
+
+        def fetch(subscription):
+            polled.append(subscription.token)
+            engine.lifecycle.request_stop()
+            return answer(subscription)
+
+        engine.fetch = fetch
+        engine.run()
+        assert polled == ['a'], 'После сигнала новые опросы не начинаются'
+        assert [chat_id for chat_id, _ in bot.messages] == [1], (
+            'Очередь сообщений должна досылаться перед выходом'
+        )
+        assert store.rows[token_key('a')][0] == 100, (
+            'Состояние должно записываться перед выходом'
+        )
+        assert all(token in engine.scheduler for token in 'abc'), (
+            'Неопрошенные подписки должны остаться в расписании'
+        )
+
+    def test_async_stop(self):
+        engine, bot, store = self.make_engine(AsyncPollingEngine)
+
+        async def fetch(subscription):
+            engine.lifecycle.request_stop()
+            return answer(subscription)
+
+        engine.fetch = fetch
+        engine.run()
+        assert len(bot.messages) == 3
+        assert len(store.rows) == 3
+
+    def test_restart_spreads_restored(self):
+        registry = make_registry('a', 'b')
+        registry.get('a').current_date = 100
+        engine = PollingEngine(FakeBot(), registry)
+        engine.schedule_all(spread=60)
+        assert engine.scheduler.pop_due() == ['b'], (
+            'Восстановленные подписки не должны опрашиваться все сразу'
+        )
+
+
+class TestReload:
+
+    def test_merge_keeps_state(self):
+        engine = PollingEngine(FakeBot(), make_registry('a', 'b'))
+        engine.schedule_all()
+        engine.registry.get('a').current_date = 100
+        fresh = SubscriptionRegistry()
+        fresh.add('a', 10, locale='en')
+        fresh.add('c', 3)
+        engine.loader = lambda: fresh
+        engine.reload()
+        assert sorted(sub.token for sub in engine.registry) == ['a', 'c']
+        subscription = engine.registry.get('a')
+        assert subscription.current_date == 100, (
+            'Состояние оставшихся подписок должно сохраняться'
+        )
+        assert subscription.chat_id == 10
+        assert subscription.renderer is fresh.get('a').renderer
+        assert 'b' not in engine.scheduler and 'c' in engine.scheduler
+
+    def test_failed_reload_keeps_registry(self):
+        engine = PollingEngine(FakeBot(), make_registry('a'))
+
+        def loader():
+            raise ValueError('битый файл')
+
+        engine.loader = loader
+        engine.reload()
+        assert 'a' in engine.registry
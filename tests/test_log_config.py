@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+
+import log_config
+
+
+@pytest.fixture
+def queue_logging(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    path = tmp_path / 'homework.log'
+    listener = log_config.configure_logging(
+        level='INFO', path=str(path), max_bytes=2000, backup_count=1)
+    yield path, listener
+    log_config.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class TestQueueLogging:
+
+    def test_records_written_by_listener(self, queue_logging):
+        path, listener = queue_logging
+        assert log_config.configure_logging() is listener, (
+            'Повторная настройка не должна добавлять обработчики'
+        )
+        logger = logging.getLogger('homework')
+        logger.info('Сообщение %s отправлено в чат', 'текст')
+        try:
+            raise ValueError('сбой')
+        except ValueError as error:
+            logger.error(error, exc_info=True)
+        log_config.stop_logging()
+        content = path.read_text(encoding='utf-8')
+        assert 'Сообщение текст отправлено в чат' in content, (
+            'Аргументы сообщения должны подставляться в потоке журнала'
+        )
+        assert 'ValueError: сбой' in content
+
+    def test_file_rotated_by_size(self, queue_logging):
+        path, _ = queue_logging
+        logger = logging.getLogger('homework')
+        for number in range(100):
+            logger.info('Запись номер %s', number)
+        log_config.stop_logging()
+        assert path.stat().st_size <= 2000
+        assert (path.parent / 'homework.log.1').exists(), (
+            'Файл журнала должен ротироваться по размеру'
+        )
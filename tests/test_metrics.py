@@ -0,0 +1,69 @@
+from urllib.request import urlopen
+
+import exceptions
+import homework
+import metrics
+from engine import PollingEngine
+from scheduler import AdaptiveScheduler
+from subscriptions import SubscriptionRegistry
+
+
+class TestMetrics:
+
+    def test_histogram_buckets_cumulative(self):
+        histogram = metrics.Histogram('latency', 'Задержка', buckets=(1, 5))
+        for value in (0.5, 2, 7):
+            histogram.observe(value)
+        samples = histogram.samples()
+        assert samples[:3] == [
+            'latency_bucket{le="1"} 1',
+            'latency_bucket{le="5"} 2',
+            'latency_bucket{le="+Inf"} 3',
+        ], 'Корзины гистограммы должны накапливаться'
+        assert samples[-1] == 'latency_count 3'
+
+    def test_errors_counted_by_original_class(self, monkeypatch):
+        def fake_get(**kwargs):
+            raise exceptions.APIResponseStatusException('500')
+
+        monkeypatch.setattr(homework.http_client, 'get', fake_get)
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        engine = PollingEngine(None, registry)
+        monkeypatch.setattr(homework, 'send_chat_message',
+                            lambda bot, chat_id, message: True)
+        before = metrics.ERRORS.value('APIResponseStatusException')
+        engine.run_cycle()
+        assert metrics.ERRORS.value('APIResponseStatusException') == (
+            before + 1), (
+            'Ошибка должна учитываться по классу исходного исключения'
+        )
+
+    def test_overdue_gauges(self):
+        clock = [0.0]
+        scheduler = AdaptiveScheduler(600, overdue_after=60,
+                                      clock=lambda: clock[0])
+        scheduler.schedule('late', 0)
+        scheduler.schedule('on_time', 100)
+        clock[0] = 120
+        assert len(scheduler.pop_due()) == 2
+        assert scheduler.lag == 120
+        assert scheduler.overdue == 1, (
+            'Опоздавшей считается подписка, опрошенная позже overdue_after'
+        )
+
+    def test_metrics_endpoint(self):
+        registry = metrics.Registry()
+        counter = registry.register(
+            metrics.Counter('polls_total', 'Опросы', ('outcome',)))
+        counter.inc('sent')
+        server = metrics.start_metrics_server(0, registry=registry)
+        try:
+            port = server.server_address[1]
+            with urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE polls_total counter' in body
+        assert 'polls_total{outcome="sent"} 1' in body
@@ -0,0 +1,130 @@
+from telegram.error import RetryAfter, TelegramError
+
+import homework
+import rendering
+from engine import PollingEngine
+from notifier import OutboundQueue, TokenBucket
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot, FakeClock
+
+
+class TestTokenBucket:
+
+    def test_rate_limited(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, clock=clock)
+        assert bucket.try_acquire() and bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert bucket.wait_time() == 0.5
+        clock.now = 0.5
+        assert bucket.try_acquire()
+
+
+class TestOutboundQueue:
+
+    def test_pending_messages_coalesced(self):
+        bot = FakeBot()
+        queue = OutboundQueue(bot, clock=FakeClock())
+        delivered = []
+        queue.enqueue(1, 'первое', delivered.append)
+        queue.enqueue(1, 'второе', delivered.append)
+        queue.enqueue(1, 'второе')
+        assert queue.drain() == 1
+        assert bot.messages == [(1, 'первое\n\nвторое')], (
+            'Сообщения одного чата должны объединяться в одно'
+        )
+        assert delivered == [True, True]
+        assert queue.stats()['coalesced'] == 2
+
+    def test_per_chat_and_global_limits(self):
+        clock = FakeClock()
+        bot = FakeBot()
+        queue = OutboundQueue(bot, chat_rate=1, global_rate=2, clock=clock)
+        for chat_id in (1, 2, 3):
+            queue.enqueue(chat_id, 'текст')
+        assert queue.drain() == 2, (
+            'За раз нельзя отправить больше глобального лимита'
+        )
+        queue.enqueue(1, 'ещё')
+        clock.now = 0.5
+        assert queue.drain() == 1
+        assert bot.messages[-1] == (3, 'текст')
+        assert queue.time_until_ready() == 0.5
+        clock.now = 1
+        assert queue.drain() == 1
+        assert bot.messages[-1] == (1, 'ещё')
+
+    def test_retry_after_postpones_chat(self):
+        clock = FakeClock()
+        bot = FakeBot(errors=[RetryAfter(10)])
+        queue = OutboundQueue(bot, clock=clock)
+        queue.enqueue(1, 'текст')
+        assert queue.drain() == 0
+        assert queue.time_until_ready() == 10
+        clock.now = 5
+        assert queue.drain() == 0
+        clock.now = 10
+        assert queue.drain() == 1, (
+            'После RetryAfter сообщение должно отправляться повторно'
+        )
+        assert queue.stats()['retry_after'] == 1
+
+    def test_gives_up_after_max_attempts(self):
+        clock = FakeClock()
+        bot = FakeBot(errors=[TelegramError('ошибка')] * 2)
+        queue = OutboundQueue(bot, max_attempts=2, clock=clock)
+        delivered = []
+        queue.enqueue(1, 'текст', delivered.append)
+        for second in range(3):
+            clock.now = second
+            queue.drain()
+        assert delivered == [False]
+        assert len(queue) == 0
+
+    def test_long_history_split_at_limit(self):
+        clock = FakeClock()
+        bot = FakeBot()
+        queue = OutboundQueue(bot, clock=clock)
+        delivered = []
+        for number in range(60):
+            queue.enqueue(1, 'Работа {}: {}'.format(number, 'х' * 200),
+                          delivered.append)
+        queue.enqueue(1, 'ю' * 5000, delivered.append)
+        while len(queue):
+            queue.drain()
+            clock.now += 1
+        assert all(len(text) <= rendering.MESSAGE_LIMIT
+                   for _, text in bot.messages), (
+            'Объединённое сообщение не должно превышать лимит Телеграма'
+        )
+        assert len(bot.messages) == 6
+        assert ''.join(text for _, text in bot.messages).count('Работа') == 60
+        assert delivered == [True] * 61, (
+            'Отправка подтверждается после доставки всех частей'
+        )
+
+
+class TestEngineOutbox:
+
+    def test_state_committed_after_delivery(self, monkeypatch):
+        answer = {'homeworks': [{'id': 1, 'homework_name': 'hw',
+                                 'status': 'approved'}],
+                  'current_date': 100}
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, timestamp: answer)
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        bot = FakeBot(errors=[RetryAfter(1)])
+        clock = FakeClock()
+        engine = PollingEngine(bot, registry,
+                               outbox=OutboundQueue(bot, clock=clock))
+
+        engine.poll(subscription)
+        engine.drain()
+        assert subscription.current_date == 0, (
+            'Состояние не должно меняться до доставки сообщения'
+        )
+        clock.now = 1
+        engine.drain()
+        assert subscription.current_date == 100
+        assert subscription.statuses == {1: 'approved'}
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+import exceptions
+import parsing
+from async_engine import AsyncPollingEngine
+from engine import PollingEngine
+from scheduler import POLL_SENT
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+
+def make_body(name, status='approved',
+              date_updated='2022-04-20T10:00:00Z'):
+    return json.dumps({
+        'homeworks': [{'id': 1, 'homework_name': name, 'status': status,
+                       'date_updated': date_updated,
+                       'reviewer_comment': 'Комментарий ' * 20}],
+        'current_date': 100,
+    }).encode('utf-8')
+
+
+class TestParsing:
+
+    def test_decode_keeps_only_needed_fields(self):
+        assert parsing.decode(make_body('hw1')) == {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved',
+                           'date_updated': '2022-04-20T10:00:00Z'}],
+            'current_date': 100,
+        }
+        with pytest.raises(exceptions.EmptyResponseAPIException):
+            parsing.decode(b'{}')
+
+    def test_repeated_reviews_notified_after_decode(self):
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        bot = FakeBot()
+        engine = PollingEngine(bot, registry)
+        statuses = ['reviewing', 'rejected', 'reviewing', 'rejected']
+        outcomes = [
+            engine.process(subscription, parsing.decode(make_body(
+                'hw', status, '2022-04-2{}T10:00:00Z'.format(day))))
+            for day, status in enumerate(statuses)
+        ]
+        assert outcomes == [POLL_SENT] * 4, (
+            'Повторная проверка после разбора в пуле - новое уведомление'
+        )
+        assert len(bot.messages) == 4
+
+    def test_pool_preserves_order_and_errors(self):
+        pool = parsing.ParsePool(processes=2, batch_size=2)
+        try:
+            results = pool.decode_many(
+                [make_body('hw1'), b'not json', make_body('hw3')])
+        finally:
+            pool.close()
+        assert [response and response['homeworks'][0]['homework_name']
+                for response, _ in results] == ['hw1', None, 'hw3'], (
+            'Результаты разбора должны идти в порядке ответов'
+        )
+        assert isinstance(results[1][1], ConnectionError)
+
+    def test_async_engine_batch_parsing(self):
+        registry = SubscriptionRegistry()
+        for number in range(5):
+            registry.add(f'token-{number}', number + 1)
+        bot = FakeBot()
+        engine = AsyncPollingEngine(
+            bot, registry, parser=parsing.ParsePool(processes=1))
+
+        async def fake_fetch_content(subscription):
+            return make_body(subscription.token)
+
+        engine.fetch_content = fake_fetch_content
+        assert asyncio.run(engine.run_cycle_async()) == 5
+        assert len(bot.messages) == 5
+        assert all(sub.current_date == 100 for sub in registry)
+
+    def test_async_engine_closes_pool_on_stop(self):
+        closed = []
+
+        class RecordingPool(parsing.ParsePool):
+
+            def close(self):
+                closed.append(True)
+                super().close()
+
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        engine = AsyncPollingEngine(
+            FakeBot(), registry, parser=RecordingPool(processes=1))
+
+        async def fake_fetch_content(subscription):
+            engine.lifecycle.request_stop()
+            return make_body(subscription.token)
+
+        engine.fetch_content = fake_fetch_content
+        engine.run()
+        assert closed == [True], (
+            'Пул разбора должен останавливаться при остановке движка'
+        )
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+import profiling
+from engine import PollingEngine
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+TRACE = [
+    '0\t1000\tcycle\n',
+    '10\t300\tcycle;fetch\n',
+    '400\t500\tcycle;fetch\n',
+    '950\t20\tcycle;fetch;check_response\n',
+    '1000\t5000\tsleep\n',
+]
+
+
+@pytest.fixture
+def trace_path(tmp_path):
+    path = tmp_path / 'trace.tsv'
+    profiling.start_tracing(str(path))
+    yield path
+    profiling.stop_tracing()
+
+
+def traced_paths(path):
+    profiling.stop_tracing()
+    return [line.split('\t')[2].rstrip('\n')
+            for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+class TestSpans:
+
+    def test_disabled_span_is_shared_noop(self):
+        assert profiling.span('fetch') is profiling.NULL_SPAN
+
+    def test_nested_spans_recorded(self, trace_path):
+        with profiling.span('cycle'):
+            with profiling.span('fetch'):
+                pass
+            with profiling.span('send_message'):
+                pass
+        assert traced_paths(trace_path) == [
+            'cycle;fetch', 'cycle;send_message', 'cycle']
+
+    def test_engine_stages(self, trace_path):
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        engine = PollingEngine(FakeBot(), registry)
+        engine.fetch = lambda subscription: {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 100}
+        engine.schedule_all()
+        engine.run_due()
+        assert traced_paths(trace_path) == [
+            'cycle;check_response', 'cycle;parse_status',
+            'cycle;send_message', 'cycle']
+
+
+class TestTraceSummary:
+
+    def test_fold_self_time(self):
+        assert profiling.fold_trace(TRACE) == {
+            'cycle': 200,
+            'cycle;fetch': 780,
+            'cycle;fetch;check_response': 20,
+            'sleep': 5000,
+        }
+
+    def test_stats_by_stage(self):
+        stats = profiling.trace_stats(TRACE)
+        assert stats['fetch'] == (2, 800, 400, 500)
+        assert stats['check_response'][0] == 1
+
+    def test_cli_prints_folded(self, tmp_path, capsys):
+        path = tmp_path / 'trace.tsv'
+        path.write_text(''.join(TRACE), encoding='utf-8')
+        profiling.main(['fold', str(path)])
+        assert 'cycle;fetch 780' in capsys.readouterr().out.splitlines()
+
+
+class TestSamplingProfiler:
+
+    def test_samples_busy_thread(self, tmp_path):
+        stop = threading.Event()
+
+        def busy_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop, name='busy')
+        worker.start()
+        profiler = profiling.SamplingProfiler(
+            str(tmp_path / 'profile.folded'), interval=0.001)
+        profiler.start()
+        time.sleep(0.1)
+        profiler.stop()
+        stop.set()
+        worker.join()
+        lines = (tmp_path / 'profile.folded').read_text(
+            encoding='utf-8').splitlines()
+        assert any(line.startswith('busy;') and 'test_profiling:busy_loop'
+                   in line for line in lines), (
+            'Профиль должен содержать стеки потоков в формате folded stacks'
+        )
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import homework
+from engine import PollingEngine
+from rendering import Renderer, get_renderer, split_message
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+
+class TestRenderer:
+
+    def test_split_message_on_lines(self):
+        text = '\n'.join(['a' * 4] * 5)
+        parts = split_message(text, limit=10)
+        assert parts == ['aaaa\naaaa', 'aaaa\naaaa', 'aaaa']
+        assert split_message('b' * 25, limit=10) == [
+            'b' * 10, 'b' * 10, 'b' * 5]
+        assert split_message('короткое') == ['короткое']
+
+    def test_matches_template_format(self):
+        renderer = Renderer('"{homework_name}": {verdict} ({homework_name})',
+                            {'approved': 'принята {0}'}, '')
+        assert renderer.render('hw', 'approved') == (
+            '"hw": принята {0} (hw)'
+        )
+
+    def test_cache_evicts_old_entries(self):
+        renderer = Renderer('{homework_name} {verdict}', {'approved': 'ok'},
+                            '', cache_size=2)
+        for name in ('a', 'b', 'a', 'c'):
+            renderer.render(name, 'approved')
+        info = renderer.render.cache_info()
+        assert (info.hits, info.currsize) == (1, 2)
+
+    def test_shared_per_locale_and_verdicts(self):
+        assert get_renderer() is get_renderer('ru')
+        custom = get_renderer('en', {'approved': 'Done!'})
+        assert custom is get_renderer('en', {'approved': 'Done!'})
+        assert custom.render('hw', 'approved').endswith('Done!')
+        assert custom.render('hw', 'rejected') == (
+            get_renderer('en').render('hw', 'rejected')
+        )
+        with pytest.raises(ValueError):
+            get_renderer('xx')
+
+
+class TestChatLocale:
+
+    def test_each_chat_gets_own_language(self, monkeypatch, tmp_path):
+        path = tmp_path / 'subscriptions.json'
+        path.write_text(json.dumps([
+            {'token': 'first', 'chat_id': 1},
+            {'token': 'second', 'chat_id': 2, 'locale': 'en',
+             'verdicts': {'approved': 'Done!'}},
+        ]), encoding='utf-8')
+        answer = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                  'current_date': 100}
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, current_timestamp: answer)
+        bot = FakeBot()
+        PollingEngine(bot, SubscriptionRegistry.from_file(str(path))
+                      ).run_cycle()
+
+        assert bot.messages == [
+            (1, homework.parse_status(answer['homeworks'][0])),
+            (2, 'The review status of "hw" has changed. Done!'),
+        ]
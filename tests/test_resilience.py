@@ -0,0 +1,129 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import exceptions
+import homework
+import resilience
+from engine import PollingEngine
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeClock
+
+URL = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+class FakeResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestCircuitBreaker:
+
+    def test_opens_and_recovers_through_half_open(self):
+        clock = FakeClock()
+        breaker = resilience.CircuitBreaker(
+            'host', failure_threshold=2, recovery_timeout=30, clock=clock)
+        breaker.allow()
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == resilience.OPEN
+        with pytest.raises(exceptions.CircuitOpenException):
+            breaker.allow()
+
+        clock.now = 30
+        breaker.allow()
+        assert breaker.state == resilience.HALF_OPEN
+        with pytest.raises(exceptions.CircuitOpenException):
+            breaker.allow()
+        breaker.record_success()
+        assert breaker.state == resilience.CLOSED, (
+            'Успешный пробный запрос должен закрыть автомат'
+        )
+
+
+class TestResilientClient:
+
+    def test_retries_server_errors_with_jitter(self):
+        responses = [FakeResponse(HTTPStatus.BAD_GATEWAY),
+                     FakeResponse(HTTPStatus.OK)]
+        pauses = []
+        client = resilience.ResilientClient(
+            request=lambda url, **kwargs: responses.pop(0),
+            attempts=3, retry_base=1, retry_cap=10, sleep=pauses.append,
+            rand=lambda: 0.5)
+        failed = responses[0]
+        response = client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        assert pauses == [2.0], (
+            'Пауза перед повтором должна вычисляться decorrelated jitter'
+        )
+        assert failed.closed and not response.closed, (
+            'Ответ, после которого запрос повторяется, должен закрываться'
+        )
+
+    def test_breaker_shared_between_calls(self):
+        calls = []
+
+        def failing(url, **kwargs):
+            calls.append(url)
+            raise requests.ConnectionError('нет связи')
+
+        client = resilience.ResilientClient(
+            request=failing, attempts=1, sleep=lambda delay: None,
+            clock=FakeClock())
+        for _ in range(resilience.BREAKER_FAILURE_THRESHOLD):
+            with pytest.raises(requests.ConnectionError):
+                client.get(URL)
+        with pytest.raises(exceptions.CircuitOpenException):
+            client.get(URL)
+        assert len(calls) == resilience.BREAKER_FAILURE_THRESHOLD, (
+            'Открытый автомат не должен обращаться к хосту'
+        )
+
+    def test_hedged_request_returns_fastest(self):
+        release = threading.Event()
+        calls = []
+        slow = FakeResponse(HTTPStatus.GATEWAY_TIMEOUT)
+
+        def request(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                release.wait(5)
+                return slow
+            return FakeResponse(HTTPStatus.OK)
+
+        client = resilience.ResilientClient(
+            request=request, attempts=1, hedge_delay=0.05)
+        try:
+            assert client.get(URL).status_code == HTTPStatus.OK, (
+                'Должен вернуться ответ дублирующего запроса'
+            )
+        finally:
+            release.set()
+        assert len(calls) == 2
+        client._executor.shutdown()
+        assert slow.closed, 'Опоздавший ответ должен закрываться'
+
+    def test_open_circuit_not_reported_to_chat(self, monkeypatch):
+        def open_circuit(**kwargs):
+            raise exceptions.CircuitOpenException('приостановлено')
+
+        monkeypatch.setattr(resilience, 'get', open_circuit)
+        messages = []
+        monkeypatch.setattr(
+            homework, 'send_chat_message',
+            lambda bot, chat_id, message: messages.append(message))
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        PollingEngine(None, registry).run_cycle()
+        assert messages == [], (
+            'Отказ открытого автомата не должен отправляться в чат'
+        )
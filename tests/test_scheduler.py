@@ -0,0 +1,98 @@
+import homework
+from engine import PollingEngine
+from scheduler import (POLL_FAILED, POLL_SEND_FAILED, POLL_SENT,
+                       POLL_UNCHANGED, AdaptiveScheduler)
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeClock
+
+
+def make_scheduler(clock, jitter=0):
+    return AdaptiveScheduler(600, active_interval=60, max_interval=2400,
+                             backoff=2, jitter=jitter, clock=clock,
+                             rand=lambda: 1.0)
+
+
+class TestAdaptiveScheduler:
+
+    def test_pop_due_in_time_order(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.schedule('late', 30)
+        scheduler.schedule('early', 10)
+        scheduler.schedule('later', 100)
+        assert scheduler.pop_due(now=50) == ['early', 'late'], (
+            'Подписки должны извлекаться по времени следующего опроса'
+        )
+        assert scheduler.next_due() == 100
+
+    def test_reschedule_replaces_previous_due(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.schedule('token', 10)
+        scheduler.schedule('token', 500)
+        assert scheduler.pop_due(now=100) == []
+        assert len(scheduler) == 1
+
+    def test_intervals_adapt_to_outcome(self):
+        scheduler = make_scheduler(FakeClock())
+        assert scheduler.next_interval('t', POLL_SENT, active=True) == 60, (
+            'Работа на проверке должна опрашиваться часто'
+        )
+        assert scheduler.next_interval('t', POLL_UNCHANGED) == 1200
+        assert scheduler.next_interval('t', POLL_UNCHANGED) == 2400
+        assert scheduler.next_interval('t', POLL_FAILED) == 2400, (
+            'Интервал не должен превышать максимальный'
+        )
+        assert scheduler.next_interval('t', POLL_SENT) == 600
+
+    def test_send_failure_retried_without_backoff(self):
+        scheduler = make_scheduler(FakeClock())
+        scheduler.next_interval('t', POLL_UNCHANGED)
+        assert scheduler.next_interval('t', POLL_SEND_FAILED) == 600, (
+            'Неудачная отправка должна повторяться с базовым интервалом'
+        )
+        assert scheduler.next_interval(
+            't', POLL_SEND_FAILED, active=True) == 60
+
+    def test_jitter_spreads_due_time(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, jitter=0.1)
+        scheduler.reschedule('token', POLL_SENT)
+        assert scheduler.next_due() == 660
+
+
+class TestEngineSchedule:
+
+    def test_reviewing_polled_sooner_than_idle(self, monkeypatch):
+        answers = {
+            'reviewing': {'homeworks': [{'homework_name': 'hw',
+                                         'status': 'reviewing'}],
+                          'current_date': 1},
+            'idle': {'homeworks': [], 'current_date': 1},
+        }
+        monkeypatch.setattr(homework, 'get_token_api_answer',
+                            lambda token, timestamp: answers[token])
+        monkeypatch.setattr(homework, 'send_chat_message',
+                            lambda bot, chat_id, message: True)
+        clock = FakeClock()
+        registry = SubscriptionRegistry()
+        registry.add('reviewing', 1)
+        registry.add('idle', 2)
+        scheduler = make_scheduler(clock)
+        engine = PollingEngine(None, registry, scheduler=scheduler)
+        assert engine.scheduler is scheduler, (
+            'Движок должен использовать переданное расписание'
+        )
+        for subscription in registry:
+            engine.scheduler.schedule(subscription.token)
+
+        polled = []
+        while clock.now < 1200:
+            due = list(engine.due_subscriptions())
+            for subscription in due:
+                polled.append(subscription.token)
+                engine.reschedule(subscription, engine.poll(subscription))
+            clock.now = engine.scheduler.next_due()
+        assert polled.count('reviewing') > polled.count('idle'), (
+            'Подписка с работой на проверке должна опрашиваться чаще'
+        )
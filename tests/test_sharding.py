@@ -0,0 +1,81 @@
+import homework
+from engine import PollingEngine
+from sharding import HashRing, ShardCoordinator
+from storage import MemoryStateStore, SQLiteStateStore
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeClock
+
+TOKENS = [f'token{number}' for number in range(200)]
+
+
+def make_registry():
+    registry = SubscriptionRegistry()
+    for number, token in enumerate(TOKENS, start=1):
+        registry.add(token, number)
+    return registry
+
+
+class TestHashRing:
+
+    def test_new_node_takes_only_its_share(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in TOKENS
+                 if before.node_for(key) != after.node_for(key)]
+        assert all(after.node_for(key) == 'd' for key in moved), (
+            'Подписки должны переезжать только на новый воркер'
+        )
+        assert 20 < len(moved) < 80
+
+
+class TestShardCoordinator:
+
+    def make_worker(self, store, clock, worker_id):
+        shard = ShardCoordinator(store, worker_id, heartbeat_interval=10,
+                                 ttl=30, clock=clock)
+        engine = PollingEngine(None, make_registry(), store=store,
+                               shard=shard)
+        engine.scheduler.clock = clock
+        return engine
+
+    def test_workers_split_and_rebalance(self, monkeypatch):
+        store, clock, polled = MemoryStateStore(), FakeClock(1000.0), []
+
+        def fake_answer(token, current_timestamp):
+            polled.append(token)
+            return {'homeworks': [], 'current_date': 1}
+
+        monkeypatch.setattr(homework, 'get_token_api_answer', fake_answer)
+        monkeypatch.setattr(homework, 'send_chat_message',
+                            lambda bot, chat_id, message: True)
+        first = self.make_worker(store, clock, 'a')
+        store.heartbeat('b', clock.now)
+        first.schedule_all()
+        second = self.make_worker(store, clock, 'b')
+        second.schedule_all()
+        assert len(first.scheduler) and len(second.scheduler)
+
+        clock.now += first.shard.grace
+        first.run_due()
+        second.run_due()
+        assert sorted(polled) == sorted(TOKENS), (
+            'Каждая подписка должна опрашиваться ровно одним воркером'
+        )
+
+        second.shard.leave()
+        clock.now += 10
+        first.rebalance()
+        assert len(first.scheduler) == len(TOKENS), (
+            'После ухода воркера его подписки должны перейти к оставшимся'
+        )
+
+    def test_sqlite_heartbeats(self, tmp_path):
+        store = SQLiteStateStore(str(tmp_path / 'state.sqlite3'))
+        store.heartbeat('a', 100)
+        store.heartbeat('b', 50)
+        assert store.workers(since=70) == ['a'], (
+            'Воркер без свежей отметки не должен считаться живым'
+        )
+        store.leave('a')
+        assert store.workers(since=0) == []
+        store.close()
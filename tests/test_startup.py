@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', 150))
+HEAVY_MODULES = ('telegram', 'requests', 'aiohttp', 'http.server', 'sqlite3')
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT_DIR, capture_output=True,
+        text=True, check=True)
+
+
+def import_time_ms():
+    result = run_python('-X', 'importtime', '-c', 'import homework')
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if fields[-1] == 'homework':
+            return int(fields[1]) / 1000
+    raise AssertionError('В выводе -X importtime нет модуля homework')
+
+
+class TestStartup:
+
+    def test_heavy_modules_not_imported(self):
+        result = run_python('-c', (
+            'import sys, homework; '
+            'print(" ".join(sorted(set({!r}) & set(sys.modules))))'
+        ).format(HEAVY_MODULES))
+        assert result.stdout.split() == [], (
+            'Импорт homework не должен загружать клиенты и серверы, '
+            'которые нужны только в main()'
+        )
+
+    def test_import_time_budget(self):
+        elapsed = min(import_time_ms() for _ in range(3))
+        assert elapsed < IMPORT_BUDGET_MS, (
+            f'Импорт homework занимает {elapsed:.0f} мс, бюджет - '
+            f'{IMPORT_BUDGET_MS:.0f} мс'
+        )
+
+    def test_telegram_error_resolved_once(self):
+        result = run_python('-c', (
+            'import sys, homework; '
+            'before = "telegram" in sys.modules; '
+            'first = homework.telegram_error(); '
+            'print(before, first is homework.telegram_error(), '
+            'first.__name__)'
+        ))
+        assert result.stdout.split() == ['False', 'True', 'TelegramError'], (
+            'TelegramError должен импортироваться при первой отправке и '
+            'браться из кэша модуля при следующих'
+        )
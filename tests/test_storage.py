@@ -0,0 +1,129 @@
+import sqlite3
+
+import pytest
+
+import homework
+from engine import PollingEngine
+from storage import (MemoryStateStore, SQLiteStateStore, StateStore,
+                     token_key)
+from subscriptions import SubscriptionRegistry
+from tests.fixtures.fixture_data import FakeBot
+
+
+def make_registry():
+    registry = SubscriptionRegistry()
+    registry.add('token', 1)
+    return registry
+
+
+class TestSQLiteStateStore:
+
+    def test_state_survives_reopen(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        registry = make_registry()
+        subscription = registry.get('token')
+        subscription.current_date = 1650000000
+        subscription.statuses = {1: 'approved', 'hw2': 'reviewing'}
+        subscription.remember('Сообщение')
+        store = SQLiteStateStore(path)
+        store.save(subscription)
+        store.close()
+
+        restored = make_registry()
+        store = SQLiteStateStore(path)
+        assert store.restore(restored) == 1
+        store.close()
+        subscription = restored.get('token')
+        assert subscription.current_date == 1650000000, (
+            'После перезапуска опрос должен продолжаться с current_date, '
+            'а не с START_TIME'
+        )
+        assert isinstance(subscription.current_date, int)
+        assert subscription.statuses == {1: 'approved', 'hw2': 'reviewing'}
+        assert subscription.is_last('Сообщение')
+
+    def test_writes_in_batches(self, tmp_path):
+        store = SQLiteStateStore(str(tmp_path / 'state.sqlite3'),
+                                 batch_size=3)
+        registry = SubscriptionRegistry()
+        for number in range(5):
+            store.save(registry.add(f'token-{number}', number + 1))
+        assert len(store.read()) == 3, (
+            'Хранилище должно записывать изменения пачками'
+        )
+        assert store.flush() == 2
+        assert len(store.read()) == 5
+        store.close()
+
+    def test_token_not_stored(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = SQLiteStateStore(str(path))
+        store.save(make_registry().get('token'))
+        store.close()
+        assert b'token' not in path.read_bytes().replace(b'token_key', b'')
+
+    def test_reads_rows_with_message_text(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(
+                'CREATE TABLE subscription_state (token_key TEXT PRIMARY '
+                'KEY, from_date NUMERIC, statuses TEXT, last_message TEXT)')
+            connection.execute(
+                'INSERT INTO subscription_state VALUES (?, ?, ?, ?)',
+                (token_key('token'), 100, '[]', 'Сообщение'))
+        connection.close()
+
+        registry = make_registry()
+        store = SQLiteStateStore(path)
+        assert store.restore(registry) == 1
+        store.close()
+        assert registry.get('token').is_last('Сообщение'), (
+            'Состояние, сохранённое с текстом сообщения, должно читаться'
+        )
+
+
+class TestStateStoreInterface:
+
+    def test_incomplete_store_rejected(self):
+        class RowsOnlyStore(StateStore):
+
+            def write(self, rows):
+                pass
+
+            def read(self):
+                return {}
+
+        with pytest.raises(TypeError, match='sent_at'):
+            RowsOnlyStore()
+
+
+class TestEngineRestart:
+
+    def test_restart_does_not_resend(self, monkeypatch):
+        answer = {'homeworks': [{'id': 1, 'homework_name': 'hw',
+                                 'status': 'approved'}],
+                  'current_date': 100}
+        timestamps = []
+
+        def fake_answer(token, current_timestamp):
+            timestamps.append(current_timestamp)
+            return answer
+
+        monkeypatch.setattr(homework, 'get_token_api_answer', fake_answer)
+        store = MemoryStateStore()
+        bot = FakeBot()
+        engine = PollingEngine(bot, make_registry(), store=store)
+        engine.run_cycle()
+        engine.flush()
+
+        engine = PollingEngine(bot, make_registry(), store=store)
+        engine.restore()
+        engine.run_cycle()
+        assert timestamps == [0, 100], (
+            'После перезапуска запрос должен идти от сохранённой метки'
+        )
+        assert len(bot.messages) == 1, (
+            'После перезапуска последнее сообщение не должно отправляться '
+            'повторно'
+        )
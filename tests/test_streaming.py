@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import homework
+import resilience
+from engine import PollingEngine
+from streaming import StreamParser
+from subscriptions import SubscriptionRegistry
+
+BODY = json.dumps({
+    'homeworks': [{'id': number, 'homework_name': f'работа {number}',
+                   'status': 'approved',
+                   'date_updated': f'2022-04-{20 - number:02d}T10:00:00Z'}
+                  for number in range(10)],
+    'current_date': 1650000000,
+}, ensure_ascii=False).encode('utf-8')
+
+
+def feed_chunks(parser, body, size):
+    for start in range(0, len(body), size):
+        if parser.feed(body[start:start + size]):
+            break
+    return parser.close()
+
+
+class FakeStreamResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), 16):
+            self.read = start + 16
+            yield self.body[start:start + 16]
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreamParser:
+
+    @pytest.mark.parametrize('size', [1, 3, 16, 4096])
+    def test_any_chunk_boundaries(self, size):
+        assert feed_chunks(StreamParser(), BODY, size) == json.loads(BODY), (
+            'Результат не должен зависеть от разбиения ответа на части'
+        )
+
+    def test_whitespace_between_tokens(self):
+        body = json.dumps(json.loads(BODY), indent=2,
+                          separators=(' , ', ' : ')).encode('utf-8')
+        assert feed_chunks(StreamParser(), body, 1) == json.loads(BODY)
+
+    def test_stops_at_older_homework(self):
+        newer_than = datetime(2022, 4, 15, tzinfo=timezone.utc).timestamp()
+        parser = StreamParser(newer_than)
+        response = feed_chunks(parser, BODY, 16)
+        assert [item['id'] for item in response['homeworks']] == [
+            0, 1, 2, 3, 4, 5]
+        assert parser.stopped_early
+
+    def test_truncated_and_not_dict(self):
+        with pytest.raises(ConnectionError):
+            feed_chunks(StreamParser(), BODY[:-5], 16)
+        with pytest.raises(TypeError):
+            feed_chunks(StreamParser(), b'[]', 16)
+
+
+class TestStreamingEngine:
+
+    def test_old_tail_not_read(self, monkeypatch):
+        response = FakeStreamResponse(BODY)
+        monkeypatch.setattr(resilience, 'get', lambda **kwargs: response)
+        messages = []
+        monkeypatch.setattr(
+            homework, 'send_chat_message',
+            lambda bot, chat_id, message: messages.append(message) or True)
+        registry = SubscriptionRegistry()
+        subscription = registry.add('token', 1)
+        subscription.current_date = datetime(
+            2022, 4, 18, tzinfo=timezone.utc).timestamp()
+        PollingEngine(None, registry, stream=True).run_cycle()
+
+        assert len(messages) == 1
+        assert 'работа 2' in messages[0]
+        assert 'работа 3' not in messages[0]
+        assert response.read < len(BODY), (
+            'Ответ не должен дочитываться после устаревших работ'
+        )
+        assert response.closed
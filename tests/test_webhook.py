@@ -0,0 +1,74 @@
+import json
+import queue
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from tests.fixtures.fixture_data import FakeBot
+import webhook
+from engine import PollingEngine
+from storage import token_key
+from subscriptions import SubscriptionRegistry
+
+
+@pytest.fixture
+def receiver():
+    inbox = queue.SimpleQueue()
+    server = webhook.start_webhook_server(inbox, port=0, secret='secret')
+    yield inbox, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body, secret='secret'):
+    request = Request(url, data=body, method='POST',
+                      headers={'X-Webhook-Secret': secret})
+    with urlopen(request) as response:
+        return response.status
+
+
+class TestWebhook:
+
+    def test_event_notifies_without_polling(self, receiver):
+        inbox, base_url = receiver
+        registry = SubscriptionRegistry()
+        registry.add('token', 1)
+        bot = FakeBot()
+        engine = PollingEngine(bot, registry, inbox=inbox)
+        event = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw1',
+                           'status': 'approved'}],
+            'current_date': 100,
+        }
+        status = post(f'{base_url}/events/{token_key("token")}',
+                      json.dumps(event).encode('utf-8'))
+        assert status == 202
+
+        assert engine.wait(1) == 1, (
+            'Событие должно обрабатываться во время ожидания опроса'
+        )
+        assert len(bot.messages) == 1
+        assert 'hw1' in bot.messages[0][1]
+        assert registry.get('token').current_date == 100
+
+    def test_rejects_wrong_secret_and_bad_body(self, receiver):
+        inbox, base_url = receiver
+        url = f'{base_url}/events/key'
+        with pytest.raises(HTTPError) as error:
+            post(url, b'{}', secret='wrong')
+        assert error.value.code == 403
+        with pytest.raises(HTTPError) as error:
+            post(url, b'[1, 2]')
+        assert error.value.code == 400, (
+            'Событие должно быть объектом JSON'
+        )
+        assert inbox.empty()
+
+    def test_unknown_subscription_ignored(self):
+        inbox = queue.SimpleQueue()
+        inbox.put(('unknown', {'homeworks': []}))
+        bot = FakeBot()
+        engine = PollingEngine(bot, SubscriptionRegistry(), inbox=inbox)
+        assert engine.wait(0) == 1
+        assert bot.messages == []
@@ -0,0 +1,72 @@
+import hmac
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_PORT = os.getenv('WEBHOOK_PORT')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_RECONCILE_INTERVAL = float(
+    os.getenv('WEBHOOK_RECONCILE_INTERVAL', 3600))
+WEBHOOK_MAX_BODY = int(os.getenv('WEBHOOK_MAX_BODY', 1024 * 1024))
+
+EVENTS_PATH = '/events/'
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимает события об изменении статуса по адресу /events/<ключ>.
+
+    Ключ подписки - SHA-256 её токена (storage.token_key). Тело события
+    имеет тот же вид, что и ответ API. Обработка выполняется в цикле
+    движка, обработчик только проверяет запрос и кладёт его в очередь.
+    """
+
+    def do_POST(self):
+        """Проверяет событие и ставит его в очередь движка."""
+        if not self.path.startswith(EVENTS_PATH):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        secret = self.server.secret
+        if secret and not hmac.compare_digest(
+                self.headers.get('X-Webhook-Secret', '').encode('utf-8'),
+                secret.encode('utf-8')):
+            self.send_error(HTTPStatus.FORBIDDEN)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > WEBHOOK_MAX_BODY:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            event = json.loads(self.rfile.read(length))
+        except ValueError:
+            event = None
+        if not isinstance(event, dict):
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return
+        self.server.inbox.put((self.path[len(EVENTS_PATH):], event))
+        self.send_response(HTTPStatus.ACCEPTED)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """Пишет запросы в журнал модуля на уровне DEBUG."""
+        logger.debug(format, *args)
+
+
+def start_webhook_server(inbox, port=WEBHOOK_PORT, host=WEBHOOK_HOST,
+                         secret=WEBHOOK_SECRET):
+    """Функция запускает приёмник событий в фоновом потоке.
+
+    Принятые события кладутся в inbox парами (ключ подписки, событие).
+    """
+    server = ThreadingHTTPServer((host, int(port)), WebhookHandler)
+    server.daemon_threads = True
+    server.inbox = inbox
+    server.secret = secret
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server